@@ -0,0 +1,119 @@
+import argparse
+import gc
+import io
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from collections.abc import Callable
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from cache.analysis_cache import ENGINE_VERSION
+from concrete.interpreter import ConcreteInterpreter
+from disassembler.disassembler import Disassembler
+from generator import ProgramParams, generate_program
+from symbolic.symbolic_executor import SymbolicExecutor, analyse, ends_path
+
+# inputs for the concrete interpreter stage
+CONCRETE_INPUTS = 200
+
+def measure(run: Callable[[], object], repeat: int) -> dict:
+    # best wall clock time of repeat runs, then the peak memory of one more run
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'seconds': min(times),
+        'mean_seconds': sum(times) / len(times),
+        'peak_bytes': peak
+    }
+
+def explored(instructions, analysis) -> SymbolicExecutor:
+    executor = SymbolicExecutor(instructions, analysis=analysis)
+    executor.explore()
+    return executor
+
+def bench_program(params: ProgramParams, repeat: int) -> list[dict]:
+    bytecode = generate_program(params)
+    dis = Disassembler(bytecode)
+    instructions = dis.disassemble()
+    executor = explored(instructions, analyse(instructions))
+    inputs = [f'input{i:03d}'.ljust(params.flag_len, 'x') for i in range(CONCRETE_INPUTS)]
+
+    stages = {
+        'disassemble': lambda: Disassembler(bytecode).disassemble(),
+        'format': lambda: dis.write_disassembly(io.StringIO()),
+        'analyse': lambda: analyse(instructions),
+        # exploring includes the static analysis it starts from
+        'explore': lambda: explored(instructions, analyse(instructions)),
+        'codegen': lambda: executor.write_pseudocode(io.StringIO()),
+        'concrete': lambda: ConcreteInterpreter(instructions).run_batch(inputs)
+    }
+
+    results = []
+    for stage, run in stages.items():
+        result = {
+            'stage': stage,
+            'params': params._asdict(),
+            'bytes': len(bytecode),
+            'instructions': len(instructions),
+            'paths': sum(ends_path(state) for state in executor.finished_states)
+        }
+        result.update(measure(run, repeat))
+        results.append(result)
+        print(f'{stage:<12} size={params.size:<6} {result['seconds'] * 1000:10.2f} ms {result['peak_bytes'] / 1024:10.1f} KiB')
+    return results
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Benchmarks each stage on generated programs')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--branch-density', type=float, default=0.5)
+    parser.add_argument('--loop-depth', type=int, default=0)
+    parser.add_argument('--trip-count', type=int, default=3)
+    parser.add_argument('--chain-length', type=int, default=4)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', default=None, help='where to write the results, benchmarks/results/<time>.json by default')
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes:
+        params = ProgramParams(
+            size=size,
+            branch_density=args.branch_density,
+            loop_depth=args.loop_depth,
+            trip_count=args.trip_count,
+            chain_length=args.chain_length,
+            seed=args.seed
+        )
+        results += bench_program(params, args.repeat)
+
+    now = datetime.now(timezone.utc)
+    output = args.output or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results', f'{now:%Y%m%d-%H%M%S}.json')
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump({
+            'time': now.isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'engine_version': ENGINE_VERSION,
+            'results': results
+        }, f, indent=2)
+    print(f'Results written to {output}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,184 @@
+import random
+from typing import NamedTuple
+
+# opcodes the generator emits, see build_opcode_table in src/disassembler/disassembler.py
+JMP = 40
+JE = 41
+JNE = 42
+CLEAR = 44
+WRITE_LAST_CHAR_CODE = 61
+CONCAT_STRINGS = 63
+SET = 64
+ADD = 81
+APPEND = 82
+POP_LAST_CHAR = 83
+INVERT_SIGN = 84
+PRINT = 85
+READ_STR = 86
+RET = 87
+
+# registers the generated code uses
+FLAG = 0
+SCRATCH = 1
+ACC = 2
+# loop counters, outermost first
+COUNTERS = (3, 4)
+OFFSET = 5
+LEFT = 6
+RIGHT = 7
+
+# bits in the constants the generator builds, enough for any offset in a program under 4 MB
+CONST_BITS = 22
+
+class ProgramParams(NamedTuple):
+    # number of blocks of straight line code
+    size: int = 100
+    # chance of a block ending in a check that exits the program
+    branch_density: float = 0.5
+    # how deep loops are nested, at most one loop per counter register
+    loop_depth: int = 0
+    # iterations of each loop
+    trip_count: int = 3
+    # arithmetic operations in each block
+    chain_length: int = 4
+    # characters of the input that are read, later blocks reuse the last one
+    flag_len: int = 29
+    seed: int = 0
+
+# assembles fsvm bytecode, jumps to labels are resolved once every label is known
+class Assembler:
+    def __init__(self) -> None:
+        # bytes, labels as ('label', name) and jumps as ('jump', opcode, name)
+        self.items: list = []
+
+    def emit(self, *code: int) -> None:
+        self.items.append(bytes(code))
+
+    def label(self, name: str) -> None:
+        self.items.append(('label', name))
+
+    def jump(self, opcode: int, name: str) -> None:
+        self.items.append(('jump', opcode, name))
+
+    def const(self, reg: int, value: int) -> bytes:
+        # builds a number bit by bit with a fixed length, so jumps can be sized before their offsets are known
+        code = bytearray([SET + SCRATCH, APPEND, SCRATCH, SET + reg])
+        for bit in format(abs(value), f'0{CONST_BITS}b'):
+            code += bytes([ADD, reg, reg, reg])
+            if bit == '1':
+                code += bytes([ADD, reg, SCRATCH, reg])
+            else:
+                # the same length as the add, and leaves a number unchanged
+                code += bytes([INVERT_SIGN, reg, INVERT_SIGN, reg])
+        code += bytes([INVERT_SIGN, reg if value < 0 else SCRATCH])
+        return bytes(code)
+
+    def jump_size(self) -> int:
+        return len(self.const(OFFSET, 0)) + 1
+
+    def assemble(self) -> bytes:
+        labels = {}
+        address = 0
+        for item in self.items:
+            if isinstance(item, bytes):
+                address += len(item)
+            elif item[0] == 'label':
+                labels[item[1]] = address
+            else:
+                address += self.jump_size()
+
+        code = bytearray()
+        for item in self.items:
+            if isinstance(item, bytes):
+                code += item
+            elif item[0] == 'jump':
+                _, opcode, name = item
+                jump_address = len(code) + self.jump_size() - 1
+                code += self.const(OFFSET, labels[name] - (jump_address + 1))
+                code.append(opcode)
+        return bytes(code)
+
+class ProgramGenerator:
+    def __init__(self, params: ProgramParams) -> None:
+        self.params = params
+        self.random = random.Random(params.seed)
+        self.asm = Assembler()
+        self.blocks = 0
+        self.loops = 0
+
+    def block(self) -> None:
+        asm = self.asm
+        asm.emit(WRITE_LAST_CHAR_CODE, FLAG, LEFT)
+        if self.blocks < self.params.flag_len - 1:
+            asm.emit(POP_LAST_CHAR, FLAG)
+
+        # each operation uses the accumulator once, so expressions grow linearly
+        for _ in range(self.params.chain_length):
+            if self.random.random() < 0.75:
+                asm.emit(ADD, ACC, LEFT, ACC)
+            else:
+                asm.emit(INVERT_SIGN, ACC)
+
+        if self.random.random() < self.params.branch_density:
+            # compares the character with a printable one and exits if they differ
+            asm.items.append(asm.const(RIGHT, self.random.randrange(33, 127)))
+            asm.jump(JNE, 'fail')
+        self.blocks += 1
+
+    def loop(self, depth: int, blocks: int) -> None:
+        asm = self.asm
+        counter = COUNTERS[depth]
+        id = self.loops
+        self.loops += 1
+
+        # the counter is a string with a character for each iteration left
+        asm.emit(CLEAR + counter)
+        for _ in range(self.params.trip_count):
+            asm.emit(APPEND, counter)
+
+        asm.label(f'loop{id}')
+        asm.emit(CLEAR + RIGHT)
+        asm.emit(CONCAT_STRINGS, counter, RIGHT, LEFT)
+        asm.jump(JE, f'end{id}')
+
+        if depth + 1 < min(self.params.loop_depth, len(COUNTERS)):
+            half = blocks // 2
+            self.body(half)
+            self.loop(depth + 1, blocks - half)
+        else:
+            self.body(blocks)
+
+        asm.emit(POP_LAST_CHAR, counter)
+        asm.jump(JMP, f'loop{id}')
+        asm.label(f'end{id}')
+
+    def body(self, blocks: int) -> None:
+        for _ in range(max(blocks, 1)):
+            self.block()
+
+    def generate(self) -> bytes:
+        asm = self.asm
+        asm.emit(READ_STR)
+        asm.emit(SET + ACC)
+
+        if self.params.loop_depth > 0:
+            # half of the blocks are in loops, the rest straight after
+            looped = self.params.size // 2
+            self.loop(0, looped)
+            self.body(self.params.size - looped)
+        else:
+            self.body(self.params.size)
+
+        asm.emit(CLEAR + RIGHT)
+        asm.emit(CONCAT_STRINGS, ACC, RIGHT, 4)
+        asm.emit(PRINT)
+        asm.emit(RET)
+
+        asm.label('fail')
+        asm.emit(CLEAR + 4)
+        asm.emit(PRINT)
+        asm.emit(RET)
+        return asm.assemble()
+
+def generate_program(params: ProgramParams) -> bytes:
+    return ProgramGenerator(params).generate()
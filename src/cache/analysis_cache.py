@@ -0,0 +1,98 @@
+import hashlib
+import os
+import pickle
+import shutil
+from typing import Any
+
+# part of every key, bump it when a change to the engine changes what it produces
+ENGINE_VERSION = 3
+
+DEFAULT_DIRECTORY = '.fsvm-cache'
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+# pickled entries, and outputs kept as the bytes of the file they were written to
+ENTRY_SUFFIXES = ('.pickle', '.out')
+
+def bytecode_digest(bytecode: bytes | memoryview) -> str:
+    return hashlib.sha256(bytecode).hexdigest()
+
+# content addressed store of analysis results on disk. Entries are keyed by
+# the hash of the bytecode, the engine version, the stage that produced them
+# and the settings the stage depends on, and the least recently used entries
+# are removed when the cache grows past max_bytes
+class AnalysisCache:
+    def __init__(self, directory: str = DEFAULT_DIRECTORY, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, digest: str, stage: str, params: tuple, suffix: str = '.pickle') -> str:
+        key = hashlib.sha256(f'{digest}:{ENGINE_VERSION}:{stage}:{params!r}'.encode()).hexdigest()
+        return os.path.join(self.directory, f'{digest[:16]}-{stage}-{key[:32]}{suffix}')
+
+    def get(self, digest: str, stage: str, *params) -> Any | None:
+        path = self.path(digest, stage, params)
+        try:
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except (pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            # written by an incompatible version, or cut short
+            os.remove(path)
+            return None
+
+        # modification times order entries by when they were last used
+        os.utime(path)
+        return value
+
+    def put(self, digest: str, stage: str, value: Any, *params) -> None:
+        path = self.path(digest, stage, params)
+        # written to a temporary file first so readers never see part of an entry
+        temp_path = f'{path}.{os.getpid()}.tmp'
+        with open(temp_path, 'wb') as f:
+            pickle.dump(value, f, pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, path)
+        self.evict()
+
+    def get_file(self, digest: str, stage: str, out_path: str, *params) -> bool:
+        # copies an output that was cached with put_file to out_path, False when it wasn't
+        path = self.path(digest, stage, params, '.out')
+        try:
+            shutil.copyfile(path, out_path)
+        except FileNotFoundError:
+            return False
+        os.utime(path)
+        return True
+
+    def put_file(self, digest: str, stage: str, source_path: str, *params) -> None:
+        # caches an output file as it is, so it's never held in memory as a whole
+        path = self.path(digest, stage, params, '.out')
+        temp_path = f'{path}.{os.getpid()}.tmp'
+        shutil.copyfile(source_path, temp_path)
+        os.replace(temp_path, path)
+        self.evict()
+
+    def evict(self) -> None:
+        entries = []
+        total = 0
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(ENTRY_SUFFIXES):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    # removed by another process
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
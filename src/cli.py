@@ -0,0 +1,251 @@
+import argparse
+import json
+import mmap
+import os
+import resource
+import signal
+import sys
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from cache.analysis_cache import DEFAULT_DIRECTORY, AnalysisCache, bytecode_digest
+from disassembler.disassembler import Disassembler
+from symbolic.spill import SpillStore
+from symbolic.symbolic_executor import DEFAULT_UNROLL, SymbolicExecutor, analyse, ends_path
+from typing import NamedTuple
+
+STAGES = ('disassembly', 'pseudocode')
+
+class JobTimeout(Exception):
+    pass
+
+class JobSettings(NamedTuple):
+    stages: tuple[str, ...]
+    flag_len: int | None
+    max_unroll: int | None
+    # seconds each job can run for, None for no limit
+    timeout: float | None
+    cache_directory: str | None
+    # pending states past which the rest are written to disk, None for no limit
+    max_live_states: int | None = None
+    # bytes of resident memory past which pending states are written to disk, None for no limit
+    max_rss: int | None = None
+    # where spilled states are written, the temporary directory when None
+    spill_directory: str | None = None
+
+class Job(NamedTuple):
+    input: str
+    # directory the job's outputs are written to
+    output: str
+
+def init_worker(memory_limit: int | None) -> None:
+    # workers are reused between jobs, so the limit is on the address space of the whole process
+    if memory_limit is not None:
+        _, hard = resource.getrlimit(resource.RLIMIT_AS)
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit, hard))
+
+def raise_timeout(signum, frame) -> None:
+    raise JobTimeout()
+
+def run_job(job: Job, settings: JobSettings) -> dict:
+    start = time.perf_counter()
+    summary = {
+        'input': job.input,
+        'output': job.output,
+        'status': 'ok',
+        'error': None,
+        'stages': list(settings.stages)
+    }
+
+    # an alarm interrupts the job wherever it is, and the worker carries on with the next one
+    signal.signal(signal.SIGALRM, raise_timeout)
+    if settings.timeout is not None:
+        signal.setitimer(signal.ITIMER_REAL, settings.timeout)
+    try:
+        analyse_file(job, settings, summary)
+    except JobTimeout:
+        summary['status'] = 'timeout'
+    except MemoryError:
+        summary['status'] = 'out_of_memory'
+    except Exception as e:
+        summary['status'] = 'error'
+        summary['error'] = f'{type(e).__name__}: {e}'
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+
+    summary['seconds'] = time.perf_counter() - start
+    os.makedirs(job.output, exist_ok=True)
+    with open(os.path.join(job.output, 'summary.json'), 'w') as f:
+        json.dump(summary, f, indent=2)
+    return summary
+
+def analyse_file(job: Job, settings: JobSettings, summary: dict) -> None:
+    os.makedirs(job.output, exist_ok=True)
+    cache = AnalysisCache(settings.cache_directory) if settings.cache_directory is not None else None
+
+    with open(job.input, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as bytecode:
+        digest = bytecode_digest(bytecode)
+        summary['sha256'] = digest
+        summary['bytes'] = len(bytecode)
+        dis = Disassembler(bytecode)
+        static = cache.get(digest, 'static') if cache is not None else None
+        static_changed = static is None
+        if static is None:
+            instrs = dis.disassemble()
+            # disassembly alone doesn't need the analysis
+            analysis = analyse(instrs) if 'pseudocode' in settings.stages else None
+            static = (instrs, analysis)
+        instrs, analysis = static
+        dis.instructions = instrs
+    summary['instructions'] = len(instrs)
+
+    if 'disassembly' in settings.stages:
+        with open(os.path.join(job.output, 'disassembly.txt'), 'w') as f:
+            dis.write_disassembly(f)
+
+    if 'pseudocode' in settings.stages:
+        params = (settings.flag_len, settings.max_unroll)
+        pseudocode_path = os.path.join(job.output, 'pseudocode.c')
+        # the outcomes are cached last, so they're only found once the pseudocode is complete
+        outcomes = cache.get(digest, 'outcomes', *params) if cache is not None else None
+        if outcomes is not None and not cache.get_file(digest, 'pseudocode', pseudocode_path, *params):
+            outcomes = None
+        summary['cached'] = outcomes is not None
+        if outcomes is None:
+            compiled = len(analysis.summaries.summaries)
+            spill = None
+            if settings.max_live_states is not None or settings.max_rss is not None:
+                spill = SpillStore(settings.max_live_states, settings.max_rss, settings.spill_directory)
+            executor = SymbolicExecutor(instrs, max_unroll=settings.max_unroll, flag_len=settings.flag_len, analysis=analysis, spill=spill)
+            try:
+                executor.explore()
+            finally:
+                if spill is not None:
+                    spill.close()
+            if spill is not None:
+                summary['spilled_states'] = spill.spills
+            # written as it's emitted, so the program is never held in memory as one string
+            with open(pseudocode_path, 'w') as f:
+                executor.write_pseudocode(f)
+            outcomes = dict(Counter(state.status.name.lower() for state in executor.finished_states if ends_path(state)))
+            if cache is not None:
+                cache.put_file(digest, 'pseudocode', pseudocode_path, *params)
+                cache.put(digest, 'outcomes', outcomes, *params)
+            static_changed |= len(analysis.summaries.summaries) != compiled
+
+        summary['paths'] = sum(outcomes.values())
+        summary['outcomes'] = outcomes
+
+    # only complete analyses are cached, disassembly alone leaves it out
+    if cache is not None and static_changed and analysis is not None:
+        cache.put(digest, 'static', static)
+
+def find_inputs(paths: list[str]) -> list[str]:
+    # files as given, and every file under a directory in name order
+    inputs = []
+    for path in paths:
+        if os.path.isdir(path):
+            for directory, dirs, files in os.walk(path):
+                dirs[:] = sorted(d for d in dirs if not d.startswith('.'))
+                inputs += [os.path.join(directory, name) for name in sorted(files) if not name.startswith('.')]
+        else:
+            inputs.append(path)
+    return inputs
+
+def build_jobs(inputs: list[str], output_directory: str) -> list[Job]:
+    # outputs are named after the input file, inputs with the same name are numbered
+    jobs = []
+    names = Counter()
+    for input in inputs:
+        name = os.path.basename(input)
+        names[name] += 1
+        if names[name] > 1:
+            name = f'{name}-{names[name]}'
+        jobs.append(Job(input, os.path.join(output_directory, name)))
+    return jobs
+
+def failed(job: Job, settings: JobSettings, error: str) -> dict:
+    return {
+        'input': job.input,
+        'output': job.output,
+        'status': 'error',
+        'error': error,
+        'stages': list(settings.stages)
+    }
+
+def run_jobs(jobs: list[Job], settings: JobSettings, workers: int, memory_limit: int | None) -> list[dict]:
+    # runs the jobs on a pool of long lived workers, printing each summary as a line of JSON as it finishes
+    summaries = []
+    queue = list(reversed(jobs))
+    while queue:
+        pending: dict[Future, Job] = {}
+        with ProcessPoolExecutor(workers, initializer=init_worker, initargs=(memory_limit,)) as pool:
+            try:
+                while queue or pending:
+                    while queue and len(pending) < workers:
+                        job = queue.pop()
+                        pending[pool.submit(run_job, job, settings)] = job
+
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        summary = future.result()
+                        del pending[future]
+                        summaries.append(summary)
+                        print(json.dumps(summary), flush=True)
+            except BrokenProcessPool:
+                # a worker was killed, the jobs it could have been running are failed and the rest
+                # go to a new pool
+                for job in pending.values():
+                    summary = failed(job, settings, 'worker process died')
+                    summaries.append(summary)
+                    print(json.dumps(summary), flush=True)
+    # in the order the inputs were given rather than the order they finished
+    order = {job.output: i for i, job in enumerate(jobs)}
+    summaries.sort(key=lambda summary: order[summary['output']])
+    return summaries
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Disassembles and symbolically executes fsvm bytecode files')
+    parser.add_argument('inputs', nargs='+', help='bytecode files, or directories of them')
+    parser.add_argument('-o', '--output', default='output', help='directory the outputs of each input are written under')
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1, help='number of worker processes')
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=list(STAGES))
+    parser.add_argument('--timeout', type=float, default=None, help='seconds each input can take')
+    parser.add_argument('--memory-limit', type=int, default=None, help='MiB of address space each worker can use')
+    parser.add_argument('--flag-len', type=int, default=29, help='length of the input, 0 for a symbolic length')
+    parser.add_argument('--max-unroll', type=int, default=DEFAULT_UNROLL, help='loop iterations run before the rest are summarised, -1 to unroll fully')
+    parser.add_argument('--max-live-states', type=int, default=None, help='pending states kept in memory, the rest are written to disk')
+    parser.add_argument('--max-rss', type=int, default=None, help='MiB of resident memory past which pending states are written to disk')
+    parser.add_argument('--spill-directory', default=None, help='where pending states are written, the temporary directory by default')
+    parser.add_argument('--cache', default=DEFAULT_DIRECTORY, help='directory of the analysis cache')
+    parser.add_argument('--no-cache', action='store_true')
+    args = parser.parse_args()
+
+    inputs = find_inputs(args.inputs)
+    if not inputs:
+        print('No inputs found')
+        sys.exit(1)
+
+    settings = JobSettings(
+        stages=tuple(stage for stage in STAGES if stage in args.stages),
+        flag_len=args.flag_len or None,
+        max_unroll=None if args.max_unroll < 0 else args.max_unroll,
+        timeout=args.timeout,
+        cache_directory=None if args.no_cache else args.cache,
+        max_live_states=args.max_live_states,
+        max_rss=args.max_rss * 1024 * 1024 if args.max_rss is not None else None,
+        spill_directory=args.spill_directory
+    )
+    memory_limit = args.memory_limit * 1024 * 1024 if args.memory_limit is not None else None
+    jobs = build_jobs(inputs, args.output)
+    summaries = run_jobs(jobs, settings, min(args.jobs, len(jobs)), memory_limit)
+
+    statuses = Counter(summary['status'] for summary in summaries)
+    os.makedirs(args.output, exist_ok=True)
+    with open(os.path.join(args.output, 'summary.json'), 'w') as f:
+        json.dump({'statuses': dict(statuses), 'inputs': summaries}, f, indent=2)
+    print(f'Analysed {len(summaries)} inputs: ' + ', '.join(f'{count} {status}' for status, count in statuses.items()), file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+from collections.abc import Iterable, Sequence
+from disassembler.disassembler import Instr, Mnemonic, Reg
+from disassembler.flow import reg_id
+from enum import Enum
+from typing import NamedTuple
+
+class Outcome(Enum):
+    RETURNED = 0
+    # the program did something the VM can't do, like jumping outside the program
+    FAULTED = 1
+    STEP_LIMIT = 2
+
+class ConcreteResult(NamedTuple):
+    input: str
+    output: str
+    outcome: Outcome
+    steps: int
+
+def to_int(value: str) -> int:
+    # the VM's comparison treats anything that isn't a number as 0
+    try:
+        return int(value)
+    except ValueError:
+        return 0
+
+def add(left: str, right: str) -> str:
+    if left == '' or right == '':
+        return left if right == '' else right
+    return str(int(left) + int(right))
+
+def invert_sign(val: str) -> str:
+    # the VM flips the sign character rather than converting to a number
+    return val[1:] if val.startswith('-') else '-' + val
+
+def last_char_code(val: str) -> str:
+    # an empty string reads its terminator
+    return str(ord(val[-1])) if val else '0'
+
+# where a trace returns to when the program returns
+RETURNED = -1
+
+# runs programs on concrete input, with the same semantics as the symbolic
+# executor has for concrete values. Straight line code starting at each
+# position that is jumped to is compiled into a Python function (a trace)
+# ending at the next branch, so dispatch happens once per trace rather than
+# once per instruction
+class ConcreteInterpreter:
+    def __init__(self, instructions: Sequence[Instr], max_steps: int = 1_000_000) -> None:
+        self.instructions = instructions
+        self.max_steps = max_steps
+        self.address_index = {instr.address: index for index, instr in enumerate(instructions)}
+        # compiled traces and their lengths, by start index
+        self.traces: dict[int, tuple] = {}
+
+    def compile_trace(self, start: int) -> tuple:
+        lines = ['\tr0, r1, r2, r3, r4, r5, r6, r7 = R']
+        index = start
+        exit = None
+
+        while index < len(self.instructions) and exit is None:
+            instr = self.instructions[index]
+            ops = [f'r{reg_id(o)}' if isinstance(o, Reg) else repr(o) for o in instr.operands]
+            index += 1
+
+            match instr.mnemonic:
+                case Mnemonic.CLEAR:
+                    lines.append(f"\t{ops[0]} = ''")
+                case Mnemonic.SET:
+                    lines.append(f'\t{ops[0]} = {ops[1]}')
+                case Mnemonic.APPEND:
+                    lines.append(f'\t{ops[0]} += {ops[1]}')
+                case Mnemonic.ADD:
+                    lines.append(f'\t{ops[0]} = add({ops[1]}, {ops[2]})')
+                case Mnemonic.CONCAT_STRINGS:
+                    lines.append(f'\t{ops[0]} = {ops[1]} + {ops[2]}')
+                case Mnemonic.INVERT_SIGN:
+                    lines.append(f'\t{ops[0]} = invert_sign({ops[0]})')
+                case Mnemonic.WRITE_CHAR:
+                    lines.append(f'\t{ops[0]} = chr(int({ops[1]}))')
+                case Mnemonic.WRITE_LAST_CHAR_CODE:
+                    lines.append(f'\t{ops[0]} = last_char_code({ops[1]})')
+                case Mnemonic.POP_LAST_CHAR:
+                    lines.append(f'\t{ops[0]} = {ops[0]}[:-1]')
+                case Mnemonic.PRINT:
+                    lines.append(f"\tout.append({ops[0]} + '\\n')")
+                case Mnemonic.READ_STR:
+                    lines.append(f"\t{ops[0]} = next(tokens, '')")
+                case Mnemonic.RET:
+                    exit = f'\treturn {RETURNED}'
+                case Mnemonic.JMP | Mnemonic.JE | Mnemonic.JNE | Mnemonic.JL:
+                    target = f'address_index[{instr.address + 1} + int(r5)]'
+                    match instr.mnemonic:
+                        case Mnemonic.JMP:
+                            exit = f'\treturn {target}'
+                        case Mnemonic.JE:
+                            test = 'r6 == r7'
+                        case Mnemonic.JNE:
+                            test = 'r6 != r7'
+                        case Mnemonic.JL:
+                            test = 'to_int(r6) < to_int(r7)'
+                    if exit is None:
+                        exit = f'\treturn {target} if {test} else {index}'
+
+        lines.append('\tR[:] = r0, r1, r2, r3, r4, r5, r6, r7')
+        # running past the end of the program faults
+        lines.append(exit if exit is not None else f'\treturn {index}')
+
+        source = 'def trace(R, out, tokens):\n' + '\n'.join(lines)
+        namespace = {
+            'add': add,
+            'invert_sign': invert_sign,
+            'last_char_code': last_char_code,
+            'to_int': to_int,
+            'address_index': self.address_index,
+        }
+        exec(source, namespace)
+        return namespace['trace'], index - start
+
+    def run(self, stdin: str) -> ConcreteResult:
+        traces = self.traces
+        end = len(self.instructions)
+        max_steps = self.max_steps
+
+        regs = [''] * 8
+        output = []
+        tokens = iter(stdin.split())
+        pc = 0
+        steps = 0
+
+        try:
+            while pc != RETURNED:
+                if pc >= end:
+                    return ConcreteResult(stdin, ''.join(output), Outcome.FAULTED, steps)
+                if steps >= max_steps:
+                    return ConcreteResult(stdin, ''.join(output), Outcome.STEP_LIMIT, steps)
+
+                trace = traces.get(pc)
+                if trace is None:
+                    trace = traces[pc] = self.compile_trace(pc)
+                pc = trace[0](regs, output, tokens)
+                steps += trace[1]
+
+        # a char code too large for chr overflows rather than being out of range
+        except (ValueError, OverflowError, IndexError, KeyError):
+            return ConcreteResult(stdin, ''.join(output), Outcome.FAULTED, steps)
+
+        return ConcreteResult(stdin, ''.join(output), Outcome.RETURNED, steps)
+
+    def run_batch(self, inputs: Iterable[str]) -> list[ConcreteResult]:
+        # traces are compiled once and shared by every input
+        return [self.run(stdin) for stdin in inputs]
@@ -1,4 +1,8 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Callable, Iterable, Iterator, Sequence
 from enum import Enum
+from typing import NamedTuple, TextIO
 
 class Mnemonic(Enum):
     JMP = 'jmp'
@@ -54,132 +58,284 @@ class Instr:
         num_spaces = 22 - len(self.mnemonic.value)
         return f'{hex(self.address)}:\t{self.mnemonic.value}{' '* num_spaces}{operand_str}'
 
+
+class OpcodeInfo(NamedTuple):
+    mnemonic: Mnemonic
+    # total size of the instruction in bytes, including the opcode
+    length: int
+    # how to build the operands of the instruction, an int selects an
+    # operand byte (always a register ID), anything else is a fixed operand
+    layout: tuple[int | Reg | str, ...]
+
+# the most operand bytes any opcode reads
+OPERAND_SLOTS = 3
+
+def build_opcode_table() -> list[OpcodeInfo | None]:
+    table: list[OpcodeInfo | None] = [None] * 256
+
+    # jumps to (pos + reg5)
+    table[40] = OpcodeInfo(Mnemonic.JMP, 1, (Reg.REG_5,))
+
+    # jumps to (pos + offset) if reg6 == reg7
+    # these registers are fixed in the handler
+    table[41] = OpcodeInfo(Mnemonic.JE, 1, (Reg.REG_5, Reg.REG_6, Reg.REG_7))
+
+    # jumps to (pos + r5) if reg6 != reg7
+    # these registers are fixed in the handler
+    table[42] = OpcodeInfo(Mnemonic.JNE, 1, (Reg.REG_5, Reg.REG_6, Reg.REG_7))
+
+    # jumps to (pos + reg5) if reg6 < reg7
+    # reg5 is loaded only if less than condition is true
+    table[43] = OpcodeInfo(Mnemonic.JL, 1, (Reg.REG_6, Reg.REG_7, Reg.REG_5))
+
+    # clear reg
+    for opcode in range(44, 52):
+        table[opcode] = OpcodeInfo(Mnemonic.CLEAR, 1, (get_reg(opcode - 44),))
+
+    # opcodes 52 - 60 don't exist
+
+    # get char code of last char of string, operand bytes are (src, dest)
+    table[61] = OpcodeInfo(Mnemonic.WRITE_LAST_CHAR_CODE, 3, (1, 0))
+
+    # write char given by int in reg, operand bytes are (src, dest)
+    table[62] = OpcodeInfo(Mnemonic.WRITE_CHAR, 3, (1, 0))
+
+    # converts registers to strings/chars and concats them, operand bytes are (left, right, dest)
+    table[63] = OpcodeInfo(Mnemonic.CONCAT_STRINGS, 4, (2, 0, 1))
+
+    # set reg = '0'
+    for opcode in range(64, 72):
+        table[opcode] = OpcodeInfo(Mnemonic.SET, 1, (get_reg(opcode - 64), '0'))
+
+    # opcodes 72 - 80 don't exist
+
+    # add, operand bytes are (left, right, dest)
+    table[81] = OpcodeInfo(Mnemonic.ADD, 4, (2, 0, 1))
+
+    # append '1' to reg
+    table[82] = OpcodeInfo(Mnemonic.APPEND, 2, (0, '1'))
+
+    # pop last char of string (store in same reg)
+    table[83] = OpcodeInfo(Mnemonic.POP_LAST_CHAR, 2, (0,))
+
+    # invert sign of reg
+    table[84] = OpcodeInfo(Mnemonic.INVERT_SIGN, 2, (0,))
+
+    # print string to stdout
+    table[85] = OpcodeInfo(Mnemonic.PRINT, 1, (Reg.REG_4,))
+
+    # read string from stdin
+    table[86] = OpcodeInfo(Mnemonic.READ_STR, 1, (Reg.REG_0,))
+
+    # exit
+    table[87] = OpcodeInfo(Mnemonic.RET, 1, ())
+
+    return table
+
+OPCODE_TABLE = build_opcode_table()
+
+# instruction length by opcode, 0 for opcodes that don't exist
+OPCODE_LENGTHS = bytes(info.length if info else 0 for info in OPCODE_TABLE)
+
+# zero bytes used to fill the unused operand slots of an instruction
+SLOT_PADDING = [bytes(OPERAND_SLOTS + 1 - length) for length in range(OPERAND_SLOTS + 2)]
+
+REGS = [get_reg(reg_id) for reg_id in range(8)]
+
+REG_NAMES = [reg.value for reg in REGS]
+
+def build_format_templates() -> list[tuple[str, tuple[int, ...]] | None]:
+    # format string of every opcode's disassembly line, with the operand slots
+    # whose registers fill it in. Only the address and registers change
+    # between instructions with the same opcode
+    templates: list[tuple[str, tuple[int, ...]] | None] = [None] * 256
+    for opcode, info in enumerate(OPCODE_TABLE):
+        if info is None:
+            continue
+        num_spaces = 22 - len(info.mnemonic.value)
+        operands = ', '.join('{}' if isinstance(o, int) else operand_to_str(o) for o in info.layout)
+        # a blank line separates the code after each branch
+        end = '\n\n' if info.mnemonic in BRANCH_MNEMONICS else '\n'
+        template = f'{{}}:\t{info.mnemonic.value}{' ' * num_spaces}{operands}{end}'
+        templates[opcode] = (template, tuple(o for o in info.layout if isinstance(o, int)))
+    return templates
+
+FORMAT_TEMPLATES = build_format_templates()
+
+# a decoded program stored as parallel arrays with one entry per instruction
+# (OPERAND_SLOTS entries per instruction for operands), Instr objects are only
+# created when an instruction is accessed
+class InstructionStream(Sequence[Instr]):
+    def __init__(self) -> None:
+        self.addresses = array('I')
+        self.opcodes = array('B')
+        self.operands = array('B')
+
+    def __len__(self) -> int:
+        return len(self.opcodes)
+
+    def __getitem__(self, index: int) -> Instr:
+        if index < 0:
+            index += len(self.opcodes)
+        info = OPCODE_TABLE[self.opcodes[index]]
+        base = index * OPERAND_SLOTS
+        operands = [
+            REGS[self.operands[base + o]] if isinstance(o, int) else o
+            for o in info.layout
+        ]
+        return Instr(self.addresses[index], info.mnemonic, *operands)
+
+    def __iter__(self) -> Iterator[Instr]:
+        for index in range(len(self.opcodes)):
+            yield self[index]
+
+    def mnemonic_at(self, index: int) -> Mnemonic:
+        return OPCODE_TABLE[self.opcodes[index]].mnemonic
+
+    def index_of_address(self, address: int) -> int:
+        index = bisect_left(self.addresses, address)
+        if index == len(self.addresses) or self.addresses[index] != address:
+            raise ValueError(f'No instruction at address {hex(address)}')
+        return index
+
+    def address_range(self, start: int, end: int | None = None) -> range:
+        # indices of the instructions starting in [start, end)
+        stop = len(self.addresses) if end is None else bisect_left(self.addresses, end)
+        return range(bisect_left(self.addresses, start), stop)
+
+    def format_lines(self, start: int = 0, stop: int | None = None) -> Iterator[str]:
+        # disassembly lines of the instructions in [start, stop), without building Instrs
+        addresses = self.addresses
+        opcodes = self.opcodes
+        operands = self.operands
+        templates = FORMAT_TEMPLATES
+        names = REG_NAMES
+
+        for index in range(start, len(opcodes) if stop is None else stop):
+            template, slots = templates[opcodes[index]]
+            base = index * OPERAND_SLOTS
+            yield template.format(hex(addresses[index]), *[names[operands[base + slot]] for slot in slots])
+
+    def index(self, instr: Instr, start: int = 0, stop: int | None = None) -> int:
+        index = self.index_of_address(instr.address)
+        if index < start or (stop is not None and index >= stop):
+            raise ValueError(f'Instruction at {hex(instr.address)} is not in range')
+        return index
+
+def decode(
+    code: bytes | memoryview | Sequence[int],
+    start: int = 0,
+    stop: Callable[[int], bool] | None = None
+) -> InstructionStream:
+    # decodes from address start to the end, or until stop returns True for the address of the next instruction
+    stream = InstructionStream()
+    add_address = stream.addresses.append
+    add_opcode = stream.opcodes.append
+    add_operands = stream.operands.extend
+    lengths = OPCODE_LENGTHS
+    padding = SLOT_PADDING
+
+    pos = start
+    end = len(code)
+    while pos < end:
+        if stop is not None and stop(pos):
+            break
+        opcode = code[pos]
+        length = lengths[opcode]
+        if length == 0:
+            raise Exception(f'Unknown opcode {opcode}')
+        if pos + length > end:
+            raise Exception(f'Truncated instruction at {hex(pos)}')
+
+        add_address(pos)
+        add_opcode(opcode)
+        if length > 1:
+            add_operands(code[pos + 1:pos + length])
+        add_operands(padding[length])
+        pos += length
+
+    # every operand byte is a register ID, so they can be validated in one pass
+    if stream.operands and max(stream.operands) > 7:
+        raise Exception(f'Unknown register with ID {max(stream.operands)}')
+
+    return stream
+
+# addresses of the bytes that differ between two programs of the same length,
+# from the first to the last, or None if they're the same
+def diff_bytecode(old: bytes | memoryview, new: bytes | memoryview, chunk: int = 4096) -> range | None:
+    if len(old) != len(new):
+        raise Exception('Programs differ in length')
+    old, new = memoryview(old), memoryview(new)
+
+    first = None
+    for pos in range(0, len(old), chunk):
+        if old[pos:pos + chunk] != new[pos:pos + chunk]:
+            first = next(i for i in range(pos, min(pos + chunk, len(old))) if old[i] != new[i])
+            break
+    if first is None:
+        return None
+
+    for pos in range(len(old), first, -chunk):
+        start = max(pos - chunk, first)
+        if old[start:pos] != new[start:pos]:
+            last = next(i for i in range(pos - 1, start - 1, -1) if old[i] != new[i])
+            return range(first, last + 1)
+
+# index ranges of the instructions a patch replaced in the old stream and
+# the instructions that replaced them in the new one
+class Patch(NamedTuple):
+    addresses: range
+    old: range
+    new: range
+
+    def map_index(self, index: int) -> int | None:
+        # index in the new stream of an instruction that wasn't replaced, None if it was
+        if index < self.old.start:
+            return index
+        if index >= self.old.stop:
+            return index + len(self.new) - len(self.old)
+        return None
+
+def redecode(stream: InstructionStream, code: bytes | memoryview | Sequence[int], changed: range) -> tuple[InstructionStream, Patch]:
+    # decodes a program that differs from the one stream was decoded from in
+    # the changed addresses. Only the instructions from the one containing the
+    # first changed byte are decoded, until an instruction starts at an old
+    # instruction boundary after the last changed byte
+    addresses = stream.addresses
+    first = max(bisect_right(addresses, changed.start) - 1, 0)
+
+    def resynced(pos: int) -> bool:
+        if pos < changed.stop:
+            return False
+        index = bisect_left(addresses, pos)
+        return index < len(addresses) and addresses[index] == pos
+
+    middle = decode(code, addresses[first] if addresses else 0, resynced)
+    end = middle.addresses[-1] + OPCODE_LENGTHS[middle.opcodes[-1]] if middle.opcodes else changed.stop
+    last = bisect_left(addresses, end)
+
+    new = InstructionStream()
+    new.addresses = addresses[:first] + middle.addresses + addresses[last:]
+    new.opcodes = stream.opcodes[:first] + middle.opcodes + stream.opcodes[last:]
+    new.operands = stream.operands[:first * OPERAND_SLOTS] + middle.operands + stream.operands[last * OPERAND_SLOTS:]
+    return new, Patch(changed, range(first, last), range(first, first + len(middle)))
+
 class Disassembler:
-    def __init__(self, bytecode: list[int]) -> None:
+    def __init__(self, bytecode: bytes | memoryview | Sequence[int]) -> None:
         self.bytecode = bytecode
-        self.pos = 0
-        self.instructions = []
+        self.instructions = InstructionStream()
 
-    def read_byte(self):
-        byte = self.bytecode[self.pos]
-        self.pos += 1
-        return byte
-    
     def get_disassembly(self) -> list[str]:
-        disassembly = []
+        return list(self.instructions.format_lines())
 
-        for instr in self.instructions:
-            disassembly.append(str(instr) + '\n')
-            if instr.mnemonic in BRANCH_MNEMONICS:
-                disassembly.append('\n')
+    def write_disassembly(self, out: TextIO, ranges: Iterable[range] | None = None) -> None:
+        # writes the lines of each range of instruction indices as they're formatted,
+        # the whole program by default
+        if ranges is None:
+            ranges = [range(len(self.instructions))]
+        for r in ranges:
+            out.writelines(self.instructions.format_lines(r.start, r.stop))
 
-        return disassembly
-    
-    def disassemble(self) -> list[Instr]:
-        while self.pos < len(self.bytecode):
-            addr = self.pos
-            opcode = self.read_byte()
-
-            match opcode:
-
-                # jumps to (pos + reg5)
-                case 40:
-                    offset = Reg.REG_5
-                    self.instructions.append(Instr(addr, Mnemonic.JMP, offset))
-
-                # jumps to (pos + offset) if reg6 == reg7
-                case 41:
-                    # these registers are fixed in the handler
-                    offset = Reg.REG_5
-                    left = Reg.REG_6
-                    right = Reg.REG_7
-                    self.instructions.append(Instr(addr, Mnemonic.JE, offset, left, right))
-
-                # jumps to (pos + r5) if reg6 != reg7
-                case 42:
-                    # these registers are fixed in the handler
-                    offset = Reg.REG_5
-                    left = Reg.REG_6
-                    right = Reg.REG_7
-                    self.instructions.append(Instr(addr, Mnemonic.JNE, offset, left, right))
-
-                # jumps to (pos + reg5) if reg6 < reg7
-                case 43:
-                    # these registers are fixed in the handler
-                    left = Reg.REG_6
-                    right = Reg.REG_7
-                    offset = Reg.REG_5 # loaded only if less than condition is true
-                    self.instructions.append(Instr(addr, Mnemonic.JL, left, right, offset))
-
-                # clear reg
-                case 44 | 45 | 46 | 47 | 48| 49 | 50 | 51:
-                    reg = get_reg(opcode - 44)
-                    self.instructions.append(Instr(addr, Mnemonic.CLEAR, reg))
-
-                # opcodes 52 - 60 don't exist
-
-                # get char code of last char of string
-                case 61:
-                    src = get_reg(self.read_byte())
-                    dest = get_reg(self.read_byte())
-                    self.instructions.append(Instr(addr, Mnemonic.WRITE_LAST_CHAR_CODE, dest, src))
-
-                # write char given by int in reg
-                case 62:
-                    src = get_reg(self.read_byte())
-                    dest = get_reg(self.read_byte())
-                    self.instructions.append(Instr(addr, Mnemonic.WRITE_CHAR, dest, src))
-
-                # converts registers to strings/chars and concats them
-                case 63:
-                    left = get_reg(self.read_byte())
-                    right = get_reg(self.read_byte())
-                    dest = get_reg(self.read_byte())
-                    self.instructions.append(Instr(addr, Mnemonic.CONCAT_STRINGS, dest, left, right))
-
-                # set reg = '0'
-                case 64 | 65 | 66 | 67 | 68 | 69 | 70 | 71:
-                    reg = get_reg(opcode - 64)
-                    self.instructions.append(Instr(addr, Mnemonic.SET, reg, '0'))
-
-                # opcodes 72 - 80 don't exist
-
-                # add
-                case 81:
-                    left = get_reg(self.read_byte())
-                    right = get_reg(self.read_byte())
-                    dest = get_reg(self.read_byte())
-                    self.instructions.append(Instr(addr, Mnemonic.ADD, dest, left, right))
-
-                # append '1' to reg
-                case 82:
-                    reg = get_reg(self.read_byte())
-                    self.instructions.append(Instr(addr, Mnemonic.APPEND, reg, '1'))
-
-                # pop last char of string (store in same reg)
-                case 83:
-                    reg = get_reg(self.read_byte())
-                    self.instructions.append(Instr(addr, Mnemonic.POP_LAST_CHAR, reg))
-
-                # invert sign of reg
-                case 84:
-                    reg = get_reg(self.read_byte())
-                    self.instructions.append(Instr(addr, Mnemonic.INVERT_SIGN, reg))
-                    pass
-
-                # print string to stdout
-                case 85:
-                    self.instructions.append(Instr(addr, Mnemonic.PRINT, Reg.REG_4))
-
-                # read string from stdin
-                case 86:
-                    self.instructions.append(Instr(addr, Mnemonic.READ_STR, Reg.REG_0))
-
-                # exit
-                case 87:
-                    self.instructions.append(Instr(addr, Mnemonic.RET))
-
-                case _:
-                    raise Exception(f'Unknown opcode {opcode}')
-        
-        return self.instructions
\ No newline at end of file
+    def disassemble(self) -> InstructionStream:
+        self.instructions = decode(self.bytecode)
+        return self.instructions
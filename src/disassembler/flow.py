@@ -0,0 +1,376 @@
+from array import array
+from collections import deque
+from collections.abc import Sequence
+from disassembler.disassembler import BRANCH_MNEMONICS, Instr, InstructionStream, Mnemonic, Reg
+from typing import NamedTuple
+
+# branches whose target is given by (address + 1 + reg5)
+JUMP_MNEMONICS = {Mnemonic.JMP, Mnemonic.JE, Mnemonic.JNE, Mnemonic.JL}
+
+# instructions after which execution never falls through
+UNCONDITIONAL_MNEMONICS = {Mnemonic.JMP, Mnemonic.RET}
+
+# instructions whose first operand is the register they write
+WRITE_MNEMONICS = {
+    Mnemonic.CLEAR,
+    Mnemonic.SET,
+    Mnemonic.APPEND,
+    Mnemonic.ADD,
+    Mnemonic.CONCAT_STRINGS,
+    Mnemonic.INVERT_SIGN,
+    Mnemonic.WRITE_CHAR,
+    Mnemonic.WRITE_LAST_CHAR_CODE,
+    Mnemonic.POP_LAST_CHAR,
+    Mnemonic.READ_STR
+}
+
+def reg_id(reg: Reg) -> int:
+    return int(reg.value[3])
+
+def evaluate_constant(instr: Instr, regs: list[str | None]) -> None:
+    # updates regs with the effect of instr, None marks a value that isn't known statically
+    operands = instr.operands
+    try:
+        match instr.mnemonic:
+            case Mnemonic.CLEAR:
+                regs[reg_id(operands[0])] = ''
+
+            case Mnemonic.SET:
+                regs[reg_id(operands[0])] = operands[1]
+
+            case Mnemonic.APPEND:
+                val = regs[reg_id(operands[0])]
+                regs[reg_id(operands[0])] = None if val is None else val + operands[1]
+
+            case Mnemonic.ADD | Mnemonic.CONCAT_STRINGS:
+                left = regs[reg_id(operands[1])]
+                right = regs[reg_id(operands[2])]
+                if left is None or right is None:
+                    result = None
+                elif left == '' or right == '':
+                    result = left if right == '' else right
+                elif instr.mnemonic == Mnemonic.ADD:
+                    result = str(int(left) + int(right))
+                else:
+                    result = left + right
+                regs[reg_id(operands[0])] = result
+
+            case Mnemonic.INVERT_SIGN:
+                val = regs[reg_id(operands[0])]
+                if val is not None:
+                    # the VM flips the sign character rather than converting to a number
+                    val = val[1:] if val.startswith('-') else '-' + val
+                regs[reg_id(operands[0])] = val
+
+            case Mnemonic.WRITE_CHAR:
+                val = regs[reg_id(operands[1])]
+                regs[reg_id(operands[0])] = None if val is None else chr(int(val))
+
+            case Mnemonic.WRITE_LAST_CHAR_CODE:
+                val = regs[reg_id(operands[1])]
+                if val is not None:
+                    val = str(ord(val[-1])) if val else '0'
+                regs[reg_id(operands[0])] = val
+
+            case Mnemonic.POP_LAST_CHAR:
+                val = regs[reg_id(operands[0])]
+                regs[reg_id(operands[0])] = None if val is None else val[:-1]
+
+            case Mnemonic.READ_STR:
+                regs[reg_id(operands[0])] = None
+    except (ValueError, IndexError):
+        # the VM would fault here, treat the result as unknown
+        regs[reg_id(operands[0])] = None
+
+def propagate_offsets(instructions: Sequence[Instr], leaders: set[int], start: int = 0, stop: int | None = None) -> dict[int, int]:
+    # start has to be a point where nothing is known (see reset_span) or the start of the program
+    offsets = {}
+    # registers start out empty
+    regs: list[str | None] = [''] * 8 if start == 0 else [None] * 8
+
+    for index in range(start, len(instructions) if stop is None else stop):
+        instr = instructions[index]
+        if index in leaders:
+            # control can arrive from elsewhere, nothing is known
+            regs = [None] * 8
+
+        if instr.mnemonic in JUMP_MNEMONICS:
+            offset = regs[reg_id(Reg.REG_5)]
+            try:
+                if offset is not None:
+                    offsets[index] = int(offset)
+            except ValueError:
+                pass
+
+        if instr.mnemonic in UNCONDITIONAL_MNEMONICS:
+            # following instruction is only reachable by a jump
+            regs = [None] * 8
+        else:
+            evaluate_constant(instr, regs)
+
+    return offsets
+
+# successor index of every branch whose offset jumps to an instruction
+def resolve_targets(instructions: Sequence[Instr], offsets: dict[int, int], address_index: dict[int, int] | None = None) -> dict[int, int]:
+    if address_index is None:
+        address_index = {instr.address: index for index, instr in enumerate(instructions)}
+    targets = {}
+    for index, offset in offsets.items():
+        target = address_index.get(instructions[index].address + 1 + offset)
+        if target is not None:
+            targets[index] = target
+    return targets
+
+# finds the branches whose reg5 offset is a constant, as a map of instruction index to offset
+# values are only propagated through straight line code, so every resolved target becomes a
+# point where knowledge is reset and propagation is rerun until no new targets are found.
+# The offsets found by each round are added to rounds if it's given
+def resolve_branch_offsets(instructions: Sequence[Instr], rounds: list[dict[int, int]] | None = None) -> dict[int, int]:
+    address_index = {instr.address: index for index, instr in enumerate(instructions)}
+    leaders = set()
+
+    while True:
+        offsets = propagate_offsets(instructions, leaders)
+        if rounds is not None:
+            rounds.append(offsets)
+        targets = set(resolve_targets(instructions, offsets, address_index).values())
+        if targets <= leaders:
+            return offsets
+        leaders |= targets
+
+def is_reset_point(instructions: InstructionStream, leaders: set[int], index: int) -> bool:
+    # whether propagation forgets every register value at an instruction
+    return index == 0 or index == len(instructions) or index in leaders or instructions.mnemonic_at(index - 1) in UNCONDITIONAL_MNEMONICS
+
+def reset_span(instructions: InstructionStream, leaders: set[int], changed: range) -> range:
+    # smallest range around the changed indices that starts and ends where nothing is known,
+    # so the offsets propagated in it only depend on the instructions in it
+    start = changed.start
+    while not is_reset_point(instructions, leaders, start):
+        start -= 1
+    stop = max(changed.stop, start + 1)
+    while not is_reset_point(instructions, leaders, stop):
+        stop += 1
+    return range(start, stop)
+
+# successor index of every branch whose target is known statically
+def resolve_branch_targets(instructions: Sequence[Instr]) -> dict[int, int]:
+    return resolve_targets(instructions, resolve_branch_offsets(instructions))
+
+def static_successors(instructions: Sequence[Instr], branch_targets: dict[int, int]) -> list[list[int]]:
+    # successors of every instruction where they are known statically
+    successors = []
+    for index, instr in enumerate(instructions):
+        succ = []
+        if instr.mnemonic not in UNCONDITIONAL_MNEMONICS and index + 1 < len(instructions):
+            succ.append(index + 1)
+        if index in branch_targets:
+            succ.append(branch_targets[index])
+        successors.append(succ)
+    return successors
+
+# number of instructions from each instruction to the closest RET, None if no RET is reachable
+def distances_to_ret(instructions: Sequence[Instr], branch_targets: dict[int, int]) -> list[int | None]:
+    predecessors = [[] for _ in range(len(instructions))]
+    for index, succ in enumerate(static_successors(instructions, branch_targets)):
+        for target in succ:
+            predecessors[target].append(index)
+
+    distances: list[int | None] = [None] * len(instructions)
+    queue = deque()
+    for index, instr in enumerate(instructions):
+        if instr.mnemonic == Mnemonic.RET:
+            distances[index] = 0
+            queue.append(index)
+
+    while queue:
+        index = queue.popleft()
+        for pred in predecessors[index]:
+            if distances[pred] is None:
+                distances[pred] = distances[index] + 1
+                queue.append(pred)
+
+    return distances
+
+class BasicBlock:
+    def __init__(self, id: int, start: int, end: int) -> None:
+        self.id = id
+        # range of instruction indices in the block, end is exclusive
+        self.start = start
+        self.end = end
+        self.successors: list[int] = []
+        self.predecessors: list[int] = []
+
+    def __len__(self) -> int:
+        return self.end - self.start
+
+# control flow graph of basic blocks, with the edges of jumps whose targets are known statically
+class ControlFlowGraph:
+    def __init__(self, instructions: Sequence[Instr], branch_targets: dict[int, int]) -> None:
+        self.blocks: list[BasicBlock] = []
+        # id of the block containing each instruction
+        self.block_ids = array('I', bytes(4 * len(instructions)))
+        self.build(instructions, branch_targets)
+
+    def build(self, instructions: Sequence[Instr], branch_targets: dict[int, int]) -> None:
+        leaders = {0} if len(instructions) > 0 else set()
+        leaders.update(branch_targets.values())
+        for index, instr in enumerate(instructions):
+            if instr.mnemonic in BRANCH_MNEMONICS and index + 1 < len(instructions):
+                leaders.add(index + 1)
+
+        starts = sorted(leaders)
+        for id, start in enumerate(starts):
+            end = starts[id + 1] if id + 1 < len(starts) else len(instructions)
+            self.blocks.append(BasicBlock(id, start, end))
+            for index in range(start, end):
+                self.block_ids[index] = id
+
+        successors = static_successors(instructions, branch_targets)
+        for block in self.blocks:
+            for target in successors[block.end - 1]:
+                target_block = self.blocks[self.block_ids[target]]
+                if target_block.id not in block.successors:
+                    block.successors.append(target_block.id)
+                    target_block.predecessors.append(block.id)
+
+    def block_at(self, index: int) -> BasicBlock:
+        return self.blocks[self.block_ids[index]]
+
+    def is_leader(self, index: int) -> bool:
+        return self.blocks[self.block_ids[index]].start == index
+
+    def is_join(self, index: int) -> bool:
+        # where control flow from separate paths meets
+        block = self.blocks[self.block_ids[index]]
+        return block.start == index and len(block.predecessors) > 1
+
+    def reachable_blocks(self, entry: int = 0) -> list[BasicBlock]:
+        # blocks reachable from the block containing entry over statically known edges, in program order
+        seen = {self.block_ids[entry]}
+        stack = [self.block_ids[entry]]
+        while stack:
+            for succ in self.blocks[stack.pop()].successors:
+                if succ not in seen:
+                    seen.add(succ)
+                    stack.append(succ)
+        return [self.blocks[id] for id in sorted(seen)]
+
+# ranges of instruction indices that are reachable from entry, adjacent blocks are joined
+def reachable_ranges(instructions: Sequence[Instr], entry: int = 0) -> list[range]:
+    if len(instructions) == 0:
+        return []
+    cfg = ControlFlowGraph(instructions, resolve_branch_targets(instructions))
+    ranges = []
+    for block in cfg.reachable_blocks(entry):
+        if ranges and ranges[-1].stop == block.start:
+            ranges[-1] = range(ranges[-1].start, block.end)
+        else:
+            ranges.append(range(block.start, block.end))
+    return ranges
+
+# how a register changes on each iteration of a loop, by APPEND '1',
+# POP_LAST_CHAR or ADD of a register the loop doesn't write (step)
+class Induction(NamedTuple):
+    mnemonic: Mnemonic
+    step: int | None = None
+
+class Loop:
+    def __init__(self, header: int, body: set[int], latches: list[int]) -> None:
+        # index of the first instruction of the loop
+        self.header = header
+        # ids of the blocks in the loop, and of those that jump back to the header
+        self.body = body
+        self.latches = latches
+        # registers written anywhere in the loop
+        self.written: set[int] = set()
+        self.inductions: dict[int, Induction] = {}
+
+# natural loops of the control flow graph by the index of their header, found from
+# the back edges of a depth first search. The edges of jumps that aren't known
+# statically are missing, so loops through them aren't found
+def find_loops(instructions: Sequence[Instr], cfg: ControlFlowGraph) -> dict[int, Loop]:
+    if len(cfg.blocks) == 0:
+        return {}
+
+    back_edges: dict[int, list[int]] = {}
+    on_stack = {0}
+    visited = {0}
+    stack = [(0, iter(cfg.blocks[0].successors))]
+    while stack:
+        id, successors = stack[-1]
+        succ = next(successors, None)
+        if succ is None:
+            stack.pop()
+            on_stack.discard(id)
+        elif succ in on_stack:
+            back_edges.setdefault(succ, []).append(id)
+        elif succ not in visited:
+            visited.add(succ)
+            on_stack.add(succ)
+            stack.append((succ, iter(cfg.blocks[succ].successors)))
+
+    loops = {}
+    for header, latches in back_edges.items():
+        # blocks that reach a latch without going through the header
+        body = {header}
+        pending = [latch for latch in latches if latch != header]
+        body.update(pending)
+        while pending:
+            for pred in cfg.blocks[pending.pop()].predecessors:
+                if pred not in body:
+                    body.add(pred)
+                    pending.append(pred)
+        loops[cfg.blocks[header].start] = Loop(cfg.blocks[header].start, body, latches)
+
+    for loop in loops.values():
+        find_inductions(instructions, cfg, loop, loops)
+    return loops
+
+def dominates_latches(cfg: ControlFlowGraph, loop: Loop, id: int) -> bool:
+    # whether every path around the loop goes through a block
+    header = cfg.block_ids[loop.header]
+    if id == header:
+        return True
+    seen = {header}
+    pending = [header]
+    while pending:
+        for succ in cfg.blocks[pending.pop()].successors:
+            if succ in loop.body and succ != id and succ not in seen:
+                seen.add(succ)
+                pending.append(succ)
+    return not any(latch in seen and latch != header for latch in loop.latches)
+
+def find_inductions(instructions: Sequence[Instr], cfg: ControlFlowGraph, loop: Loop, loops: dict[int, Loop]) -> None:
+    # blocks of loops nested in this one run any number of times per iteration
+    nested = set()
+    for other in loops.values():
+        if other is not loop and cfg.block_ids[other.header] in loop.body and other.body < loop.body:
+            nested |= other.body
+
+    writes: dict[int, list[tuple[int, Instr]]] = {}
+    for id in loop.body:
+        block = cfg.blocks[id]
+        for index in range(block.start, block.end):
+            instr = instructions[index]
+            if instr.mnemonic in WRITE_MNEMONICS:
+                writes.setdefault(reg_id(instr.operands[0]), []).append((id, instr))
+    loop.written = set(writes)
+
+    for reg, reg_writes in writes.items():
+        if len(reg_writes) != 1:
+            continue
+        id, instr = reg_writes[0]
+        if id in nested or not dominates_latches(cfg, loop, id):
+            continue
+
+        match instr.mnemonic:
+            case Mnemonic.APPEND if instr.operands[1] == '1':
+                loop.inductions[reg] = Induction(Mnemonic.APPEND)
+            case Mnemonic.POP_LAST_CHAR:
+                loop.inductions[reg] = Induction(Mnemonic.POP_LAST_CHAR)
+            case Mnemonic.ADD:
+                left, right = reg_id(instr.operands[1]), reg_id(instr.operands[2])
+                step = right if left == reg else left if right == reg else None
+                if step is not None and step != reg and step not in writes:
+                    loop.inductions[reg] = Induction(Mnemonic.ADD, step)
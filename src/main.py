@@ -1,16 +1,41 @@
+import argparse
+import mmap
+from cache.analysis_cache import DEFAULT_DIRECTORY, AnalysisCache, bytecode_digest
 from disassembler.disassembler import Disassembler
-from symbolic.symbolic_executor import SymbolicExecutor
+from symbolic.symbolic_executor import SymbolicExecutor, analyse
 
-bytecode = [int(x) for x in open('input/bytecode', 'rb').read()]
+parser = argparse.ArgumentParser(description='Disassembles and symbolically executes input/bytecode')
+parser.add_argument('--cache', default=DEFAULT_DIRECTORY, help='directory of the analysis cache')
+parser.add_argument('--no-cache', action='store_true')
+args = parser.parse_args()
 
-dis = Disassembler(bytecode)
-instrs = dis.disassemble()
+cache = None if args.no_cache else AnalysisCache(args.cache)
 
-disassembly = dis.get_disassembly()
-open('output/disassembly.txt', 'w').write(''.join(disassembly))
+with open('input/bytecode', 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as bytecode:
+    digest = bytecode_digest(bytecode)
+    dis = Disassembler(bytecode)
+    # decoded instructions and static analysis only depend on the bytecode
+    static = cache.get(digest, 'static') if cache is not None else None
+    static_changed = static is None
+    if static is None:
+        instrs = dis.disassemble()
+        static = (instrs, analyse(instrs))
+    instrs, analysis = static
+    dis.instructions = instrs
 
-executor = SymbolicExecutor(instrs)
-executor.explore()
+with open('output/disassembly.txt', 'w') as f:
+    dis.write_disassembly(f)
 
-pseudcode = executor.get_pseudocode()
-open('output/pseudocode.c', 'w').write(pseudcode)
\ No newline at end of file
+if cache is None or not cache.get_file(digest, 'pseudocode', 'output/pseudocode.c'):
+    compiled = len(analysis.summaries.summaries)
+    executor = SymbolicExecutor(instrs, analysis=analysis)
+    executor.explore()
+    with open('output/pseudocode.c', 'w') as f:
+        executor.write_pseudocode(f)
+    if cache is not None:
+        cache.put_file(digest, 'pseudocode', 'output/pseudocode.c')
+    # keeps the block summaries compiled while exploring
+    static_changed |= len(analysis.summaries.summaries) != compiled
+
+if cache is not None and static_changed:
+    cache.put(digest, 'static', static)
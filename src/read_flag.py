@@ -1,11 +1,24 @@
-import re
+import os
+from disassembler.disassembler import Disassembler
+from symbolic.inputs import path_conditions, solve_paths
+from symbolic.symbolic_executor import SymbolicExecutor
 
-code = open('output/pseudocode.c', 'r').read()
-result = re.findall("\\+ (\\d+)", code)
+with open('input/bytecode', 'rb') as f:
+    instrs = Disassembler(f.read()).disassemble()
 
-flag = ''.join([chr(int(x)) for x in result])
-print(flag)
+executor = SymbolicExecutor(instrs)
+executor.explore()
+conditions = path_conditions(executor.finished_states, executor.flag_len)
 
+# an input that reaches each end of the program and what it prints
+for path in solve_paths(instrs, conditions, os.cpu_count() or 1):
+    if path.input is None:
+        print(f'path {path.id}: no input found')
+    else:
+        checked = '' if path.verified else ' (not verified)'
+        print(f'{path.input}: {path.output.splitlines()[-1] if path.output else ""}{checked}')
+
+"""
+openECSC{supereasyvmc4e87c4d}: ok
+aaaaaaaaaaaaaaaaaaaaaaaaaaaaa: no
 """
-openECSC{supereasyvmc4e87c4d}
-"""
\ No newline at end of file
@@ -1,3 +1,5 @@
+from collections.abc import Iterator
+
 class Node:
     def __init__(self) -> None:
         self.statements: list[str] = []
@@ -7,26 +9,72 @@ class Node:
         self.statements.append(statement)
 
     def codegen(self) -> list[str]:
-        stmts = self.statements.copy()
-        if self.next:
-            stmts += self.next.codegen()
-
-        return stmts
+        return list(emit(self))
 
 class ConditionalNode:
     def __init__(self, test: str, consequent: Node, alternate: Node) -> None:
         self.test = test
         self.consequent = consequent
         self.alternate = alternate
+        # code after the if statement, when the paths of both branches were merged
+        self.next = None
+
+    def codegen(self) -> list[str]:
+        return list(emit(self))
+
+# loop whose remaining iterations were summarised, every path through the
+# body either continues the loop or leaves it and runs to the end of the program
+class LoopNode:
+    def __init__(self, var: str, body: Node) -> None:
+        self.var = var
+        self.body = body
+        self.next = None
+
+    def codegen(self) -> list[str]:
+        return list(emit(self))
+
+# lines of code for a node and everything after it. Nodes are visited with an
+# explicit stack and lines are indented by their depth when they are yielded,
+# so nested if statements don't get copied and re-indented at every level
+def emit(root: Node | ConditionalNode | LoopNode, depth: int = 0) -> Iterator[str]:
+    indents = ['\t' * d for d in range(depth + 1)]
+    stack: list[tuple[Node | ConditionalNode | LoopNode | str, int]] = [(root, depth)]
+
+    while stack:
+        item, depth = stack.pop()
+        while len(indents) <= depth:
+            indents.append(indents[-1] + '\t')
+
+        if isinstance(item, str):
+            yield indents[depth] + item
+            continue
+
+        # pushed in reverse, so the if statement comes before the code after it
+        if item.next:
+            stack.append((item.next, depth))
+
+        if isinstance(item, ConditionalNode):
+            # only need to handle if statements for this simple case
+            stack.append(('}', depth))
+            stack.append((item.alternate, depth + 1))
+            stack.append(('} else {', depth))
+            stack.append((item.consequent, depth + 1))
+            yield f'{indents[depth]}if ({item.test}) {{'
+        elif isinstance(item, LoopNode):
+            stack.append(('}', depth))
+            stack.append((item.body, depth + 1))
+            yield f'{indents[depth]}for (int {item.var} = 0; ; {item.var}++) {{'
+        else:
+            for statement in item.statements:
+                yield indents[depth] + statement
 
-    def codegen(self) -> str:
-        # only need to handle if statements for this simple case
-        consequent = self.consequent.codegen()
-        alternate = self.alternate.codegen()
-        return [
-            f'if ({self.test}) {{',
-            *['\t' + line for line in consequent],
-            '} else {',
-            *['\t' + line for line in alternate],
-            '}'
-        ]
\ No newline at end of file
+# pseudocode of the whole program, in chunks that can be written as they're generated
+def emit_program(root: Node) -> Iterator[str]:
+    yield '#include <stdio.h>\n\nint main(int argc, char* argv[]) {\n'
+    empty = True
+    for line in emit(root, 1):
+        empty = False
+        yield line + '\n'
+    if empty:
+        yield '\t\n'
+    yield '}'
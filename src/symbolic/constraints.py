@@ -0,0 +1,57 @@
+from enum import Enum
+from symbolic.symbols import *
+from typing import NamedTuple, Self
+
+class Relation(Enum):
+    EQ = '=='
+    NE = '!='
+    LT = '<'
+    LE = '<='
+
+class Constraint(NamedTuple):
+    relation: Relation
+    left: Symbol | str
+    right: Symbol | str
+    # JE/JNE compare registers as strings, JL compares them as numbers
+    numeric: bool = False
+
+    def negate(self) -> Self:
+        match self.relation:
+            case Relation.EQ:
+                return Constraint(Relation.NE, self.left, self.right, self.numeric)
+            case Relation.NE:
+                return Constraint(Relation.EQ, self.left, self.right, self.numeric)
+            case Relation.LT:
+                return Constraint(Relation.LE, self.right, self.left, self.numeric)
+            case Relation.LE:
+                return Constraint(Relation.LT, self.right, self.left, self.numeric)
+
+# persistent set of path constraints, adding a constraint shares the
+# constraints of the parent so forking a state is O(1)
+class PathConstraints:
+    __slots__ = ('constraint', 'parent', 'size', 'feasible', 'solver')
+
+    def __init__(self, constraint: Constraint | None = None, parent: 'PathConstraints | None' = None) -> None:
+        self.constraint = constraint
+        self.parent = parent
+        self.size = 0 if parent is None else parent.size + 1
+        # cached result of the feasibility check
+        self.feasible: bool | None = None
+        # solver with the constraints propagated, kept while states may still add
+        # constraints to these so checking them only propagates what they add
+        self.solver = None
+
+    def add(self, constraint: Constraint) -> 'PathConstraints':
+        return PathConstraints(constraint, self)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __iter__(self):
+        # oldest constraint first
+        constraints = []
+        node = self
+        while node.parent is not None:
+            constraints.append(node.constraint)
+            node = node.parent
+        return reversed(constraints)
@@ -0,0 +1,225 @@
+import copy
+from disassembler.disassembler import InstructionStream, Patch, decode, diff_bytecode, redecode
+from disassembler.flow import Loop, ControlFlowGraph, propagate_offsets, reset_span, resolve_branch_offsets
+from symbolic.scheduler import Strategy
+from symbolic.symbolic_executor import DEFAULT_UNROLL, State, StateSnapshot, StaticAnalysis, SymbolicExecutor, analyse, analyse_offsets
+from symbolic.trace import ExplorationTrace, Segment
+from typing import TextIO
+
+def offset_targets(instructions: InstructionStream, offsets: dict[int, int], span: range | None = None) -> set[int]:
+    # addresses of the instructions the offsets of branches in span jump to
+    targets = set()
+    for index, offset in offsets.items():
+        if span is not None and index not in span:
+            continue
+        target = instructions.addresses[index] + 1 + offset
+        try:
+            instructions.index_of_address(target)
+            targets.add(target)
+        except ValueError:
+            pass
+    return targets
+
+def reresolve_branch_offsets(
+    old: InstructionStream,
+    analysis: StaticAnalysis,
+    new: InstructionStream,
+    patch: Patch
+) -> tuple[dict[int, int], list[dict[int, int]]]:
+    # resolve_branch_offsets for a patched program, which only propagates
+    # through the code around the patch in each round. Outside it a round finds
+    # the same offsets as before as long as every earlier round found the same
+    # targets, otherwise the rounds go differently and it's redone in full
+    shift = len(patch.new) - len(patch.old)
+    old_leaders: set[int] = set()
+    new_leaders: set[int] = set()
+    rounds = []
+
+    for old_offsets in analysis.offset_rounds:
+        # a jump patched in or out moves where propagation stops, so the span covers both programs'
+        old_span = reset_span(old, old_leaders, patch.old)
+        new_span = reset_span(new, new_leaders, patch.new)
+        start = min(old_span.start, new_span.start)
+        stop = max(old_span.stop, new_span.stop - shift)
+
+        patched = propagate_offsets(new, new_leaders, start, stop + shift)
+        if offset_targets(old, old_offsets, range(start, stop)) != offset_targets(new, patched):
+            rounds = []
+            return resolve_branch_offsets(new, rounds), rounds
+
+        offsets = {patch.map_index(index): offset for index, offset in old_offsets.items() if index < start or index >= stop}
+        offsets.update(patched)
+        rounds.append(offsets)
+        old_leaders |= {old.index_of_address(address) for address in offset_targets(old, old_offsets)}
+        new_leaders |= {new.index_of_address(address) for address in offset_targets(new, offsets)}
+
+    return rounds[-1], rounds
+
+def block_ranges(cfg: ControlFlowGraph, ids) -> list[range]:
+    return sorted((range(cfg.blocks[id].start, cfg.blocks[id].end) for id in ids), key=lambda r: r.start)
+
+def loop_key(cfg: ControlFlowGraph, loop: Loop, map_index) -> tuple:
+    # everything about a loop that changes how states run through it, with indices mapped by map_index
+    def mapped(r: range) -> tuple[int | None, int | None]:
+        return map_index(r.start), map_index(r.stop - 1)
+    return (
+        map_index(loop.header),
+        tuple(mapped(r) for r in block_ranges(cfg, loop.body)),
+        tuple(mapped(r) for r in block_ranges(cfg, loop.latches)),
+        tuple(sorted(loop.written)),
+        tuple(sorted(loop.inductions.items()))
+    )
+
+def reanalyse(
+    old: InstructionStream,
+    analysis: StaticAnalysis,
+    new: InstructionStream,
+    patch: Patch
+) -> tuple[StaticAnalysis, list[range]]:
+    # static analysis of a patched program, and the ranges of old instruction
+    # indices where states could now run differently: the patched instructions
+    # and the loops that changed. Summaries of blocks the patch didn't touch are kept
+    offsets, rounds = reresolve_branch_offsets(old, analysis, new, patch)
+    new_analysis = analyse_offsets(new, offsets, rounds)
+    old_cfg, new_cfg = analysis.cfg, new_analysis.cfg
+    shift = len(patch.new) - len(patch.old)
+
+    for id, summary in analysis.summaries.summaries.items():
+        block = old_cfg.blocks[id]
+        start = patch.map_index(block.start)
+        if start is None or (patch.old.start < block.end and block.start < patch.old.stop):
+            continue
+        new_block = new_cfg.block_at(start)
+        if new_block.start == start and len(new_block) == len(block):
+            summary = copy.copy(summary)
+            summary.start += start - block.start
+            summary.end += start - block.start
+            new_analysis.summaries.summaries[new_block.id] = summary
+
+    def unmap_index(index: int) -> int | None:
+        if index < patch.new.start:
+            return index
+        if index >= patch.new.stop:
+            return index - shift
+        return None
+
+    affected = [patch.old]
+    old_keys = {loop_key(old_cfg, loop, patch.map_index) for loop in analysis.loops.values()}
+    new_keys = {loop_key(new_cfg, loop, lambda index: index) for loop in new_analysis.loops.values()}
+    for loop in analysis.loops.values():
+        if loop_key(old_cfg, loop, patch.map_index) not in new_keys:
+            affected += block_ranges(old_cfg, loop.body)
+    for loop in new_analysis.loops.values():
+        if loop_key(new_cfg, loop, lambda index: index) not in old_keys:
+            for r in block_ranges(new_cfg, loop.body):
+                start, end = unmap_index(r.start), unmap_index(r.stop - 1)
+                # parts of the loop that were patched are already affected
+                affected.append(range(patch.old.start if start is None else start, patch.old.stop if end is None else end + 1))
+    return new_analysis, affected
+
+# explores a program and keeps what it needs to explore it again after the
+# bytecode is patched. Only the paths whose segments ran a patched instruction
+# or a loop that changed are explored again, from the fork they were created
+# by, and the rest of the pseudocode is kept. Patches can't change the length
+# of the program, since jumps are relative and would land elsewhere
+class IncrementalExplorer:
+    def __init__(
+        self,
+        bytecode: bytes | memoryview,
+        strategy: Strategy = Strategy.DFS,
+        prune: bool = True,
+        summarise: bool = True,
+        max_unroll: int | None = DEFAULT_UNROLL,
+        flag_len: int | None = 29
+    ) -> None:
+        self.bytecode = bytes(bytecode)
+        self.strategy = strategy
+        self.prune = prune
+        self.summarise = summarise
+        self.max_unroll = max_unroll
+        self.flag_len = flag_len
+        self.instructions = decode(self.bytecode)
+        self.analysis = analyse(self.instructions)
+        self.trace = ExplorationTrace()
+        self.executor = self.create_executor()
+        self.root = self.executor.root
+
+    def create_executor(self, schedule_root: bool = True) -> SymbolicExecutor:
+        return SymbolicExecutor(
+            self.instructions,
+            self.strategy,
+            prune=self.prune,
+            summarise=self.summarise,
+            max_unroll=self.max_unroll,
+            flag_len=self.flag_len,
+            analysis=self.analysis,
+            trace=self.trace,
+            schedule_root=schedule_root
+        )
+
+    def explore(self) -> None:
+        self.executor.explore()
+
+    def patch(self, bytecode: bytes | memoryview) -> list[Segment]:
+        # explores the parts of the program a patch affects, returns the segments that were explored again
+        bytecode = bytes(bytecode)
+        changed = diff_bytecode(self.bytecode, bytecode)
+        if changed is None:
+            return []
+
+        instructions, patch = redecode(self.instructions, bytecode, changed)
+        analysis, affected = reanalyse(self.instructions, self.analysis, instructions, patch)
+        restarts = self.invalidate(affected, patch, analysis)
+
+        self.bytecode = bytecode
+        self.instructions = instructions
+        self.analysis = analysis
+        last_loop_var = self.executor.last_loop_var
+        # states only come from the segments that are explored again
+        self.executor = self.create_executor(schedule_root=False)
+        self.executor.root = self.root
+        # loop variables of kept code stay unique
+        self.executor.last_loop_var = last_loop_var
+
+        for segment in restarts:
+            segment.node.statements.clear()
+            segment.node.next = None
+            segment.ranges = []
+            segment.children = []
+            state = State.restore(self.executor, segment.snapshot)
+            state.cfg = segment.node
+            self.trace.live[state.id] = segment
+            self.executor.schedule(state)
+        self.explore()
+        return restarts
+
+    def invalidate(self, affected: list[range], patch: Patch, analysis: StaticAnalysis) -> list[Segment]:
+        # finds the first segment of each path that has to run again, and moves
+        # the indices of the rest of the tree to the patched program
+        restarts = []
+        stack = [self.trace.root]
+        while stack:
+            segment = stack.pop()
+            # a jump into the patch could land on a different instruction
+            if segment.touches(affected) or any(child.snapshot.pos in patch.old for child in segment.children):
+                restarts.append(segment)
+            else:
+                stack.extend(segment.children)
+                segment.ranges = [range(patch.map_index(r.start), patch.map_index(r.stop - 1) + 1) for r in segment.ranges]
+            segment.snapshot = self.map_snapshot(segment.snapshot, patch, analysis)
+        return restarts
+
+    def map_snapshot(self, snapshot: StateSnapshot, patch: Patch, analysis: StaticAnalysis) -> StateSnapshot:
+        # only the first instruction can be patched and start a segment, and it stays at index 0
+        pos = patch.map_index(snapshot.pos)
+        loops = ((patch.map_index(header), iterations) for header, iterations in snapshot.loops)
+        return snapshot._replace(
+            pos=0 if pos is None else pos,
+            loops=tuple((header, iterations) for header, iterations in loops if header in analysis.loops)
+        )
+
+    def get_pseudocode(self) -> str:
+        return self.executor.get_pseudocode()
+
+    def write_pseudocode(self, out: TextIO) -> None:
+        self.executor.write_pseudocode(out)
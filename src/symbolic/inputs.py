@@ -0,0 +1,195 @@
+from collections.abc import Sequence
+from concrete.interpreter import ConcreteInterpreter, Outcome, add, invert_sign, to_int
+from concurrent.futures import ProcessPoolExecutor
+from disassembler.disassembler import Instr
+from symbolic.constraints import Constraint, Relation
+from symbolic.solver import Solver, Infeasible
+from symbolic.snapshots import dumps_snapshot, loads_snapshot
+from symbolic.symbolic_executor import FinishedState, State, Status, ends_path
+from symbolic.symbols import *
+from typing import NamedTuple
+
+# filled in at positions of the input no constraint reads
+DEFAULT_CHAR = 'a'
+
+# how the concrete interpreter ends a path that ended with each status
+OUTCOMES = {
+    Status.TERMINATED: Outcome.RETURNED,
+    Status.ERRORED: Outcome.FAULTED
+}
+
+# interpreter of the worker process, built once when the process starts
+WORKER: ConcreteInterpreter | None = None
+
+class Unevaluable(Exception):
+    pass
+
+# everything needed to solve a path in another process
+class PathCondition(NamedTuple):
+    # ID of the finished state
+    id: int
+    status: Status
+    constraints: tuple[Constraint, ...]
+    # values the path printed, None when they aren't known
+    output: tuple | None
+    # length of the input, None for a symbolic length
+    flag_len: int | None
+
+class PathInput(NamedTuple):
+    id: int
+    status: Status
+    # input that reaches the end of the path, None when none was found
+    input: str | None
+    # what the path prints for that input
+    output: str | None
+    # whether the concrete interpreter printed the same and ended the same way
+    verified: bool
+
+def path_conditions(states: list[State], flag_len: int | None) -> list[PathCondition]:
+    # conditions of the paths that ended
+    if any(isinstance(state, FinishedState) for state in states):
+        raise Exception('Path conditions need the finished states in full, explore without a spill store')
+    return [
+        PathCondition(state.id, state.status, tuple(state.constraints), state.printed(), flag_len)
+        for state in states
+        if ends_path(state)
+    ]
+
+def evaluate(value, flag: str, identifiers: dict[str, int]) -> str:
+    # the string a register value holds for a concrete input, with the same
+    # semantics as the concrete interpreter. Raises ValueError where the VM would fault
+    if not isinstance(value, Symbol):
+        return str(value)
+
+    values = {}
+    for symbol in post_order(value, lambda s: s in values):
+        def arg(a) -> str:
+            return values[a] if isinstance(a, Symbol) else str(a)
+
+        match symbol:
+            case StringSymbol():
+                values[symbol] = flag[:max(int(arg(symbol.len)), 0)]
+            case IdentifierSymbol(name=name) if name == 'flag_len':
+                values[symbol] = str(len(flag))
+            case IdentifierSymbol(name=name):
+                if name not in identifiers:
+                    raise Unevaluable(name)
+                values[symbol] = str(identifiers[name])
+            case UnaryExpressionSymbol():
+                values[symbol] = invert_sign(arg(symbol.argument))
+            case ConcatExpressionSymbol():
+                values[symbol] = arg(symbol.left) + arg(symbol.right)
+            case BinaryExpressionSymbol(operator='+'):
+                values[symbol] = add(arg(symbol.left), arg(symbol.right))
+            case BinaryExpressionSymbol(operator='-'):
+                values[symbol] = str(int(arg(symbol.left)) - int(arg(symbol.right)))
+            case BinaryExpressionSymbol(operator='*'):
+                values[symbol] = str(int(arg(symbol.left)) * int(arg(symbol.right)))
+            case BinaryExpressionSymbol():
+                # tests of merged values, whose literals are quoted
+                left, right = (arg(a)[1:-1] if isinstance(a, str) else arg(a) for a in (symbol.left, symbol.right))
+                values[symbol] = str(holds(Relation(symbol.operator), left, right, symbol.operator in ('<', '<=')))
+            case MemberExpressionSymbol(property='"length"'):
+                values[symbol] = str(len(arg(symbol.object)))
+            case MemberExpressionSymbol(property=':-1'):
+                values[symbol] = arg(symbol.object)[:-1]
+            case MemberExpressionSymbol():
+                string, index = arg(symbol.object), int(arg(symbol.property))
+                # reading past the end reads the terminator
+                values[symbol] = str(ord(string[index])) if 0 <= index < len(string) else '0'
+            case RepeatExpressionSymbol():
+                values[symbol] = arg(symbol.value) * int(arg(symbol.count))
+            case ConditionalExpressionSymbol():
+                values[symbol] = arg(symbol.consequent) if values[symbol.test] == 'True' else arg(symbol.alternate)
+            case _:
+                raise Unevaluable(str(symbol))
+    return values[value]
+
+def holds(relation: Relation, left: str, right: str, numeric: bool) -> bool:
+    if numeric:
+        left, right = to_int(left), to_int(right)
+    match relation:
+        case Relation.EQ:
+            return left == right
+        case Relation.NE:
+            return left != right
+        case Relation.LT:
+            return left < right
+        case Relation.LE:
+            return left <= right
+
+def build_input(model: dict[Symbol, int], flag_len: int | None) -> tuple[str, dict[str, int]]:
+    # the input a model describes, and the values of the other identifiers it has
+    identifiers = {var.name: value for var, value in model.items() if type(var) is IdentifierSymbol}
+    length = flag_len if flag_len is not None else identifiers.get('flag_len', 0)
+    chars = [DEFAULT_CHAR] * length
+    for var, value in model.items():
+        if isinstance(var, MemberExpressionSymbol) and isinstance(var.object, StringSymbol) and var.property != '"length"':
+            index = int(evaluate(var.property, ''.join(chars), identifiers))
+            if 0 <= index < length:
+                chars[index] = chr(value)
+    return ''.join(chars), identifiers
+
+def solve(condition: PathCondition) -> tuple[str, dict[str, int]] | None:
+    # an input whose values satisfy every constraint of the path
+    solver = Solver()
+    try:
+        for constraint in condition.constraints:
+            solver.add(constraint)
+    except Infeasible:
+        return None
+
+    def accept(model: dict) -> bool:
+        flag, identifiers = build_input(model, condition.flag_len)
+        try:
+            return all(
+                holds(c.relation, evaluate(c.left, flag, identifiers), evaluate(c.right, flag, identifiers), c.numeric)
+                for c in condition.constraints
+            )
+        except ValueError:
+            return False
+
+    try:
+        model = solver.find_model(accept)
+    except Unevaluable:
+        return None
+    return build_input(model, condition.flag_len) if model is not None else None
+
+def solve_path(condition: PathCondition, interpreter: ConcreteInterpreter | None = None) -> PathInput:
+    solution = solve(condition)
+    if solution is None:
+        return PathInput(condition.id, condition.status, None, None, False)
+
+    flag, identifiers = solution
+    output = None
+    if condition.output is not None:
+        try:
+            output = ''.join(evaluate(value, flag, identifiers) + '\n' for value in condition.output)
+        except (ValueError, Unevaluable):
+            pass
+
+    verified = False
+    if interpreter is not None and output is not None:
+        result = interpreter.run(flag)
+        verified = result.output == output and result.outcome == OUTCOMES[condition.status]
+    return PathInput(condition.id, condition.status, flag, output, verified)
+
+def init_worker(instructions: Sequence[Instr]) -> None:
+    global WORKER
+    WORKER = ConcreteInterpreter(instructions)
+
+def solve_worker(condition: bytes) -> PathInput:
+    return solve_path(loads_snapshot(condition), WORKER)
+
+def solve_paths(instructions: Sequence[Instr], conditions: list[PathCondition], workers: int = 1) -> list[PathInput]:
+    # solves each path into an input and checks it on the concrete interpreter,
+    # across a pool of processes when there is more than one worker. Paths are
+    # solved independently so results are in the order of the conditions
+    if workers <= 1 or len(conditions) <= 1:
+        interpreter = ConcreteInterpreter(instructions)
+        return [solve_path(condition, interpreter) for condition in conditions]
+
+    chunksize = max(1, len(conditions) // (workers * 4))
+    with ProcessPoolExecutor(workers, initializer=init_worker, initargs=(instructions,)) as pool:
+        # written with their symbols as a table, the expressions in them can be too deep to pickle
+        return list(pool.map(solve_worker, map(dumps_snapshot, conditions), chunksize=chunksize))
@@ -0,0 +1,133 @@
+import time
+from collections import Counter
+from collections.abc import Callable
+from enum import Enum
+from disassembler.disassembler import BRANCH_MNEMONICS, Instr, Mnemonic
+from symbolic.symbols import Symbol, post_order
+from weakref import WeakKeyDictionary
+
+class Event(Enum):
+    # (state, instr, seconds) after an instruction is run
+    INSTRUCTION = 'instruction'
+    # (state, summary, seconds) after a block summary is applied
+    SUMMARY = 'summary'
+    # (state, address, successors) when a state splits at a branch
+    FORK = 'fork'
+    # (state, blocks) when a state stops, with the number of blocks it ran
+    STATE_FINISHED = 'state_finished'
+    # (instrumentation,) at the end of explore
+    EXPLORE_FINISHED = 'explore_finished'
+
+# sizes of expressions as trees, shared sub-expressions are only sized once
+TREE_SIZES: WeakKeyDictionary = WeakKeyDictionary()
+
+def expression_size(value) -> int:
+    # number of nodes the expression has when it's written out
+    if not isinstance(value, Symbol):
+        return 1
+    if value in TREE_SIZES:
+        return TREE_SIZES[value]
+
+    for symbol in post_order(value, lambda s: s in TREE_SIZES):
+        TREE_SIZES[symbol] = 1 + sum(TREE_SIZES[a] if isinstance(a, Symbol) else 1 for a in symbol.args())
+    return TREE_SIZES[value]
+
+# opt-in counters for the executor's hot paths. The executor only calls into
+# this when it was given one, so exploring without it costs a None check per
+# instruction. Callbacks can be subscribed to each event for external profilers
+class Instrumentation:
+    def __init__(self, report: bool = True) -> None:
+        # print a report at the end of explore
+        self.report_on_finish = report
+        self.mnemonic_counts: Counter[Mnemonic] = Counter()
+        # seconds spent running each mnemonic outside of block summaries
+        self.mnemonic_time: Counter[Mnemonic] = Counter()
+        self.summaries_applied = 0
+        self.summary_time = 0.0
+        # times states split at each branch address
+        self.forks: Counter[int] = Counter()
+        self.live_states_high_water = 0
+        # blocks run by each state, by state ID
+        self.state_blocks: Counter[int] = Counter()
+        self.lifetimes: list[int] = []
+        # largest expression written at each block start address
+        self.expression_sizes: dict[int, int] = {}
+        self.callbacks: dict[Event, list[Callable]] = {event: [] for event in Event}
+        self.start_time = time.perf_counter()
+        self.end_time: float | None = None
+
+    def subscribe(self, event: Event, callback: Callable) -> None:
+        self.callbacks[event].append(callback)
+
+    def emit(self, event: Event, *args) -> None:
+        for callback in self.callbacks[event]:
+            callback(*args)
+
+    def step(self, state, instr: Instr) -> None:
+        start = time.perf_counter()
+        state.step(instr)
+        elapsed = time.perf_counter() - start
+        self.mnemonic_counts[instr.mnemonic] += 1
+        self.mnemonic_time[instr.mnemonic] += elapsed
+        self.emit(Event.INSTRUCTION, state, instr, elapsed)
+
+    def apply_summary(self, state, summary) -> None:
+        start = time.perf_counter()
+        summary.apply(state)
+        elapsed = time.perf_counter() - start
+        self.mnemonic_counts.update(summary.mnemonics)
+        self.summaries_applied += 1
+        self.summary_time += elapsed
+        self.emit(Event.SUMMARY, state, summary, elapsed)
+
+    def block_finished(self, executor, state, start: int, finished: bool) -> None:
+        # called once a state that started at instruction index start has run and its successors are scheduled
+        self.state_blocks[state.id] += 1
+        if start < len(executor.instructions):
+            address = executor.instructions[start].address
+            size = max(expression_size(value) for value in state.regs)
+            if size > self.expression_sizes.get(address, 0):
+                self.expression_sizes[address] = size
+
+        if len(state.successors) > 1:
+            branch = executor.instructions[state.pos - 1]
+            if branch.mnemonic in BRANCH_MNEMONICS:
+                self.forks[branch.address] += 1
+            self.emit(Event.FORK, state, branch.address, state.successors)
+
+        self.live_states_high_water = max(self.live_states_high_water, len(executor.scheduler))
+
+        if finished:
+            blocks = self.state_blocks.pop(state.id, 0)
+            self.lifetimes.append(blocks)
+            self.emit(Event.STATE_FINISHED, state, blocks)
+
+    def finish(self) -> None:
+        self.end_time = time.perf_counter()
+        self.emit(Event.EXPLORE_FINISHED, self)
+        if self.report_on_finish:
+            print(self.report())
+
+    def report(self, top: int = 10) -> str:
+        elapsed = (self.end_time or time.perf_counter()) - self.start_time
+        lines = [f'Explored in {elapsed:.3f}s']
+
+        lines.append('Instructions:')
+        for mnemonic, count in self.mnemonic_counts.most_common():
+            seconds = self.mnemonic_time.get(mnemonic, 0.0)
+            lines.append(f'\t{mnemonic.value:<22}{count:>10} {seconds * 1000:10.2f} ms')
+        lines.append(f'\tblock summaries {self.summaries_applied} applied in {self.summary_time * 1000:.2f} ms')
+
+        lines.append(f'Forks: {sum(self.forks.values())}, most at:')
+        for address, count in self.forks.most_common(top):
+            lines.append(f'\t{hex(address)}{count:>10}')
+
+        lines.append(f'Live states high water mark: {self.live_states_high_water}')
+        if self.lifetimes:
+            lines.append(f'State lifetimes: {len(self.lifetimes)} states, mean {sum(self.lifetimes) / len(self.lifetimes):.1f} blocks, max {max(self.lifetimes)} blocks')
+
+        lines.append('Largest expressions by block:')
+        largest = sorted(self.expression_sizes.items(), key=lambda item: item[1], reverse=True)[:top]
+        for address, size in largest:
+            lines.append(f'\t{hex(address)}{size:>10} nodes')
+        return '\n'.join(lines)
@@ -0,0 +1,61 @@
+from symbolic.cfg import ConditionalNode
+from symbolic.constraints import PathConstraints
+from symbolic.registers import RegisterFile
+from symbolic.symbols import *
+
+# where a state forked into the states that took and didn't take a branch
+class ForkPoint:
+    def __init__(
+        self,
+        conditional: ConditionalNode,
+        test: Symbol,
+        constraints: PathConstraints,
+        parent: 'ForkPoint | None',
+        side: bool | None
+    ) -> None:
+        self.conditional = conditional
+        self.test = test
+        # constraints of the state before it forked
+        self.constraints = constraints
+        # fork point and branch of the state that forked
+        self.parent = parent
+        self.side = side
+
+def can_merge(a, b) -> bool:
+    # only the two sides of the same fork are merged, so the if statement
+    # they came from can be closed and code continue after it
+    return (
+        a.fork_point is not None and a.fork_point is b.fork_point and a.side != b.side and a.pos == b.pos
+        and a.loops == b.loops
+    )
+
+def merge_states(a, b):
+    fork = a.fork_point
+    consequent, alternate = (a, b) if a.side else (b, a)
+
+    merged = a.clone()
+    var = None
+    regs = []
+    for reg, (left, right) in enumerate(zip(consequent.regs, alternate.regs)):
+        if left is right or left == right:
+            regs.append(left)
+        elif isinstance(left, str) and isinstance(right, str):
+            regs.append(ConditionalExpressionSymbol(fork.test, left, right))
+        else:
+            # both sides usually share most of their expression, which would be
+            # written out twice for every merge it goes through
+            if var is None:
+                var = a.executor.get_merge_var()
+            temporary = TemporarySymbol(f'{var}_reg{reg}', fork.test, left, right)
+            merged.cfg.add_statement(temporary.definition())
+            regs.append(temporary)
+
+    merged.regs = RegisterFile(regs)
+    merged.constraints = fork.constraints
+    merged.fork_point = fork.parent
+    merged.side = fork.side
+    if consequent.output is not alternate.output:
+        # the sides printed different values, which one the merged state printed isn't known
+        merged.output = None
+    fork.conditional.next = merged.cfg
+    return merged
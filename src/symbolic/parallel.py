@@ -0,0 +1,148 @@
+import os
+from collections import deque
+from collections.abc import Sequence
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from disassembler.disassembler import Instr
+from symbolic.cfg import Node, emit_program
+from symbolic.scheduler import Strategy
+from symbolic.snapshots import dumps_snapshot, loads_snapshot
+from symbolic.symbolic_executor import DEFAULT_UNROLL, State, StateSnapshot, Status, SymbolicExecutor
+from typing import NamedTuple, TextIO
+
+# blocks a worker runs for a shard before handing back its unexplored states,
+# which bounds how deep the cfg fragments it returns are and how long other
+# workers wait for work
+DEFAULT_BUDGET = 128
+
+# executor of the worker process, built once when the process starts
+WORKER: SymbolicExecutor | None = None
+
+class ShardResult(NamedTuple):
+    # cfg fragment of each state the shard was given
+    roots: list[Node]
+    # states left to explore, with the node of the fragment they continue from
+    frontier: list[tuple[Node, StateSnapshot]]
+    finished: list[StateSnapshot]
+    steps: int
+
+def init_worker(
+    instructions: Sequence[Instr],
+    strategy: Strategy,
+    prune: bool,
+    summarise: bool,
+    max_unroll: int | None,
+    flag_len: int | None
+) -> None:
+    global WORKER
+    # states only come from shards
+    WORKER = SymbolicExecutor(
+        instructions,
+        strategy,
+        prune=prune,
+        summarise=summarise,
+        max_unroll=max_unroll,
+        flag_len=flag_len,
+        schedule_root=False
+    )
+
+def explore_shard(shard: bytes, budget: int) -> bytes:
+    # shards and their results are written with their symbols as a table, the
+    # expressions in them can be too deep to pickle
+    executor = WORKER
+    executor.finished_states = []
+
+    roots = []
+    for snapshot in loads_snapshot(shard):
+        state = State.restore(executor, snapshot)
+        roots.append(state.cfg)
+        executor.schedule(state)
+
+    steps = 0
+    while len(executor.scheduler) > 0 and steps < budget:
+        executor.step()
+        steps += 1
+
+    frontier = []
+    while len(executor.scheduler) > 0:
+        state = executor.scheduler.pop()
+        frontier.append((state.cfg, state.snapshot()))
+
+    # the result is written as a whole, so frontier nodes stay part of the fragments
+    finished = [state.snapshot() for state in executor.finished_states]
+    return dumps_snapshot(ShardResult(roots, frontier, finished, steps))
+
+def graft(node: Node, fragment: Node) -> None:
+    # continues a node of the tree with the fragment a worker built from it
+    node.statements.extend(fragment.statements)
+    node.next = fragment.next
+
+# explores paths across a pool of processes. The frontier is kept here and
+# split into shards for idle workers, a worker explores its shard for a
+# budget of blocks and returns the cfg fragments it built and the states it
+# didn't get to, which go back into the frontier for whichever worker is idle
+# next. Paths are independent without merging, so the grafted tree is the
+# same as exploring in one process
+class ParallelExplorer:
+    def __init__(
+        self,
+        instructions: Sequence[Instr],
+        workers: int | None = None,
+        strategy: Strategy = Strategy.DFS,
+        prune: bool = True,
+        summarise: bool = True,
+        max_unroll: int | None = DEFAULT_UNROLL,
+        flag_len: int | None = 29,
+        budget: int = DEFAULT_BUDGET
+    ) -> None:
+        self.instructions = instructions
+        self.workers = workers or os.cpu_count() or 1
+        self.strategy = strategy
+        self.prune = prune
+        self.summarise = summarise
+        self.max_unroll = max_unroll
+        self.flag_len = flag_len
+        self.budget = budget
+        self.root = Node()
+        self.frontier: deque[tuple[Node, StateSnapshot]] = deque([
+            (self.root, StateSnapshot(0, ('',) * 8, (), Status.ACTIVE))
+        ])
+        self.finished_states: list[StateSnapshot] = []
+        self.steps = 0
+
+    def next_shard(self, idle: int) -> list[tuple[Node, StateSnapshot]]:
+        # shares the frontier evenly between the idle workers
+        size = max(1, -(-len(self.frontier) // idle))
+        return [self.frontier.popleft() for _ in range(min(size, len(self.frontier)))]
+
+    def explore(self) -> None:
+        pending: dict[Future, list[Node]] = {}
+
+        with ProcessPoolExecutor(
+            self.workers,
+            initializer=init_worker,
+            initargs=(self.instructions, self.strategy, self.prune, self.summarise, self.max_unroll, self.flag_len)
+        ) as pool:
+            while self.frontier or pending:
+                while self.frontier and len(pending) < self.workers:
+                    shard = self.next_shard(self.workers - len(pending))
+                    future = pool.submit(explore_shard, dumps_snapshot([snapshot for _, snapshot in shard]), self.budget)
+                    pending[future] = [node for node, _ in shard]
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    nodes = pending.pop(future)
+                    result: ShardResult = loads_snapshot(future.result())
+                    grafted = {}
+                    for node, fragment in zip(nodes, result.roots):
+                        graft(node, fragment)
+                        grafted[id(fragment)] = node
+                    # states that haven't moved on from the node they were given continue from the tree's node
+                    self.frontier.extend((grafted.get(id(node), node), snapshot) for node, snapshot in result.frontier)
+                    self.finished_states.extend(result.finished)
+                    self.steps += result.steps
+
+    def get_pseudocode(self) -> str:
+        return ''.join(emit_program(self.root))
+
+    def write_pseudocode(self, out: TextIO) -> None:
+        out.writelines(emit_program(self.root))
@@ -0,0 +1,29 @@
+# register file shared between forked states, the underlying list is only
+# copied when a state that shares it writes to a register
+class RegisterFile:
+    __slots__ = ('values', 'shared')
+
+    def __init__(self, values: list | None = None) -> None:
+        self.values = values if values is not None else [''] * 8
+        self.shared = False
+
+    def __getitem__(self, reg_id: int):
+        return self.values[reg_id]
+
+    def __setitem__(self, reg_id: int, value) -> None:
+        if self.shared:
+            self.values = self.values.copy()
+            self.shared = False
+        self.values[reg_id] = value
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __iter__(self):
+        return iter(self.values)
+
+    def fork(self) -> 'RegisterFile':
+        self.shared = True
+        other = RegisterFile(self.values)
+        other.shared = True
+        return other
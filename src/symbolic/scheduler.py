@@ -0,0 +1,108 @@
+import heapq
+from collections import deque
+from collections.abc import Callable
+from enum import Enum
+from itertools import count
+
+class Strategy(Enum):
+    DFS = 'dfs'
+    BFS = 'bfs'
+    # prefer states at the least visited positions
+    COVERAGE = 'coverage'
+    # prefer states closest to a RET
+    SHORTEST_PATH = 'shortest_path'
+    # prefer states earliest in the program, so that paths meet at join points
+    TOPOLOGICAL = 'topological'
+
+class Scheduler:
+    def __init__(self, max_states: int | None = None) -> None:
+        self.max_states = max_states
+
+    def is_full(self) -> bool:
+        return self.max_states is not None and len(self) >= self.max_states
+
+    def push(self, state) -> None:
+        raise Exception('Scheduler is abstract')
+
+    def pop(self):
+        raise Exception('Scheduler is abstract')
+
+    def __len__(self) -> int:
+        raise Exception('Scheduler is abstract')
+
+    def spill_coldest(self, count: int, spill: Callable) -> int:
+        # replaces up to count of the states that will be popped last with what
+        # spill returns for them, skipping states it returns None for
+        raise Exception('Scheduler is abstract')
+
+class DepthFirstScheduler(Scheduler):
+    def __init__(self, max_states: int | None = None) -> None:
+        super().__init__(max_states)
+        self.states = deque()
+
+    def push(self, state) -> None:
+        self.states.append(state)
+
+    def pop(self):
+        return self.states.pop()
+
+    def __len__(self) -> int:
+        return len(self.states)
+
+    def coldest_first(self) -> range:
+        return range(len(self.states))
+
+    def spill_coldest(self, count: int, spill: Callable) -> int:
+        spilled = 0
+        for i in self.coldest_first():
+            if spilled == count:
+                break
+            replacement = spill(self.states[i])
+            if replacement is not None:
+                self.states[i] = replacement
+                spilled += 1
+        return spilled
+
+class BreadthFirstScheduler(DepthFirstScheduler):
+    def pop(self):
+        return self.states.popleft()
+
+    def coldest_first(self) -> range:
+        return range(len(self.states) - 1, -1, -1)
+
+class PriorityScheduler(Scheduler):
+    def __init__(self, priority: Callable, max_states: int | None = None) -> None:
+        super().__init__(max_states)
+        self.priority = priority
+        self.heap = []
+        # breaks ties in insertion order, states themselves aren't comparable
+        self.counter = count()
+
+    def push(self, state) -> None:
+        heapq.heappush(self.heap, (self.priority(state), next(self.counter), state))
+
+    def pop(self):
+        return heapq.heappop(self.heap)[2]
+
+    def __len__(self) -> int:
+        return len(self.heap)
+
+    def spill_coldest(self, count: int, spill: Callable) -> int:
+        # replacing the state of an entry keeps its place in the heap
+        spilled = 0
+        for i in sorted(range(len(self.heap)), key=lambda i: self.heap[i][:2], reverse=True):
+            if spilled == count:
+                break
+            priority, order, state = self.heap[i]
+            replacement = spill(state)
+            if replacement is not None:
+                self.heap[i] = (priority, order, replacement)
+                spilled += 1
+        return spilled
+
+    def pop_all(self, priority) -> list:
+        # pops every state with the given priority
+        states = []
+        while self.heap and self.heap[0][0] == priority:
+            states.append(heapq.heappop(self.heap)[2])
+        return states
@@ -0,0 +1,97 @@
+from disassembler.disassembler import Mnemonic
+from symbolic.symbols import *
+
+# effects of the VM's operations on register values, which are either
+# concrete strings or symbols
+
+def prepare_for_numeric_operation(operand: Symbol | str):
+    if isinstance(operand, Symbol):
+        return operand
+    else:
+        return str(int(operand))
+
+def prepare_for_str_comparison(operand: Symbol | str):
+    if isinstance(operand, Symbol):
+        return str(operand)
+    else:
+        return f'"{operand}"'
+
+def to_number(operand: Symbol | str) -> Symbol | str:
+    # the VM compares anything that isn't a number as 0
+    if isinstance(operand, Symbol):
+        return operand
+    try:
+        return str(int(operand))
+    except ValueError:
+        return '0'
+
+def add(left: Symbol | str, right: Symbol | str) -> Symbol | str:
+    if left == '' or right == '':
+        return left if right == '' else right
+    elif isinstance(left, Symbol) or isinstance(right, Symbol):
+        return BinaryExpressionSymbol(
+            '+',
+            prepare_for_numeric_operation(left),
+            prepare_for_numeric_operation(right)
+        )
+    else:
+        return str(int(left) + int(right))
+
+def concat(left: Symbol | str, right: Symbol | str) -> Symbol | str:
+    if left == '' or right == '':
+        return left if right == '' else right
+    elif isinstance(left, Symbol) or isinstance(right, Symbol):
+        return ConcatExpressionSymbol(left, right)
+    else:
+        return left + right
+
+def invert_sign(operand: Symbol | str) -> Symbol | str:
+    if isinstance(operand, Symbol):
+        return UnaryExpressionSymbol('-', operand)
+    else:
+        # the VM flips the sign character rather than converting to a number
+        return operand[1:] if operand.startswith('-') else '-' + operand
+
+def write_char(operand: Symbol | str) -> str:
+    if isinstance(operand, Symbol):
+        raise Exception(f'Cannot write symbolic char code {operand}')
+    return chr(int(operand))
+
+def access_last_char(operand: Symbol | str) -> Symbol | str:
+    if isinstance(operand, StringSymbol) and isinstance(operand.len, int):
+        return MemberExpressionSymbol(operand, operand.len - 1)
+    elif isinstance(operand, StringSymbol):
+        return MemberExpressionSymbol(operand, BinaryExpressionSymbol('+', operand.len, '-1'))
+    elif isinstance(operand, Symbol):
+        length = MemberExpressionSymbol(operand, '"length"')
+        return MemberExpressionSymbol(operand, BinaryExpressionSymbol('-', length, 1))
+    else:
+        # an empty string reads its terminator
+        return str(ord(operand[-1])) if operand else '0'
+
+def pop_last_char(operand: Symbol | str) -> Symbol | str:
+    if isinstance(operand, StringSymbol) and isinstance(operand.len, int):
+        return StringSymbol(operand.name, operand.len - 1)
+    if isinstance(operand, StringSymbol):
+        return StringSymbol(operand.name, BinaryExpressionSymbol('+', operand.len, '-1'))
+    if isinstance(operand, Symbol):
+        return MemberExpressionSymbol(operand, ':-1')
+    else:
+        return operand[:-1]
+
+def iterate(mnemonic: Mnemonic, operand: Symbol | str, step: Symbol | str | None, count: Symbol) -> Symbol | str | None:
+    # value of an induction register after count iterations, None when there's no closed form
+    match mnemonic:
+        case Mnemonic.ADD:
+            try:
+                operand = prepare_for_numeric_operation(operand)
+                step = prepare_for_numeric_operation(step)
+            except ValueError:
+                return None
+            total = count if step == '1' else BinaryExpressionSymbol('*', count, step)
+            return BinaryExpressionSymbol('+', operand, total)
+        case Mnemonic.APPEND:
+            return concat(operand, RepeatExpressionSymbol('1', count))
+        case Mnemonic.POP_LAST_CHAR if isinstance(operand, StringSymbol):
+            return StringSymbol(operand.name, BinaryExpressionSymbol('-', operand.len, count))
+    return None
@@ -0,0 +1,200 @@
+import re
+from symbolic.symbols import *
+from weakref import WeakKeyDictionary, WeakSet
+
+# what the VM reads as a number
+NUMBER_PATTERN = re.compile(r'-?\d+')
+
+# how the VM writes a number as a string
+CANONICAL_NUMBER = re.compile(r'0|-?[1-9]\d*')
+
+# symbols already in normal form
+NORMALISED: WeakSet = WeakSet()
+
+# normal forms of symbols that aren't normalised themselves
+REWRITES: WeakKeyDictionary = WeakKeyDictionary()
+
+def is_constant(value) -> bool:
+    return isinstance(value, int) or (isinstance(value, str) and NUMBER_PATTERN.fullmatch(value) is not None)
+
+def is_number(value) -> bool:
+    return isinstance(value, int) or (isinstance(value, str) and CANONICAL_NUMBER.fullmatch(value) is not None)
+
+# what is known about the strings symbols hold, shared sub-expressions are only classified once
+NUMBER_KINDS: WeakKeyDictionary = WeakKeyDictionary()
+
+# the symbol always holds something the VM reads as a number
+NUMERIC = 1
+# and writes it the way the VM writes numbers
+CANONICAL = 2
+
+def number_kind(value) -> int:
+    if isinstance(value, int):
+        return NUMERIC | CANONICAL
+    if isinstance(value, str):
+        return (NUMERIC if is_constant(value) else 0) | (CANONICAL if is_number(value) else 0)
+    return NUMBER_KINDS[value]
+
+def classify(value: Symbol) -> int:
+    # kind of a symbol whose children have already been classified
+    match value:
+        case ConcatExpressionSymbol() | StringSymbol() | RepeatExpressionSymbol():
+            return 0
+        case IdentifierSymbol():
+            # lengths and loop counts
+            return NUMERIC | CANONICAL
+        case UnaryExpressionSymbol():
+            # the VM flips the sign character, so 0 becomes -0
+            return number_kind(value.argument) & NUMERIC
+        case BinaryExpressionSymbol(operator='+'):
+            # adding '' gives the other operand as it is, which only numbers can't be
+            left, right = number_kind(value.left), number_kind(value.right)
+            numeric = (left | right) & NUMERIC
+            canonical = (left & NUMERIC or right & CANONICAL) and (right & NUMERIC or left & CANONICAL)
+            return numeric | CANONICAL if canonical else numeric
+        case BinaryExpressionSymbol(operator='-' | '*'):
+            return NUMERIC | CANONICAL
+        case MemberExpressionSymbol(property=':-1'):
+            return 0
+        case MemberExpressionSymbol():
+            # lengths and character codes
+            return NUMERIC | CANONICAL
+        case ConditionalExpressionSymbol():
+            return number_kind(value.consequent) & number_kind(value.alternate)
+    # symbols whose value isn't known could hold anything
+    return 0
+
+def kind_of(value) -> int:
+    if isinstance(value, Symbol):
+        for symbol in post_order(value, lambda s: s in NUMBER_KINDS):
+            NUMBER_KINDS[symbol] = classify(symbol)
+    return number_kind(value)
+
+def is_numeric(value) -> bool:
+    # whether a register value always holds something the VM reads as a number
+    return bool(kind_of(value) & NUMERIC)
+
+def is_canonical(value) -> bool:
+    # whether a register value always holds a number written the way the VM writes
+    # them, so comparing it as a string is the same as comparing it as a number
+    return bool(kind_of(value) & CANONICAL)
+
+def split_constant(value) -> tuple:
+    # splits an additive chain in normal form into its symbolic part and constant
+    if is_constant(value):
+        return None, int(value)
+    if type(value) is BinaryExpressionSymbol and value.operator == '+' and is_constant(value.right):
+        return value.left, int(value.right)
+    return value, 0
+
+def negate(value):
+    if is_constant(value):
+        return str(-int(value))
+    if isinstance(value, UnaryExpressionSymbol) and value.operator == '-':
+        return value.argument
+    return UnaryExpressionSymbol('-', value)
+
+def simplify_add(left, right):
+    # the VM converts both operands of an addition to numbers and writes the sum
+    # back out, so a base is only folded away where that conversion changes nothing
+    left_base, left_const = split_constant(left)
+    right_base, right_const = split_constant(right)
+
+    # constants are moved to the outside of the chain
+    if left_base is None:
+        base = right_base
+    elif right_base is None:
+        base = left_base
+    elif negate(right_base) is left_base and is_numeric(left_base):
+        # a value that isn't a number faults instead
+        base = None
+    elif left_base is left and right_base is right:
+        # no constants to move
+        return BinaryExpressionSymbol('+', left, right)
+    else:
+        base = BinaryExpressionSymbol('+', left_base, right_base)
+
+    const = left_const + right_const
+    if base is None:
+        return str(const)
+    if const == 0 and is_canonical(base):
+        return base
+    return BinaryExpressionSymbol('+', base, str(const))
+
+def simplify_concat(left, right):
+    # neighbouring string constants are joined
+    if isinstance(left, str) and isinstance(right, str):
+        return left + right
+    if isinstance(right, str) and isinstance(left, ConcatExpressionSymbol) and isinstance(left.right, str):
+        return ConcatExpressionSymbol(left.left, left.right + right)
+    if isinstance(left, str) and isinstance(right, ConcatExpressionSymbol) and isinstance(right.left, str):
+        return ConcatExpressionSymbol(left + right.left, right.right)
+    return ConcatExpressionSymbol(left, right)
+
+def simplify_member(object, property):
+    if isinstance(object, StringSymbol) and isinstance(object.len, int):
+        if property == '"length"':
+            return object.len
+        if property == ':-1':
+            return StringSymbol(object.name, object.len - 1)
+    return MemberExpressionSymbol(object, property)
+
+def rewrite(symbol: Symbol):
+    # rewrites a symbol whose children are already in normal form
+    match symbol:
+        case ConcatExpressionSymbol():
+            return simplify_concat(symbol.left, symbol.right)
+
+        case BinaryExpressionSymbol(operator='+'):
+            return simplify_add(symbol.left, symbol.right)
+
+        case BinaryExpressionSymbol(operator='-') if is_constant(symbol.left) and is_constant(symbol.right):
+            result = int(symbol.left) - int(symbol.right)
+            both_ints = isinstance(symbol.left, int) and isinstance(symbol.right, int)
+            return result if both_ints else str(result)
+
+        case UnaryExpressionSymbol(operator='-'):
+            return negate(symbol.argument)
+
+        case MemberExpressionSymbol():
+            return simplify_member(symbol.object, symbol.property)
+
+    return symbol
+
+def rebuild(symbol: Symbol) -> Symbol:
+    args = symbol.args()
+    simplified = tuple(simplify(a) for a in args)
+    if all(a is b for a, b in zip(args, simplified)):
+        return symbol
+    return type(symbol)(*simplified)
+
+def normalise(value: Symbol) -> None:
+    # finds the normal form of a symbol whose children already have theirs
+    result = value
+    # each rewrite can expose another at the top of the new expression
+    while isinstance(result, Symbol) and result not in NORMALISED:
+        rewritten = rewrite(rebuild(result))
+        if rewritten is result:
+            NORMALISED.add(result)
+            break
+        result = rewritten
+
+    if result is not value:
+        REWRITES[value] = result
+
+def is_simplified(value) -> bool:
+    return not isinstance(value, Symbol) or value in NORMALISED or value in REWRITES
+
+# returns the normal form of a register value, only symbols that haven't been seen
+# before are visited so this is cheap to run every time a register is written
+def simplify(value):
+    if not isinstance(value, Symbol) or value in NORMALISED:
+        return value
+    if value in REWRITES:
+        return REWRITES[value]
+
+    # rebuilding only recurses into expressions a rewrite created, symbols read
+    # back from a spilled state haven't been seen before and can be deep chains
+    for symbol in post_order(value, is_simplified):
+        normalise(symbol)
+    return REWRITES.get(value, value)
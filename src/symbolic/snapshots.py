@@ -0,0 +1,58 @@
+import io
+import pickle
+from symbolic.simplifier import NORMALISED
+from symbolic.symbols import Symbol, post_order
+from typing import BinaryIO
+
+def write_snapshot(f: BinaryIO, snapshot) -> None:
+    # pickling symbols recurses once per level of an expression, which chains
+    # are too deep for. The symbols a snapshot refers to are written first as a
+    # table, children before parents with symbol arguments replaced by their
+    # index and a bit set in mask for each of them, and the snapshot refers to
+    # them by index. Anything holding snapshots can be written the same way
+    table = []
+    ids = {}
+
+    def persistent_id(obj) -> int | None:
+        if not isinstance(obj, Symbol):
+            return None
+        for symbol in post_order(obj, lambda s: s in ids):
+            ids[symbol] = len(table)
+            args = symbol.args()
+            mask = 0
+            for i, a in enumerate(args):
+                if isinstance(a, Symbol):
+                    mask |= 1 << i
+            args = tuple(ids[a] if mask >> i & 1 else a for i, a in enumerate(args))
+            # symbols in normal form aren't simplified again once they're read
+            table.append((type(symbol), args, mask, symbol in NORMALISED))
+        return ids[obj]
+
+    # the table is only complete once the snapshot has been pickled
+    body = io.BytesIO()
+    pickler = pickle.Pickler(body, pickle.HIGHEST_PROTOCOL)
+    pickler.persistent_id = persistent_id
+    pickler.dump(snapshot)
+    pickle.dump(table, f, pickle.HIGHEST_PROTOCOL)
+    f.write(body.getbuffer())
+
+def read_snapshot(f: BinaryIO):
+    symbols = []
+    for cls, args, mask, normalised in pickle.load(f):
+        symbol = cls(*(symbols[a] if mask >> i & 1 else a for i, a in enumerate(args))) if mask else cls(*args)
+        if normalised:
+            NORMALISED.add(symbol)
+        symbols.append(symbol)
+
+    unpickler = pickle.Unpickler(f)
+    unpickler.persistent_load = lambda index: symbols[index]
+    return unpickler.load()
+
+def dumps_snapshot(snapshot) -> bytes:
+    # for handing snapshots to other processes
+    f = io.BytesIO()
+    write_snapshot(f, snapshot)
+    return f.getvalue()
+
+def loads_snapshot(data: bytes):
+    return read_snapshot(io.BytesIO(data))
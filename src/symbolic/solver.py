@@ -0,0 +1,476 @@
+import re
+import string
+from collections.abc import Callable, Iterator
+from symbolic.constraints import Constraint, PathConstraints, Relation
+from symbolic.simplifier import is_canonical, is_number
+from symbolic.symbols import *
+from typing import Self
+from weakref import WeakKeyDictionary
+
+# bounds used for values that aren't otherwise constrained
+UNBOUNDED = 1 << 64
+
+# flag characters are bytes
+BYTE_DOMAIN = (0, 255)
+
+# gives up decomposing a string comparison when it splits more than one way
+MAX_SPLITS = 2
+
+MAX_ROUNDS = 64
+
+# values tried while searching for a model before giving up
+MAX_NODES = 10_000
+
+# flag characters tried first, input is read as a whitespace separated token
+PREFERRED_BYTES = [ord(c) for c in string.ascii_letters + string.digits + string.punctuation]
+
+class Infeasible(Exception):
+    pass
+
+def ceil_div(a: int, b: int) -> int:
+    return -((-a) // b)
+
+# linear forms of symbols, shared sub-expressions are only linearised once
+LINEAR_FORMS: WeakKeyDictionary = WeakKeyDictionary()
+
+def is_arithmetic(value) -> bool:
+    match value:
+        case ConcatExpressionSymbol():
+            return False
+        case BinaryExpressionSymbol(operator='+' | '-') | UnaryExpressionSymbol(operator='-'):
+            return True
+        case BinaryExpressionSymbol(operator='*'):
+            # multiplication is only linear by a constant
+            return is_number(value.left) or is_number(value.right)
+    return False
+
+def combine(value: Symbol) -> tuple[dict, int]:
+    # linear form of an arithmetic symbol whose children have already been linearised
+    if isinstance(value, UnaryExpressionSymbol):
+        terms, const = linearise(value.argument)
+        return {v: -c for v, c in terms.items()}, -const
+
+    left_terms, left_const = linearise(value.left)
+    right_terms, right_const = linearise(value.right)
+    if value.operator == '*':
+        # one side is a constant
+        if left_terms:
+            terms, const, scale = left_terms, left_const, right_const
+        else:
+            terms, const, scale = right_terms, right_const, left_const
+        return {v: c * scale for v, c in terms.items() if scale != 0}, const * scale
+    sign = 1 if value.operator == '+' else -1
+    terms = dict(left_terms)
+    for var, coef in right_terms.items():
+        terms[var] = terms.get(var, 0) + sign * coef
+    return {v: c for v, c in terms.items() if c != 0}, left_const + sign * right_const
+
+# a linear expression is a map of variable to coefficient and a constant,
+# any symbol that isn't linear arithmetic is treated as a variable
+def linearise(value) -> tuple[dict, int]:
+    if isinstance(value, (int, str)):
+        return {}, int(value)
+    if not is_arithmetic(value):
+        return {value: 1}, 0
+    if value in LINEAR_FORMS:
+        return LINEAR_FORMS[value]
+
+    for symbol in post_order(value, lambda s: not is_arithmetic(s) or s in LINEAR_FORMS):
+        LINEAR_FORMS[symbol] = combine(symbol)
+    return LINEAR_FORMS[value]
+
+def subtract(left: tuple[dict, int], right: tuple[dict, int]) -> tuple[dict, int]:
+    terms = dict(left[0])
+    for var, coef in right[0].items():
+        terms[var] = terms.get(var, 0) - coef
+    return {v: c for v, c in terms.items() if c != 0}, left[1] - right[1]
+
+def initial_domain(var: Symbol) -> tuple[int, int]:
+    match var:
+        case MemberExpressionSymbol(object=StringSymbol(), property='"length"'):
+            return (0, UNBOUNDED)
+        case MemberExpressionSymbol(object=StringSymbol()):
+            return BYTE_DOMAIN
+        case IdentifierSymbol(name=name) if name.endswith('_len'):
+            return (0, UNBOUNDED)
+    return (-UNBOUNDED, UNBOUNDED)
+
+def candidate_values(var: Symbol, lo: int, hi: int) -> Iterator[int]:
+    # values to try for a variable in the order they're tried, starting from the
+    # one closest to 0 for numbers and printable characters for flag bytes
+    if initial_domain(var) == BYTE_DOMAIN:
+        preferred = [v for v in PREFERRED_BYTES if lo <= v <= hi]
+        yield from preferred
+        yield from (v for v in range(lo, hi + 1) if v not in preferred and not chr(v).isspace())
+        return
+    start = min(max(lo, 0), hi)
+    yield from range(start, hi + 1)
+    yield from range(start - 1, lo - 1, -1)
+
+def label_order(var: Symbol) -> int:
+    # lengths and loop counts decide which flag bytes are read, so they're labelled first
+    return 0 if isinstance(var, IdentifierSymbol) else 1
+
+def flatten_concat(value) -> list:
+    parts = []
+    stack = [value]
+    while stack:
+        part = stack.pop()
+        if isinstance(part, ConcatExpressionSymbol):
+            stack.append(part.right)
+            stack.append(part.left)
+        else:
+            parts.append(part)
+    return parts
+
+# lightweight solver for the equalities, disequalities and inequalities over
+# flag bytes that the VM's checks produce, it works by propagating intervals
+# and only reports infeasible when that is certain. Propagation is incremental,
+# only constraints that were added or whose variables narrowed are revisited,
+# so a copy can be extended with the constraints of a longer path
+class Solver:
+    def __init__(self) -> None:
+        self.domains: dict[Symbol, tuple[int, int]] = {}
+        # linear constraints as (relation, terms, const), meaning terms + const <relation> 0
+        self.linear: list[tuple[Relation, dict, int]] = []
+        # indices of the linear constraints each variable is in
+        self.watches: dict[Symbol, tuple[int, ...]] = {}
+        # indices of the linear constraints left to propagate, as an ordered set
+        self.queue: dict[int, None] = {}
+        # disjunctions of linear disequalities
+        self.clauses: list[list[tuple[dict, int]]] = []
+        # constraints that couldn't be interpreted, only checked against their negation
+        self.atoms: set[tuple[Relation, Symbol | str, Symbol | str]] = set()
+
+    def copy(self) -> Self:
+        # domains are tuples and constraints aren't mutated, so the containers are all that's copied
+        solver = Solver.__new__(Solver)
+        solver.domains = self.domains.copy()
+        solver.linear = self.linear.copy()
+        solver.watches = self.watches.copy()
+        solver.queue = self.queue.copy()
+        solver.clauses = self.clauses.copy()
+        solver.atoms = self.atoms.copy()
+        return solver
+
+    def domain(self, var: Symbol) -> tuple[int, int]:
+        if var not in self.domains:
+            self.domains[var] = initial_domain(var)
+        return self.domains[var]
+
+    def bounds(self, terms: dict, const: int) -> tuple[int, int]:
+        lo = hi = const
+        for var, coef in terms.items():
+            var_lo, var_hi = self.domain(var)
+            if coef > 0:
+                lo += coef * var_lo
+                hi += coef * var_hi
+            else:
+                lo += coef * var_hi
+                hi += coef * var_lo
+        return lo, hi
+
+    def add_linear(self, relation: Relation, expr: tuple[dict, int]) -> None:
+        terms, const = expr
+        if relation == Relation.LT:
+            # integers, so x < 0 is x + 1 <= 0
+            relation, const = Relation.LE, const + 1
+        index = len(self.linear)
+        for var in terms:
+            self.domain(var)
+            self.watches[var] = self.watches.get(var, ()) + (index,)
+        self.linear.append((relation, terms, const))
+        self.queue[index] = None
+
+    def add_atom(self, constraint: Constraint) -> None:
+        relation = constraint.relation
+        key = (relation, constraint.left, constraint.right)
+        if relation in (Relation.EQ, Relation.NE):
+            opposite = Relation.NE if relation == Relation.EQ else Relation.EQ
+            if (opposite, constraint.left, constraint.right) in self.atoms or (opposite, constraint.right, constraint.left) in self.atoms:
+                raise Infeasible()
+        self.atoms.add(key)
+
+    def add(self, constraint: Constraint) -> None:
+        left, right = constraint.left, constraint.right
+        relation = constraint.relation
+
+        if constraint.numeric:
+            if isinstance(left, str) and not is_number(left) or isinstance(right, str) and not is_number(right):
+                self.add_atom(constraint)
+            else:
+                self.add_linear(relation, subtract(linearise(left), linearise(right)))
+            return
+
+        # comparisons of registers as strings
+        if isinstance(left, str) and isinstance(right, str):
+            if (left == right) != (relation == Relation.EQ):
+                raise Infeasible()
+        elif is_canonical(left) and is_canonical(right):
+            self.add_linear(relation, subtract(linearise(left), linearise(right)))
+        elif isinstance(left, str) and is_canonical(right) or isinstance(right, str) and is_canonical(left):
+            # a number never prints as anything but its canonical form
+            if relation == Relation.EQ:
+                raise Infeasible()
+        elif isinstance(right, str) and isinstance(left, StringSymbol):
+            self.add_string_length(constraint, left, right)
+        elif isinstance(left, str) and isinstance(right, StringSymbol):
+            self.add_string_length(constraint, right, left)
+        elif isinstance(right, str) and isinstance(left, ConcatExpressionSymbol):
+            self.add_string_equality(constraint, left, right)
+        elif isinstance(left, str) and isinstance(right, ConcatExpressionSymbol):
+            self.add_string_equality(constraint, right, left)
+        else:
+            self.add_atom(constraint)
+
+    def add_string_length(self, constraint: Constraint, string: StringSymbol, literal: str) -> None:
+        # input only equals a literal of the same length, which decides comparisons with ''
+        length = subtract(linearise(string.len), ({}, len(literal)))
+        if constraint.relation == Relation.EQ:
+            self.add_linear(Relation.EQ, length)
+            if literal != '':
+                self.add_atom(constraint)
+        elif literal == '':
+            self.add_linear(Relation.NE, length)
+        else:
+            self.add_atom(constraint)
+
+    def add_string_equality(self, constraint: Constraint, concat: ConcatExpressionSymbol, literal: str) -> None:
+        parts = flatten_concat(concat)
+        splits = self.split_literal(parts, literal)
+        if splits is None or len(splits) > 1:
+            self.add_atom(constraint)
+            return
+
+        if len(splits) == 0:
+            # no way for the parts to print as the literal
+            if constraint.relation == Relation.EQ:
+                raise Infeasible()
+            return
+
+        equalities = [
+            subtract(linearise(part), ({}, int(token)))
+            for part, token in zip(parts, splits[0])
+            if isinstance(part, Symbol)
+        ]
+        if constraint.relation == Relation.EQ:
+            for expr in equalities:
+                self.add_linear(Relation.EQ, expr)
+        else:
+            for terms, _ in equalities:
+                for var in terms:
+                    self.domain(var)
+            self.clauses.append(equalities)
+
+    def split_literal(self, parts: list, literal: str) -> list[list[str]] | None:
+        # finds the ways of splitting a literal so each part prints as its piece,
+        # None when a part isn't something that can be matched
+        if not all(isinstance(p, str) or is_canonical(p) for p in parts):
+            return None
+
+        splits = []
+
+        def search(index: int, pos: int, tokens: list[str]) -> None:
+            if len(splits) > MAX_SPLITS:
+                return
+            if index == len(parts):
+                if pos == len(literal):
+                    splits.append(tokens.copy())
+                return
+
+            part = parts[index]
+            if isinstance(part, str):
+                if literal.startswith(part, pos):
+                    tokens.append(part)
+                    search(index + 1, pos + len(part), tokens)
+                    tokens.pop()
+                return
+
+            lo, hi = self.bounds(*linearise(part))
+            end = pos + 1
+            while end <= len(literal):
+                token = literal[pos:end]
+                if token != '-':
+                    if not is_number(token):
+                        break
+                    if lo <= int(token) <= hi:
+                        tokens.append(token)
+                        search(index + 1, end, tokens)
+                        tokens.pop()
+                end += 1
+
+        search(0, 0, [])
+        return splits
+
+    def narrow(self, var: Symbol, lo: int, hi: int) -> bool:
+        domain_lo, domain_hi = self.domains[var]
+        if lo <= domain_lo and hi >= domain_hi:
+            return False
+        domain_lo, domain_hi = max(domain_lo, lo), min(domain_hi, hi)
+        if domain_lo > domain_hi:
+            raise Infeasible()
+        self.domains[var] = (domain_lo, domain_hi)
+        # constraints over the variable may narrow others now
+        for index in self.watches.get(var, ()):
+            self.queue[index] = None
+        return True
+
+    def propagate_linear(self, relation: Relation, terms: dict, const: int) -> bool:
+        lo, hi = self.bounds(terms, const)
+        changed = False
+
+        match relation:
+            case Relation.EQ:
+                if lo > 0 or hi < 0:
+                    raise Infeasible()
+            case Relation.LE:
+                if lo > 0:
+                    raise Infeasible()
+            case Relation.NE:
+                if lo == hi == 0:
+                    raise Infeasible()
+                if len(terms) == 1:
+                    # a single variable can have an end of its domain removed
+                    (var, coef), = terms.items()
+                    if -const % coef == 0:
+                        excluded = -const // coef
+                        domain = self.domains[var]
+                        if domain[0] == excluded:
+                            changed = self.narrow(var, excluded + 1, domain[1])
+                        elif domain[1] == excluded:
+                            changed = self.narrow(var, domain[0], excluded - 1)
+                return changed
+
+        for var, coef in terms.items():
+            var_lo, var_hi = self.domains[var]
+            # bounds of the expression without this variable
+            rest_lo = lo - (coef * var_lo if coef > 0 else coef * var_hi)
+            rest_hi = hi - (coef * var_hi if coef > 0 else coef * var_lo)
+
+            # coef * var must lie in [-rest_hi, -rest_lo] for EQ, and be at most -rest_lo for LE
+            target_lo = -rest_hi if relation == Relation.EQ else -UNBOUNDED * abs(coef)
+            target_hi = -rest_lo
+            if coef > 0:
+                new_lo, new_hi = ceil_div(target_lo, coef), target_hi // coef
+            else:
+                new_lo, new_hi = ceil_div(target_hi, coef), target_lo // coef
+            if self.narrow(var, new_lo, new_hi):
+                changed = True
+                lo, hi = self.bounds(terms, const)
+
+        return changed
+
+    def check_clauses(self) -> None:
+        for clause in self.clauses:
+            if all(self.bounds(terms, const) == (0, 0) for terms, const in clause):
+                raise Infeasible()
+
+    def propagate(self) -> None:
+        # as many constraints as MAX_ROUNDS passes over all of them would visit,
+        # intervals of unbounded variables can take that long to meet
+        budget = MAX_ROUNDS * len(self.linear)
+        try:
+            while self.queue and budget > 0:
+                index = next(iter(self.queue))
+                del self.queue[index]
+                self.propagate_linear(*self.linear[index])
+                budget -= 1
+            self.check_clauses()
+        finally:
+            self.queue.clear()
+
+    def is_feasible(self) -> bool:
+        try:
+            self.propagate()
+            return True
+        except Infeasible:
+            return False
+
+    def find_model(self, accept: Callable[[dict], bool] | None = None, max_nodes: int = MAX_NODES) -> dict[Symbol, int] | None:
+        # searches for a value of every variable that satisfies the linear
+        # constraints, fixing one variable at a time and propagating. Atoms aren't
+        # interpreted, so each model found is only taken when accept takes it.
+        # None when there's no model or the search gave up
+        try:
+            self.propagate()
+        except Infeasible:
+            return None
+
+        # indices of characters are labelled too, they decide which character a variable is
+        for var in list(self.domains):
+            if isinstance(var, MemberExpressionSymbol) and isinstance(var.property, Symbol):
+                for index_var in linearise(var.property)[0]:
+                    self.domain(index_var)
+        variables = sorted(self.domains, key=label_order)
+        # (index of the variable being labelled, values left to try, domains before it was labelled)
+        stack = [(0, None, None)]
+        nodes = 0
+        while stack:
+            index, values, saved = stack.pop()
+            if values is None:
+                if index == len(variables):
+                    model = {var: domain[0] for var, domain in self.domains.items()}
+                    if accept is None or accept(model):
+                        return model
+                    continue
+                var = variables[index]
+                lo, hi = self.domains[var]
+                values = iter([lo]) if lo == hi else candidate_values(var, lo, hi)
+                saved = self.domains.copy()
+            else:
+                self.domains = saved.copy()
+
+            value = next(values, None)
+            if value is None:
+                continue
+            nodes += 1
+            if nodes > max_nodes:
+                return None
+            stack.append((index, values, saved))
+            try:
+                self.narrow(variables[index], value, value)
+                self.propagate()
+            except Infeasible:
+                continue
+            stack.append((index + 1, None, None))
+        return None
+
+def path_solver(constraints: PathConstraints) -> Solver | None:
+    # solver with a path's constraints propagated, None when they're infeasible.
+    # It extends a copy of the solver kept by the nearest ancestor, so checking a
+    # fork only adds the constraints since then instead of the whole path
+    if constraints.solver is not None or constraints.feasible is False:
+        return constraints.solver
+
+    added = []
+    node = constraints
+    while node.solver is None and node.parent is not None:
+        if node.feasible is False:
+            constraints.feasible = False
+            return None
+        added.append(node.constraint)
+        node = node.parent
+
+    solver = node.solver.copy() if node.solver is not None else Solver()
+    try:
+        for constraint in reversed(added):
+            solver.add(constraint)
+        solver.propagate()
+    except Infeasible:
+        constraints.feasible = False
+        return None
+    constraints.feasible = True
+    constraints.solver = solver
+    return solver
+
+def is_feasible(constraints: PathConstraints) -> bool:
+    if constraints.feasible is None:
+        path_solver(constraints)
+    return constraints.feasible
+
+def value_bounds(constraints: PathConstraints, value: Symbol | str) -> tuple[int, int] | None:
+    # range of values a numeric expression can take, None when the constraints are infeasible
+    solver = path_solver(constraints)
+    if solver is None:
+        return None
+    return solver.bounds(*linearise(value))
@@ -0,0 +1,99 @@
+import os
+import resource
+import shutil
+import sys
+import tempfile
+from symbolic.cfg import Node
+from symbolic.snapshots import read_snapshot, write_snapshot
+from typing import NamedTuple, Self
+
+# blocks run between checks of the process's memory use
+DEFAULT_CHECK_INTERVAL = 256
+
+# fewest states kept in memory when the memory budget lowers the state budget
+MIN_LIVE_STATES = 16
+
+def current_rss() -> int:
+    # bytes of memory the process has resident
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        # the peak instead where /proc isn't available, in KiB on Linux and bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+# what stays in memory of a pending state that was written to disk. Its cfg
+# node is part of the tree being built and its fork point is shared with the
+# other side of the fork, so neither can go in the file
+class SpilledState(NamedTuple):
+    id: int
+    pos: int
+    cfg: Node
+    fork_point: object
+    side: bool | None
+    path: str
+
+# on-disk store of pending states for exploring in bounded memory. When more
+# than max_live_states pending states are in memory, or the process uses more
+# than max_rss bytes, the states least likely to be scheduled soon are written
+# out as snapshots and replaced in the scheduler, and they're read back when
+# they are popped. Going over max_rss lowers max_live_states, since memory
+# that was freed isn't always given back to the OS
+class SpillStore:
+    def __init__(
+        self,
+        max_live_states: int | None = None,
+        max_rss: int | None = None,
+        directory: str | None = None,
+        check_interval: int = DEFAULT_CHECK_INTERVAL
+    ) -> None:
+        self.max_live_states = max_live_states
+        self.max_rss = max_rss
+        self.check_interval = check_interval
+        # a directory of its own, so stores of concurrent jobs can share a parent
+        self.directory = tempfile.mkdtemp(prefix='fsvm-spill-', dir=directory)
+        # states on disk
+        self.spilled = 0
+        self.spills = 0
+        self.loads = 0
+        self.steps = 0
+
+    def spill(self, state) -> SpilledState | None:
+        # writes a state out, None when it already was
+        if isinstance(state, SpilledState):
+            return None
+        path = os.path.join(self.directory, f'{state.id}.pickle')
+        with open(path, 'wb') as f:
+            write_snapshot(f, state.snapshot())
+        self.spilled += 1
+        self.spills += 1
+        return SpilledState(state.id, state.pos, state.cfg, state.fork_point, state.side, path)
+
+    def load(self, spilled: SpilledState):
+        with open(spilled.path, 'rb') as f:
+            snapshot = read_snapshot(f)
+        os.remove(spilled.path)
+        self.spilled -= 1
+        self.loads += 1
+        return snapshot
+
+    def enforce(self, scheduler) -> None:
+        # called once per block with the executor's scheduler
+        live = len(scheduler) - self.spilled
+        self.steps += 1
+        if self.max_rss is not None and self.steps % self.check_interval == 0 and current_rss() > self.max_rss:
+            self.max_live_states = max(MIN_LIVE_STATES, min(live, self.max_live_states or live) // 2)
+        if self.max_live_states is not None and live > self.max_live_states:
+            # down to half the budget, so states aren't written out on every block
+            scheduler.spill_coldest(live - self.max_live_states // 2, self.spill)
+
+    def close(self) -> None:
+        shutil.rmtree(self.directory, ignore_errors=True)
+        self.spilled = 0
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
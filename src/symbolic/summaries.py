@@ -0,0 +1,123 @@
+from collections.abc import Sequence
+from disassembler.disassembler import BRANCH_MNEMONICS, Instr, Mnemonic
+from disassembler.flow import BasicBlock, ControlFlowGraph, reg_id
+from enum import Enum
+from symbolic import semantics
+from symbolic.simplifier import simplify
+
+class OpKind(Enum):
+    COMPUTE = 0
+    PRINT = 1
+    READ = 2
+
+# transfer function of a basic block, excluding the branch that ends it. The
+# block is compiled into a list of value slots (the first 8 hold the registers
+# on entry) and the operations that are needed to compute the registers it
+# writes, so applying it to a state skips dead writes and interpreting every
+# instruction
+class BlockSummary:
+    def __init__(self, instructions: Sequence[Instr], block: BasicBlock) -> None:
+        self.start = block.start
+        last = instructions[block.end - 1]
+        # the branch ending a block is left for the state to run
+        self.end = block.end - 1 if last.mnemonic in BRANCH_MNEMONICS else block.end
+        self.mnemonics = [instructions[i].mnemonic for i in range(self.start, self.end)]
+        # values of constant slots, None for the others
+        self.constants: list = [None] * 8
+        # operations as (kind, dest slot, function, arg slots)
+        self.ops: list[tuple] = []
+        # registers the block writes, with the slot holding their final value
+        self.outputs: list[tuple[int, int]] = []
+        self.compile(instructions)
+
+    def new_slot(self, constant=None) -> int:
+        self.constants.append(constant)
+        return len(self.constants) - 1
+
+    def compile(self, instructions: Sequence[Instr]) -> None:
+        regs = list(range(8))
+        ops = []
+
+        for index in range(self.start, self.end):
+            instr = instructions[index]
+            operands = instr.operands
+
+            match instr.mnemonic:
+                case Mnemonic.CLEAR:
+                    regs[reg_id(operands[0])] = self.new_slot('')
+
+                case Mnemonic.SET:
+                    regs[reg_id(operands[0])] = self.new_slot(operands[1])
+
+                case Mnemonic.APPEND:
+                    dest = reg_id(operands[0])
+                    suffix = self.new_slot(operands[1])
+                    ops.append((OpKind.COMPUTE, self.new_slot(), semantics.concat, (regs[dest], suffix)))
+                    regs[dest] = ops[-1][1]
+
+                case Mnemonic.ADD | Mnemonic.CONCAT_STRINGS:
+                    func = semantics.add if instr.mnemonic == Mnemonic.ADD else semantics.concat
+                    args = (regs[reg_id(operands[1])], regs[reg_id(operands[2])])
+                    ops.append((OpKind.COMPUTE, self.new_slot(), func, args))
+                    regs[reg_id(operands[0])] = ops[-1][1]
+
+                case Mnemonic.INVERT_SIGN | Mnemonic.POP_LAST_CHAR:
+                    func = semantics.invert_sign if instr.mnemonic == Mnemonic.INVERT_SIGN else semantics.pop_last_char
+                    dest = reg_id(operands[0])
+                    ops.append((OpKind.COMPUTE, self.new_slot(), func, (regs[dest],)))
+                    regs[dest] = ops[-1][1]
+
+                case Mnemonic.WRITE_CHAR | Mnemonic.WRITE_LAST_CHAR_CODE:
+                    func = semantics.write_char if instr.mnemonic == Mnemonic.WRITE_CHAR else semantics.access_last_char
+                    ops.append((OpKind.COMPUTE, self.new_slot(), func, (regs[reg_id(operands[1])],)))
+                    regs[reg_id(operands[0])] = ops[-1][1]
+
+                case Mnemonic.PRINT:
+                    ops.append((OpKind.PRINT, None, None, (regs[reg_id(operands[0])],)))
+
+                case Mnemonic.READ_STR:
+                    ops.append((OpKind.READ, self.new_slot(), None, ()))
+                    regs[reg_id(operands[0])] = ops[-1][1]
+
+                case _:
+                    raise Exception(f'Unsupported mnemonic {instr.mnemonic} in block body')
+
+        self.outputs = [(reg, slot) for reg, slot in enumerate(regs) if slot != reg]
+
+        # only keep computations that a register or side effect depends on
+        live = {slot for _, slot in self.outputs}
+        for kind, dest, _, args in reversed(ops):
+            if kind != OpKind.COMPUTE or dest in live:
+                live.update(args)
+        self.ops = [op for op in ops if op[0] != OpKind.COMPUTE or op[1] in live]
+
+    def apply(self, state) -> None:
+        values = self.constants.copy()
+        values[0:8] = state.regs
+
+        for kind, dest, func, args in self.ops:
+            match kind:
+                case OpKind.COMPUTE:
+                    values[dest] = simplify(func(*[values[a] for a in args]))
+                case OpKind.PRINT:
+                    state.print_value(values[args[0]])
+                case OpKind.READ:
+                    values[dest] = state.read_input()
+
+        for reg, slot in self.outputs:
+            state.write_reg(reg, values[slot])
+        state.pos = self.end
+
+# summaries of the blocks of a program, compiled the first time a block is entered
+class BlockSummaries:
+    def __init__(self, instructions: Sequence[Instr], static_cfg: ControlFlowGraph) -> None:
+        self.instructions = instructions
+        self.static_cfg = static_cfg
+        self.summaries: dict[int, BlockSummary] = {}
+
+    def get(self, block: BasicBlock) -> BlockSummary:
+        summary = self.summaries.get(block.id)
+        if summary is None:
+            summary = BlockSummary(self.instructions, block)
+            self.summaries[block.id] = summary
+        return summary
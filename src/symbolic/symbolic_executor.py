@@ -1,39 +1,319 @@
-from disassembler.disassembler import Instr, Mnemonic, Reg
+from bisect import bisect_left, bisect_right
+from collections.abc import Sequence
+from disassembler.disassembler import BRANCH_MNEMONICS, Instr, Mnemonic, Reg
+from disassembler.flow import ControlFlowGraph, Loop, distances_to_ret, find_loops, resolve_branch_offsets, resolve_targets
 from enum import Enum
 from symbolic.symbols import *
-from symbolic.cfg import Node, ConditionalNode
-from typing import Self
+from symbolic.cfg import Node, ConditionalNode, LoopNode, emit_program
+from symbolic.constraints import Constraint, PathConstraints, Relation
+from symbolic.instrumentation import Instrumentation
+from symbolic.merging import ForkPoint, can_merge, merge_states
+from symbolic.registers import RegisterFile
+from symbolic import semantics
+from symbolic.summaries import BlockSummaries
+from symbolic.simplifier import simplify
+from symbolic.solver import is_feasible, value_bounds
+from symbolic.spill import SpillStore, SpilledState
+from symbolic.trace import ExplorationTrace
+from symbolic.scheduler import *
+from typing import NamedTuple, Self, TextIO
+
+# most targets a jump to a symbolic offset is split into
+MAX_JUMP_TARGETS = 64
+
+# iterations of a loop that are run before the rest are summarised
+DEFAULT_UNROLL = 8
+
+# everything about a program that is worked out before exploring it, which
+# only depends on the bytecode so it can be cached between runs
+class StaticAnalysis(NamedTuple):
+    branch_offsets: dict[int, int]
+    branch_targets: dict[int, int]
+    cfg: ControlFlowGraph
+    loops: dict[int, Loop]
+    # filled in as blocks are entered
+    summaries: BlockSummaries
+    # offsets resolve_branch_offsets found in each round, to redo it after a patch
+    offset_rounds: list[dict[int, int]]
+
+def analyse(instructions: Sequence[Instr]) -> StaticAnalysis:
+    offset_rounds = []
+    branch_offsets = resolve_branch_offsets(instructions, offset_rounds)
+    return analyse_offsets(instructions, branch_offsets, offset_rounds)
+
+def analyse_offsets(instructions: Sequence[Instr], branch_offsets: dict[int, int], offset_rounds: list[dict[int, int]]) -> StaticAnalysis:
+    # the rest of the analysis, once the offsets of branches are known
+    branch_targets = resolve_targets(instructions, branch_offsets)
+    cfg = ControlFlowGraph(instructions, branch_targets)
+    return StaticAnalysis(
+        branch_offsets,
+        branch_targets,
+        cfg,
+        find_loops(instructions, cfg),
+        BlockSummaries(instructions, cfg),
+        offset_rounds
+    )
 
 class SymbolicExecutor:
-    def __init__(self, instructions: list[Instr]) -> None:
+    def __init__(
+        self,
+        instructions: Sequence[Instr],
+        strategy: Strategy | None = None,
+        max_states: int | None = None,
+        prune: bool = True,
+        merge: bool = False,
+        summarise: bool = True,
+        max_unroll: int | None = DEFAULT_UNROLL,
+        flag_len: int | None = 29,
+        analysis: StaticAnalysis | None = None,
+        instrumentation: Instrumentation | None = None,
+        trace: ExplorationTrace | None = None,
+        spill: SpillStore | None = None,
+        schedule_root: bool = True
+    ) -> None:
         self.instructions = instructions
-        self.instruction_map = self.build_instruction_map(instructions)
+        # drop successors whose path constraints can't be satisfied
+        self.prune = prune
+        # merge the two sides of a branch when they reach the same join point
+        self.merge = merge
+        self.address_index = self.build_address_index(instructions)
+        self.addresses = sorted(self.address_index)
+        self.analysis = analysis if analysis is not None else analyse(instructions)
+        self.branch_targets = self.analysis.branch_targets
+        self.static_cfg = self.analysis.cfg
+        # states entering a block apply its cached summary instead of running each instruction
+        self.summaries = self.analysis.summaries if summarise else None
+        # loops by the index of their header, after max_unroll iterations a state
+        # runs one symbolic iteration for the rest, None to unroll them fully
+        self.loops = self.analysis.loops
+        self.max_unroll = max_unroll
+        self.last_loop_var = 0
+        self.last_merge_var = 0
+        # length of the input, None for a symbolic length
+        self.flag_len = flag_len
+        # states have to be explored in program order to meet at join points, so
+        # merging defaults to that order and can't be given any other
+        if strategy is None:
+            strategy = Strategy.TOPOLOGICAL if merge else Strategy.DFS
+        elif merge and strategy != Strategy.TOPOLOGICAL:
+            raise Exception(f'Merging states needs the {Strategy.TOPOLOGICAL.name} strategy, not {strategy.name}')
+        # counters and profiling callbacks, the hot paths skip them when this is None
+        self.instrumentation = instrumentation
+        # records the segment of the path each state runs, for exploring again after a patch
+        self.trace = trace
+        # writes pending states to disk past a memory budget, and finished states
+        # are only kept as FinishedState records when this is set
+        self.spill = spill
+        # number of times a block has been entered at each position
+        self.coverage = [0] * len(instructions)
+        self.scheduler = self.create_scheduler(strategy, max_states)
         self.last_id = 0
         self.root_state = State(self, 0)
-        self.active_states = [self.root_state]
+        # a state's cfg node changes when it enters a summarised loop
+        self.root = self.root_state.cfg
         self.finished_states = []
+        if trace is not None and trace.root is None:
+            trace.root = trace.start(self.root_state)
+        # off when the caller schedules the states to explore itself
+        if schedule_root:
+            self.schedule(self.root_state)
+
+    def build_address_index(self, instructions: Sequence[Instr]) -> dict[int, int]:
+        index = {}
+        for i, instr in enumerate(instructions):
+            index[instr.address] = i
+        return index
+
+    def resolve_branch(self, instr: Instr, offset: int) -> int | None:
+        return self.address_index.get(instr.address + 1 + offset)
+
+    def jump_targets(self, constraints: PathConstraints, offset: Symbol, address: int) -> tuple[list[tuple[int, int]], bool]:
+        # values of a symbolic offset that jump to an instruction as (offset, index), up to one
+        # more than MAX_JUMP_TARGETS, and whether they are the only values the offset can take
+        bounds = value_bounds(constraints, offset)
+        if bounds is None:
+            return [], True
+
+        lo, hi = bounds
+        start = bisect_left(self.addresses, address + 1 + lo)
+        stop = bisect_right(self.addresses, address + 1 + hi)
+        targets = []
+        for i in range(start, stop):
+            value = self.addresses[i] - address - 1
+            if self.is_feasible(constraints.add(Constraint(Relation.EQ, offset, str(value), numeric=True))):
+                targets.append((value, self.address_index[self.addresses[i]]))
+                if len(targets) > MAX_JUMP_TARGETS:
+                    break
+        return targets, hi - lo + 1 == len(targets)
+
+    def create_scheduler(self, strategy: Strategy, max_states: int | None) -> Scheduler:
+        match strategy:
+            case Strategy.DFS:
+                return DepthFirstScheduler(max_states)
+            case Strategy.BFS:
+                return BreadthFirstScheduler(max_states)
+            case Strategy.COVERAGE:
+                return PriorityScheduler(lambda state: self.coverage[state.pos], max_states)
+            case Strategy.SHORTEST_PATH:
+                distances = distances_to_ret(self.instructions, self.branch_targets)
+                # states that can't reach a RET go last
+                unreachable = len(self.instructions) + 1
+                return PriorityScheduler(
+                    lambda state: unreachable if distances[state.pos] is None else distances[state.pos],
+                    max_states
+                )
+            case Strategy.TOPOLOGICAL:
+                return PriorityScheduler(lambda state: state.pos, max_states)
+            case _:
+                raise Exception(f'Unknown strategy {strategy}')
+
+    def is_feasible(self, constraints: PathConstraints) -> bool:
+        return not self.prune or is_feasible(constraints)
 
-    def build_instruction_map(self, instructions: list[Instr]) -> dict[int, Instr]:
-        map = {}
-        for instr in instructions:
-            map[instr.address] = instr
-        return map
+    def schedule(self, state: 'State') -> None:
+        if self.scheduler.is_full():
+            state.status = Status.DROPPED
+            state.cfg.add_statement('// path dropped, state limit reached')
+            self.add_finished(state)
+        else:
+            self.scheduler.push(state)
 
     def explore(self) -> None:
-        while len(self.active_states) > 0:
+        while len(self.scheduler) > 0:
             self.step()
+        if self.instrumentation is not None:
+            self.instrumentation.finish()
 
     def step(self) -> None:
-        for state in self.active_states[:]:
+        state = self.unspill(self.scheduler.pop())
+        if self.merge and self.static_cfg.is_join(state.pos):
+            state = self.merge_at_join(state)
+        start = state.pos
+        self.run_block(state)
+
+        for new_state in state.successors:
+            self.schedule(new_state)
+
+        finished = state.status != Status.ACTIVE
+        if finished:
+            self.add_finished(state)
+        else:
+            self.schedule(state)
+
+        if self.instrumentation is not None:
+            self.instrumentation.block_finished(self, state, start, finished)
+        if self.trace is not None:
+            self.trace.block_finished(self, state, start, finished)
+        if self.spill is not None:
+            if finished:
+                # otherwise every state stays reachable from the root state
+                state.successors = []
+            self.spill.enforce(self.scheduler)
+
+    def add_finished(self, state: 'State') -> None:
+        self.finished_states.append(state if self.spill is None else FinishedState.of(state))
+
+    def unspill(self, state: 'State | SpilledState') -> 'State':
+        if not isinstance(state, SpilledState):
+            return state
+        restored = State.restore(self, self.spill.load(state))
+        restored.id = state.id
+        restored.cfg = state.cfg
+        restored.fork_point = state.fork_point
+        restored.side = state.side
+        return restored
+
+    def merge_at_join(self, state: 'State') -> 'State':
+        # states are scheduled by position, so all states waiting at the join point are next
+        states = [state] + [self.unspill(other) for other in self.scheduler.pop_all(state.pos)]
+
+        merged = True
+        while merged:
+            merged = False
+            for i, a in enumerate(states):
+                b = next((b for b in states[i + 1:] if can_merge(a, b)), None)
+                if b is not None:
+                    states.remove(a)
+                    states.remove(b)
+                    a.status = b.status = Status.MERGED
+                    states.append(merge_states(a, b))
+                    merged = True
+                    break
+
+        for other in states[1:]:
+            self.scheduler.push(other)
+        return states[0]
+
+    def run_block(self, state: 'State') -> None:
+        # runs a state until it transfers control, or reaches a join point when merging
+        if state.pos < len(self.instructions):
+            self.coverage[state.pos] += 1
+        while state.status == Status.ACTIVE:
+            if state.pos >= len(self.instructions):
+                print('Execution ran past the end of the program')
+                state.cfg.add_statement('// end of program')
+                state.status = Status.ERRORED
+                break
+
+            if self.loops and self.static_cfg.is_leader(state.pos) and not self.enter_loops(state):
+                break
+
+            if self.summaries is not None and self.static_cfg.is_leader(state.pos):
+                block = self.static_cfg.block_at(state.pos)
+                if self.instrumentation is None:
+                    self.summaries.get(block).apply(state)
+                else:
+                    self.instrumentation.apply_summary(state, self.summaries.get(block))
+                if state.pos == block.end:
+                    # block falls through into the next one
+                    if self.merge and state.pos < len(self.instructions) and self.static_cfg.is_join(state.pos):
+                        break
+                    continue
+
             instr = self.instructions[state.pos]
-            state.step(instr)
+            if self.instrumentation is None:
+                state.step(instr)
+            else:
+                self.instrumentation.step(state, instr)
+            if instr.mnemonic in BRANCH_MNEMONICS:
+                break
+            if self.merge and state.pos < len(self.instructions) and self.static_cfg.is_join(state.pos):
+                break
+
+    def enter_loops(self, state: 'State') -> bool:
+        # keeps track of the loops a state entering a block is in, returns False
+        # if the state went around a summarised loop and stops
+        block = self.static_cfg.block_at(state.pos)
+        for header in [h for h in state.loops if block.id not in self.loops[h].body]:
+            # left the loop, entering it again starts counting afresh
+            del state.loops[header]
+
+        loop = self.loops.get(state.pos)
+        if loop is None:
+            return True
+
+        iterations = state.loops.get(loop.header, 0)
+        if iterations is None:
+            # the summarised iteration covers this path
+            state.cfg.add_statement('continue;')
+            state.status = Status.LOOPED
+            return False
+
+        if self.max_unroll is not None and iterations >= self.max_unroll:
+            state.summarise_loop(loop, self.get_loop_var())
+        else:
+            state.loops[loop.header] = iterations + 1
+        return True
 
-            for new_state in state.successors:
-                self.active_states.append(new_state)
+    def get_loop_var(self) -> str:
+        var = f'i{self.last_loop_var}'
+        self.last_loop_var += 1
+        return var
 
-            if state.status != Status.ACTIVE:
-                self.finished_states.append(state)
-                self.active_states.remove(state)
+    def get_merge_var(self) -> str:
+        var = f'm{self.last_merge_var}'
+        self.last_merge_var += 1
+        return var
 
     def get_next_id(self) -> int:
         id = self.last_id
@@ -41,32 +321,116 @@ class SymbolicExecutor:
         return id
     
     def get_pseudocode(self) -> str:
-        body = '\n\t'.join(self.root_state.cfg.codegen())
-        return f'#include <stdio.h>\n\nint main(int argc, char* argv[]) {{\n\t{body}\n}}'
+        return ''.join(emit_program(self.root))
+
+    def write_pseudocode(self, out: TextIO) -> None:
+        out.writelines(emit_program(self.root))
                 
 class Status(Enum):
     ACTIVE = 0
     TERMINATED = 1
     ERRORED = 2
+    DROPPED = 3
+    MERGED = 4
+    # went around a loop whose iterations were summarised
+    LOOPED = 5
+
+# statuses of states that reached an end of the program
+PATH_END_STATUSES = (Status.TERMINATED, Status.ERRORED)
+
+def ends_path(state: 'State | FinishedState') -> bool:
+    # whether a finished state is the end of a path, states that forked or were
+    # merged are continued by other states
+    successors = state.successors if isinstance(state, FinishedState) else len(state.successors)
+    return successors == 0 and state.status in PATH_END_STATUSES
+
+# what's kept of a finished state when exploring in bounded memory. Its cfg
+# fragment is all pseudocode needs, and its registers, constraints and output
+# would keep their expressions and the strings rendered for them alive
+class FinishedState(NamedTuple):
+    id: int
+    status: Status
+    cfg: Node
+    # number of states it forked into
+    successors: int
+
+    @classmethod
+    def of(cls, state: 'State') -> Self:
+        return cls(state.id, state.status, state.cfg, len(state.successors))
+
+# copy of a state for handing it to other processes or writing it to disk,
+# with snapshots.write_snapshot. Symbols re-intern when they are read and the
+# constraints are rebuilt into a persistent list, the state's cfg and fork
+# point are not part of it
+class StateSnapshot(NamedTuple):
+    pos: int
+    regs: tuple
+    constraints: tuple[Constraint, ...]
+    status: Status
+    loops: tuple[tuple[int, int | None], ...] = ()
+    output: tuple | None = ()
 
 class State:
     def __init__(self, executor: SymbolicExecutor, pos: int) -> None:
         self.executor = executor
         self.id = executor.get_next_id()
         self.pos = pos
-        self.regs = [''] * 8
+        self.regs = RegisterFile()
+        self.constraints = PathConstraints()
+        # the fork this state came from and which side of it the state is on
+        self.fork_point: ForkPoint | None = None
+        self.side: bool | None = None
         self.status = Status.ACTIVE
         self.cfg = Node()
         self.successors = []
+        # iterations of each loop the state is in, None once the loop is summarised
+        self.loops: dict[int, int | None] = {}
+        # values printed so far as a persistent list of (value, rest) pairs, newest
+        # first. It ends in None instead of () when merged states printed different values
+        self.output: tuple | None = ()
+
+    @classmethod
+    def restore(cls, executor: SymbolicExecutor, snapshot: StateSnapshot) -> Self:
+        s = cls(executor, snapshot.pos)
+        s.regs = RegisterFile(list(snapshot.regs))
+        for constraint in snapshot.constraints:
+            s.constraints = s.constraints.add(constraint)
+            # the state was only kept because its constraints are feasible
+            s.constraints.feasible = True
+        s.status = snapshot.status
+        s.loops = dict(snapshot.loops)
+        s.output = () if snapshot.output is not None else None
+        for value in snapshot.output or ():
+            s.output = (value, s.output)
+        return s
+
+    def snapshot(self) -> StateSnapshot:
+        return StateSnapshot(self.pos, tuple(self.regs), tuple(self.constraints), self.status, tuple(self.loops.items()), self.printed())
+
+    def printed(self) -> tuple | None:
+        # values printed so far, oldest first, None when they aren't known
+        values = []
+        node = self.output
+        while node:
+            values.append(node[0])
+            node = node[1]
+        return tuple(reversed(values)) if node is not None else None
 
     def clone(self) -> Self:
         s = State(self.executor, self.pos)
-        for i in range(0, len(self.regs)):
-            item = self.regs[i]
-            copy = item.copy() if isinstance(item, Symbol) else item
-            s.regs[i] = copy
+        # symbols are immutable so registers can be shared until written
+        s.regs = self.regs.fork()
+        s.constraints = self.constraints
+        s.fork_point = self.fork_point
+        s.side = self.side
+        s.loops = self.loops.copy()
+        s.output = self.output
         return s
 
+    def write_reg(self, reg_id: int, value: Symbol | str) -> None:
+        # registers are kept in normal form so expressions don't grow needlessly
+        self.regs[reg_id] = simplify(value)
+
     def get_reg_id(self, operand) -> int:
         if not isinstance(operand, Reg):
             raise Exception(f'Unknown operand, expected register')
@@ -77,34 +441,145 @@ class State:
             raise Exception(f'Unknown operand, expected int')
         return operand
     
-    def prepare_for_numeric_operation(self, operand: Symbol | str):
-        if isinstance(operand, Symbol):
-            return operand
-        else:
-            return str(int(operand))
-        
-    def prepare_for_str_comparison(self, operand: Symbol | str):
-        if isinstance(operand, Symbol):
-            return str(operand)
+    def print_value(self, val: Symbol | str) -> None:
+        self.output = (val, self.output)
+        self.cfg.add_statement(f'puts("{str(val)}");')
+
+    def read_input(self) -> Symbol:
+        flag = StringSymbol('flag', self.executor.flag_len)
+        self.cfg.add_statement(f'char flag[{str(flag.len)}];')
+        self.cfg.add_statement('scanf("%s", flag);')
+        return flag
+
+    def summarise_loop(self, loop: Loop, var: str) -> None:
+        # replaces the rest of a loop's iterations with a single iteration where
+        # the registers it writes have their values after any number of iterations
+        count = IdentifierSymbol(var)
+        for reg in sorted(loop.written):
+            value = None
+            induction = loop.inductions.get(reg)
+            if induction is not None:
+                step = None if induction.step is None else self.regs[induction.step]
+                value = semantics.iterate(induction.mnemonic, self.regs[reg], step, count)
+            self.write_reg(reg, value if value is not None else UnknownSymbol(f'{var}_reg{reg}'))
+        self.constraints = self.constraints.add(Constraint(Relation.LE, '0', count, numeric=True))
+
+        body = Node()
+        self.cfg.next = LoopNode(var, body)
+        self.cfg = body
+        self.loops[loop.header] = None
+        # paths in the loop aren't merged with ones outside it
+        self.fork_point, self.side = None, None
+
+    def test_symbol(self, condition: Constraint) -> Symbol:
+        left = condition.left if isinstance(condition.left, Symbol) else f'"{condition.left}"'
+        right = condition.right if isinstance(condition.right, Symbol) else f'"{condition.right}"'
+        return BinaryExpressionSymbol(condition.relation.value, left, right)
+
+    def fork(self, condition: Constraint, test: str, target: int | Symbol | None, address: int) -> None:
+        # forks into a state that takes the branch and one that falls through,
+        # successors whose path constraints can't be satisfied are dropped
+        consequent = self.clone()
+        consequent.constraints = self.constraints.add(condition)
+        alternate = self.clone()
+        alternate.constraints = self.constraints.add(condition.negate())
+
+        takes_branch = self.executor.is_feasible(consequent.constraints)
+        falls_through = self.executor.is_feasible(alternate.constraints)
+        self.status = Status.TERMINATED
+        if not (self.executor.merge and takes_branch and falls_through):
+            # only a state merged at this fork adds to these constraints again
+            self.constraints.solver = None
+
+        if target is None:
+            consequent_node = Node()
+            if takes_branch:
+                print('Could not find consequent branch of conditional')
+                consequent_node.add_statement('// unknown path')
+                self.status = Status.ERRORED
+        elif isinstance(target, Symbol):
+            consequent_node = consequent.cfg
+            if takes_branch:
+                consequent.switch(target, address)
+                self.successors.extend(consequent.successors)
+                if consequent.status == Status.ERRORED:
+                    self.status = Status.ERRORED
         else:
-            return f'"{operand}"'
-        
-    def access_last_char(self, operand: Symbol | str) -> Symbol | str:
-        if isinstance(operand, StringSymbol) and isinstance(operand.len, int):
-                return MemberExpressionSymbol(operand.copy(), operand.len - 1)
-        elif isinstance(operand, Symbol):
-            length = MemberExpressionSymbol(operand.copy(), '"length"')
-            return MemberExpressionSymbol(operand.copy(), BinaryExpressionSymbol('-', length, 1))
+            consequent.pos = target
+            consequent_node = consequent.cfg
+            if takes_branch:
+                self.successors.append(consequent)
+
+        if falls_through:
+            self.successors.append(alternate)
+
+        if takes_branch and falls_through:
+            conditional = ConditionalNode(test, consequent_node, alternate.cfg)
+            self.cfg.next = conditional
+            fork = ForkPoint(conditional, self.test_symbol(condition), self.constraints, self.fork_point, self.side)
+            consequent.fork_point, consequent.side = fork, True
+            alternate.fork_point, alternate.side = fork, False
+        elif takes_branch:
+            self.cfg.next = consequent_node
+        elif falls_through:
+            self.cfg.next = alternate.cfg
+
+    def switch(self, offset: Symbol, address: int) -> None:
+        # splits the state into one successor for each instruction a symbolic
+        # offset can jump to, written as a chain of if statements
+        targets, exhaustive = self.executor.jump_targets(self.constraints, offset, address)
+        truncated = len(targets) > MAX_JUMP_TARGETS
+        targets = targets[:MAX_JUMP_TARGETS]
+        self.status = Status.TERMINATED
+
+        if len(targets) == 0:
+            print('Jump to symbolic value has no feasible target')
+            self.cfg.add_statement('// unknown path')
+            self.status = Status.ERRORED
+            return
+
+        node = self.cfg
+        for i, (value, target) in enumerate(targets):
+            successor = self.clone()
+            successor.constraints = self.constraints.add(Constraint(Relation.EQ, offset, str(value), numeric=True))
+            successor.pos = target
+            # the branches of a switch aren't merged
+            successor.fork_point, successor.side = None, None
+            self.successors.append(successor)
+
+            if exhaustive and i == len(targets) - 1:
+                # the offset can't take any other value
+                node.next = successor.cfg
+            else:
+                otherwise = Node()
+                node.next = ConditionalNode(f'{str(offset)} == {value}', successor.cfg, otherwise)
+                node = otherwise
+
+        if truncated:
+            print(f'Jump to symbolic value has more than {MAX_JUMP_TARGETS} targets')
+            node.add_statement('// jump targets truncated')
+        elif not exhaustive:
+            node.add_statement('// invalid jump target')
+
+    def jump(self, instr: Instr, offset: Symbol | str, condition: Constraint | None = None, test: str | None = None) -> None:
+        if isinstance(offset, Symbol):
+            target = offset
         else:
-            return str[:-1]
-        
-    def pop_last_char(self, operand: Symbol | str) -> Symbol | str:
-        if isinstance(operand, StringSymbol) and isinstance(operand.len, int):
-            return StringSymbol(operand.name, operand.len - 1)
-        if isinstance(operand, Symbol):
-            return MemberExpressionSymbol(operand.copy(), ':-1')
+            try:
+                target = self.executor.resolve_branch(instr, int(offset))
+            except ValueError:
+                target = None
+
+        if condition is not None:
+            self.fork(condition, test, target, instr.address)
+        elif isinstance(target, Symbol):
+            self.switch(target, instr.address)
+        elif target is None:
+            print('Could not find jump target')
+            self.cfg.add_statement('// unknown path')
+            self.status = Status.ERRORED
         else:
-            return str[:-1]
+            self.pos = target
 
     def step(self, instr: Instr) -> None:
         self.pos += 1
@@ -112,124 +587,75 @@ class State:
         match instr.mnemonic:
             case Mnemonic.CLEAR:
                 reg = self.get_reg_id(instr.operands[0])
-                self.regs[reg] = ''
+                self.write_reg(reg, '')
 
             case Mnemonic.SET:
                 reg = self.get_reg_id(instr.operands[0])
                 val = self.get_str(instr.operands[1])
-                self.regs[reg] = val
+                self.write_reg(reg, val)
 
             case Mnemonic.APPEND:
                 reg = self.get_reg_id(instr.operands[0])
                 val = self.get_str(instr.operands[1])
-                self.regs[reg] += val
+                self.write_reg(reg, semantics.concat(self.regs[reg], val))
 
             case Mnemonic.ADD:
                 dest_id = self.get_reg_id(instr.operands[0])
                 left = self.regs[self.get_reg_id(instr.operands[1])]
                 right = self.regs[self.get_reg_id(instr.operands[2])]
-
-                if left == '' or right == '':
-                    result = left if right == '' else right
-                elif isinstance(left, Symbol) or isinstance(right, Symbol):
-                    result = BinaryExpressionSymbol(
-                        '+', 
-                        self.prepare_for_numeric_operation(left), 
-                        self.prepare_for_numeric_operation(right)
-                    )
-                else:
-                    result = str(int(left) + int(right))
-
-                self.regs[dest_id] = result
+                self.write_reg(dest_id, semantics.add(left, right))
 
             case Mnemonic.CONCAT_STRINGS:
                 dest_id = self.get_reg_id(instr.operands[0])
                 left = self.regs[self.get_reg_id(instr.operands[1])]
                 right = self.regs[self.get_reg_id(instr.operands[2])]
-
-                if left == '' or right == '':
-                    result = left if right == '' else right
-                elif isinstance(left, Symbol) or isinstance(right, Symbol):
-                    result = BinaryExpressionSymbol('+', left, right)
-                else:
-                    result = left + right
-
-                self.regs[dest_id] = result
+                self.write_reg(dest_id, semantics.concat(left, right))
 
             case Mnemonic.INVERT_SIGN:
                 reg_id = self.get_reg_id(instr.operands[0])
-                val = self.regs[reg_id]
-
-                if isinstance(val, Symbol):
-                    result = UnaryExpressionSymbol('-', val)
-                else:
-                    result = str(-1 * int(val))
-
-                self.regs[reg_id] = result
+                self.write_reg(reg_id, semantics.invert_sign(self.regs[reg_id]))
 
             case Mnemonic.WRITE_CHAR:
                 dest = self.get_reg_id(instr.operands[0])
                 src = self.get_reg_id(instr.operands[1])
-                char_code = int(self.regs[src])
-                self.regs[dest] = chr(char_code)
+                self.write_reg(dest, semantics.write_char(self.regs[src]))
 
             case Mnemonic.WRITE_LAST_CHAR_CODE:
                 dest_id = self.get_reg_id(instr.operands[0])
                 val = self.regs[self.get_reg_id(instr.operands[1])]
-
-                self.regs[dest_id] = self.access_last_char(val)
+                self.write_reg(dest_id, semantics.access_last_char(val))
 
             case Mnemonic.POP_LAST_CHAR:
                 reg_id = self.get_reg_id(instr.operands[0])
-                val = self.regs[reg_id]
-
-                self.regs[reg_id] = self.pop_last_char(val)
+                self.write_reg(reg_id, semantics.pop_last_char(self.regs[reg_id]))
 
             case Mnemonic.PRINT:
-                val = self.regs[self.get_reg_id(instr.operands[0])]
-                self.cfg.add_statement(f'puts("{str(val)}");')
+                self.print_value(self.regs[self.get_reg_id(instr.operands[0])])
 
             case Mnemonic.READ_STR:
                 reg_id = self.get_reg_id(instr.operands[0])
-                flag_len = 29 # hardcoded for this sample
-                self.regs[reg_id] = StringSymbol('flag', flag_len)
-                self.cfg.add_statement(f'char flag[{flag_len}];')
-                self.cfg.add_statement('scanf("%s", flag);')
+                self.write_reg(reg_id, self.read_input())
 
-            # TODO: other jumps (not used)
+            case Mnemonic.JMP:
+                offset = self.regs[self.get_reg_id(instr.operands[0])]
+                self.jump(instr, offset)
 
-            case Mnemonic.JNE:
+            case Mnemonic.JE | Mnemonic.JNE:
                 offset = self.regs[self.get_reg_id(instr.operands[0])]
                 left = self.regs[self.get_reg_id(instr.operands[1])]
                 right = self.regs[self.get_reg_id(instr.operands[2])]
 
-                if isinstance(offset, Symbol):
-                    print('Jump to symbolic value, cannot follow')
-                    consequent_node = Node()
-                    consequent_node.add_statement('// unknown path')
-                    self.status = Status.ERRORED
-                else:
-                    offset = int(offset)
-                    consequent_addr = instr.address + 1 + offset
-                    if consequent_addr in self.executor.instruction_map:
-                        target = self.executor.instruction_map[consequent_addr]
-                        consequent = self.clone()
-                        consequent.pos = self.executor.instructions.index(target)
-                        consequent_node = consequent.cfg
-                        self.successors.append(consequent)
-                        self.status = Status.TERMINATED
-                    else:
-                        print('Could not find consequent branch of conditional')
-                        consequent_node = Node()
-                        consequent_node.add_statement('// unknown path')
-                        self.status = Status.ERRORED
-
-                    alternate = self.clone()
-                    self.successors.append(alternate)
-
-                    test = f'{self.prepare_for_str_comparison(left)} != {self.prepare_for_str_comparison(right)}'
-                    conditional = ConditionalNode(test, consequent_node, alternate.cfg)
-                    self.cfg.next = conditional
+                relation = Relation.EQ if instr.mnemonic == Mnemonic.JE else Relation.NE
+                test = f'{semantics.prepare_for_str_comparison(left)} {relation.value} {semantics.prepare_for_str_comparison(right)}'
+                self.jump(instr, offset, Constraint(relation, left, right), test)
+
+            case Mnemonic.JL:
+                left = semantics.to_number(self.regs[self.get_reg_id(instr.operands[0])])
+                right = semantics.to_number(self.regs[self.get_reg_id(instr.operands[1])])
+                offset = self.regs[self.get_reg_id(instr.operands[2])]
+
+                test = f'{str(left)} < {str(right)}'
+                self.jump(instr, offset, Constraint(Relation.LT, left, right, numeric=True), test)
 
             case Mnemonic.RET:
                 self.status = Status.TERMINATED
@@ -1,87 +1,221 @@
+from collections.abc import Callable, Iterator
 from typing import Self
+from weakref import WeakValueDictionary
+
+# every live symbol keyed by its type and constructor arguments
+INTERNED: WeakValueDictionary = WeakValueDictionary()
+
+# structurally equal symbols are interned so that they are the same object,
+# which lets identical sub-expressions be shared between states and makes
+# equality an identity check
+class InternedSymbolMeta(type):
+    def __call__(cls, *args):
+        args = cls.normalise_args(*args)
+        key = (cls, *args)
+        symbol = INTERNED.get(key)
+        if symbol is None:
+            symbol = super().__call__(*args)
+            symbol._hash = hash(key)
+            INTERNED[key] = symbol
+        return symbol
+
+class Symbol(metaclass=InternedSymbolMeta):
+    __slots__ = ('_hash', '_str', '__weakref__')
 
-class Symbol:
     def __init__(self) -> None:
-        pass
+        self._str = None
 
-    def copy(self) -> Self:
+    @classmethod
+    def normalise_args(cls, *args) -> tuple:
+        return args
+
+    def args(self) -> tuple:
         raise Exception('Symbol is abstract')
 
+    def render(self) -> str:
+        raise Exception('Symbol is abstract')
+
+    def copy(self) -> Self:
+        # symbols are never mutated so they can always be shared
+        return self
+
+    def __hash__(self) -> int:
+        return self._hash
+
+    def __reduce__(self):
+        # re-intern when unpickled
+        return (type(self), self.args())
+
+    def __str__(self) -> str:
+        if self._str is None:
+            for symbol in post_order(self, lambda s: s._str is not None):
+                symbol._str = symbol.render()
+        return self._str
+
+    def __repr__(self) -> str:
+        return str(self)
+
+# yields the symbols of an expression that aren't done yet, each after its
+# children. It doesn't recurse, since expression chains can be very deep, so
+# callers are expected to have finished with a symbol before asking for the next
+def post_order(root, done: Callable[[Symbol], bool]) -> Iterator[Symbol]:
+    stack = [root] if isinstance(root, Symbol) and not done(root) else []
+    while stack:
+        symbol = stack[-1]
+        pending = [a for a in symbol.args() if isinstance(a, Symbol) and not done(a)]
+        if pending:
+            stack.extend(pending)
+        else:
+            stack.pop()
+            # shared children can be on the stack more than once
+            if not done(symbol):
+                yield symbol
+
 class IdentifierSymbol(Symbol):
+    __slots__ = ('name',)
+
     def __init__(self, name: str) -> None:
         super().__init__()
         self.name = name
 
-    def copy(self) -> Self:
-        return IdentifierSymbol(self.name)
+    def args(self) -> tuple:
+        return (self.name,)
 
-    def __str__(self) -> str:
+    def render(self) -> str:
         return self.name
-    
-    def __repr__(self) -> str:
-        return str(self)
-    
+
 class StringSymbol(IdentifierSymbol):
-    def __init__(self, name: str, len: int | None) -> None:
+    __slots__ = ('len',)
+
+    def __init__(self, name: str, len: int | Symbol | None) -> None:
         super().__init__(name)
-        self.len = len if len is not None else IdentifierSymbol(f'{self.name}_len')
+        self.len = len
 
-    def copy(self) -> Self:
-        return StringSymbol(self.name, self.len)
+    @classmethod
+    def normalise_args(cls, name: str, len: int | Symbol | None) -> tuple:
+        return (name, len if len is not None else IdentifierSymbol(f'{name}_len'))
 
-    def __str__(self) -> str:
+    def args(self) -> tuple:
+        return (self.name, self.len)
+
+    def render(self) -> str:
         return f'{self.name}'
 
-    def __repr__(self) -> str:
-        return str(self)
-    
+# value of a register that isn't known, such as one a summarised loop writes
+# without a closed form. It can hold any string, not just a number
+class UnknownSymbol(Symbol):
+    __slots__ = ('name',)
+
+    def __init__(self, name: str) -> None:
+        super().__init__()
+        self.name = name
+
+    def args(self) -> tuple:
+        return (self.name,)
+
+    def render(self) -> str:
+        return self.name
+
 class UnaryExpressionSymbol(Symbol):
+    __slots__ = ('operator', 'argument')
+
     def __init__(self, operator: str, argument: Symbol | int) -> None:
         super().__init__()
         self.operator = operator
         self.argument = argument
 
-    def copy(self) -> Self:
-        arg = self.argument.copy() if isinstance(self.argument, Symbol) else self.argument
-        return UnaryExpressionSymbol(self.operator, arg)
+    def args(self) -> tuple:
+        return (self.operator, self.argument)
 
-    def __str__(self) -> str:
+    def render(self) -> str:
         return f'({self.operator}{str(self.argument)})'
-    
-    def __repr__(self) -> str:
-        return str(self)
 
 class BinaryExpressionSymbol(Symbol):
+    __slots__ = ('operator', 'left', 'right')
+
     def __init__(self, operator: str, left: Symbol | int, right: Symbol | int) -> None:
         super().__init__()
         self.operator = operator
         self.left = left
         self.right = right
 
-    def copy(self) -> Self:
-        left = self.left.copy() if isinstance(self.left, Symbol) else self.left
-        right = self.right.copy() if isinstance(self.right, Symbol) else self.right
-        return BinaryExpressionSymbol(self.operator, left, right)
+    def args(self) -> tuple:
+        return (self.operator, self.left, self.right)
 
-    def __str__(self) -> str:
+    def render(self) -> str:
         return f'({str(self.left)} {self.operator} {str(self.right)})'
-    
-    def __repr__(self) -> str:
-        return str(self)
 
 class MemberExpressionSymbol(Symbol):
+    __slots__ = ('object', 'property')
+
     def __init__(self, object: Symbol, property: Symbol | int) -> None:
         super().__init__()
         self.object = object
         self.property = property
 
-    def copy(self) -> Self:
-        obj = self.object.copy()
-        prop = self.property.copy() if isinstance(self.property, Symbol) else self.property
-        return MemberExpressionSymbol(obj, prop)
+    def args(self) -> tuple:
+        return (self.object, self.property)
 
-    def __str__(self) -> str:
+    def render(self) -> str:
         return f'{str(self.object)}[{str(self.property)}]'
-    
-    def __repr__(self) -> str:
-        return str(self)
+
+# string concatenation, which the VM writes the same way as an addition
+class ConcatExpressionSymbol(BinaryExpressionSymbol):
+    __slots__ = ()
+
+    def __init__(self, left: Symbol | str, right: Symbol | str) -> None:
+        super().__init__('+', left, right)
+
+    def args(self) -> tuple:
+        return (self.left, self.right)
+
+# string repeated a symbolic number of times, for registers appended to in a loop
+class RepeatExpressionSymbol(Symbol):
+    __slots__ = ('value', 'count')
+
+    def __init__(self, value: str, count: Symbol | str) -> None:
+        super().__init__()
+        self.value = value
+        self.count = count
+
+    def args(self) -> tuple:
+        return (self.value, self.count)
+
+    def render(self) -> str:
+        return f'"{self.value}".repeat({str(self.count)})'
+
+# value that depends on which branch was taken, for states merged at a join point
+class ConditionalExpressionSymbol(Symbol):
+    __slots__ = ('test', 'consequent', 'alternate')
+
+    def __init__(self, test: Symbol, consequent: Symbol | str, alternate: Symbol | str) -> None:
+        super().__init__()
+        self.test = test
+        self.consequent = consequent
+        self.alternate = alternate
+
+    def args(self) -> tuple:
+        return (self.test, self.consequent, self.alternate)
+
+    def render(self) -> str:
+        consequent = self.consequent if isinstance(self.consequent, Symbol) else f'"{self.consequent}"'
+        alternate = self.alternate if isinstance(self.alternate, Symbol) else f'"{self.alternate}"'
+        return f'({str(self.test)} ? {str(consequent)} : {str(alternate)})'
+
+# merged value that is written to a temporary where the states were merged, so
+# expressions built on it refer to it by name instead of repeating both sides
+class TemporarySymbol(ConditionalExpressionSymbol):
+    __slots__ = ('name',)
+
+    def __init__(self, name: str, test: Symbol, consequent: Symbol | str, alternate: Symbol | str) -> None:
+        super().__init__(test, consequent, alternate)
+        self.name = name
+
+    def args(self) -> tuple:
+        return (self.name, self.test, self.consequent, self.alternate)
+
+    def render(self) -> str:
+        return self.name
+
+    def definition(self) -> str:
+        return f'char* {self.name} = {super().render()};'
@@ -0,0 +1,50 @@
+from disassembler.disassembler import BRANCH_MNEMONICS
+from symbolic.cfg import Node
+
+# the part of a path run by one state, from the fork it was created by to the
+# fork or end it reached. The snapshot and the cfg node it started from are
+# enough to run it again
+class Segment:
+    def __init__(self, node: Node, snapshot) -> None:
+        self.node = node
+        self.snapshot = snapshot
+        # ranges of instruction indices it ran
+        self.ranges: list[range] = []
+        self.children: list[Segment] = []
+
+    def touches(self, indices: list[range]) -> bool:
+        return any(r.start < other.stop and other.start < r.stop for r in self.ranges for other in indices)
+
+# tree of the segments an executor ran, recorded so that exploring can be
+# redone from the first segment that runs a patched instruction. The executor
+# only records into this when it was given one
+class ExplorationTrace:
+    def __init__(self) -> None:
+        self.root: Segment | None = None
+        # segments of the states that are still running, by state ID
+        self.live: dict[int, Segment] = {}
+
+    def start(self, state) -> Segment:
+        segment = Segment(state.cfg, state.snapshot())
+        self.live[state.id] = segment
+        return segment
+
+    def block_finished(self, executor, state, start: int, finished: bool) -> None:
+        # called once a state that started at instruction index start has run and its successors are scheduled
+        segment = self.live[state.id]
+        segment.ranges.append(range(start, self.block_stop(executor, start)))
+        for successor in state.successors:
+            segment.children.append(self.start(successor))
+        if finished:
+            del self.live[state.id]
+
+    def block_stop(self, executor, start: int) -> int:
+        # index after the first branch from start, the furthest run_block can go
+        instructions = executor.instructions
+        cfg = executor.static_cfg
+        if start >= len(instructions):
+            return start
+        block = cfg.block_at(start)
+        while instructions[block.end - 1].mnemonic not in BRANCH_MNEMONICS and block.end < len(instructions):
+            block = cfg.blocks[block.id + 1]
+        return block.end
@@ -0,0 +1,60 @@
+import os
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+from cache.analysis_cache import AnalysisCache, bytecode_digest
+
+DIGEST = bytecode_digest(b'\x57')
+
+class AnalysisCacheTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.cache = AnalysisCache(os.path.join(self.directory.name, 'cache'))
+
+    def write(self, name: str, data: bytes) -> str:
+        path = os.path.join(self.directory.name, name)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+    def read(self, path: str) -> bytes:
+        with open(path, 'rb') as f:
+            return f.read()
+
+    def test_values_are_keyed_by_params(self):
+        self.cache.put(DIGEST, 'outcomes', {'terminated': 2}, 29)
+        self.assertEqual(self.cache.get(DIGEST, 'outcomes', 29), {'terminated': 2})
+        self.assertIsNone(self.cache.get(DIGEST, 'outcomes', 30))
+        self.assertIsNone(self.cache.get(DIGEST, 'static'))
+
+    def test_files_are_copied(self):
+        source = self.write('pseudocode.c', b'int main() {}\n')
+        out = os.path.join(self.directory.name, 'out.c')
+        self.assertFalse(self.cache.get_file(DIGEST, 'pseudocode', out))
+        self.assertFalse(os.path.exists(out))
+
+        self.cache.put_file(DIGEST, 'pseudocode', source)
+        self.assertTrue(self.cache.get_file(DIGEST, 'pseudocode', out))
+        self.assertEqual(self.read(out), b'int main() {}\n')
+        # files and pickles of the same stage are separate entries
+        self.assertIsNone(self.cache.get(DIGEST, 'pseudocode'))
+
+    def test_eviction_counts_files(self):
+        cache = AnalysisCache(self.cache.directory, max_bytes=1500)
+        source = self.write('pseudocode.c', bytes(1000))
+        cache.put_file(DIGEST, 'pseudocode', source, 1)
+        os.utime(cache.path(DIGEST, 'pseudocode', (1,), '.out'), (0, 0))
+        cache.put_file(DIGEST, 'pseudocode', source, 2)
+
+        out = os.path.join(self.directory.name, 'out.c')
+        # the least recently used entry goes
+        self.assertFalse(cache.get_file(DIGEST, 'pseudocode', out, 1))
+        self.assertTrue(cache.get_file(DIGEST, 'pseudocode', out, 2))
+
+if __name__ == '__main__':
+    unittest.main()
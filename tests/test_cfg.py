@@ -0,0 +1,58 @@
+import io
+import os
+import sys
+import unittest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+from disassembler.disassembler import Disassembler
+from symbolic.cfg import ConditionalNode, Node
+from symbolic.symbolic_executor import SymbolicExecutor
+
+with open(os.path.join(ROOT, 'input', 'bytecode'), 'rb') as f:
+    INSTRUCTIONS = Disassembler(f.read()).disassemble()
+
+def statement(text: str) -> Node:
+    node = Node()
+    node.add_statement(text)
+    return node
+
+class EmitTest(unittest.TestCase):
+    def test_if_statements_are_indented_by_depth(self):
+        inner = ConditionalNode('b', statement('x();'), statement('y();'))
+        root = statement('start();')
+        root.next = ConditionalNode('a', Node(), Node())
+        root.next.consequent.next = inner
+        root.next.next = statement('end();')
+        self.assertEqual(root.codegen(), [
+            'start();',
+            'if (a) {',
+            '\tif (b) {',
+            '\t\tx();',
+            '\t} else {',
+            '\t\ty();',
+            '\t}',
+            '} else {',
+            '}',
+            'end();'
+        ])
+
+    def test_deep_nesting_doesnt_recurse(self):
+        root = node = Node()
+        for i in range(20000):
+            node.next = ConditionalNode(f'c{i}', Node(), statement('return 0;'))
+            node = node.next.consequent
+        lines = root.codegen()
+        self.assertEqual(len(lines), 20000 * 4)
+        self.assertEqual(lines[-1], '}')
+
+    def test_written_pseudocode_matches(self):
+        executor = SymbolicExecutor(INSTRUCTIONS)
+        executor.explore()
+        f = io.StringIO()
+        executor.write_pseudocode(f)
+        self.assertEqual(f.getvalue(), executor.get_pseudocode())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+import os
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+from cli import STAGES, Job, JobSettings, run_job
+from symbolic.symbolic_executor import DEFAULT_UNROLL
+
+BYTECODE = os.path.join(ROOT, 'input', 'bytecode')
+
+class RunJobTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def run_job(self, name: str, cache: bool = True, **settings) -> tuple[dict, str]:
+        output = os.path.join(self.directory.name, name)
+        cache_directory = os.path.join(self.directory.name, 'cache') if cache else None
+        summary = run_job(Job(BYTECODE, output), JobSettings(STAGES, 29, DEFAULT_UNROLL, None, cache_directory, **settings))
+        with open(os.path.join(output, 'pseudocode.c')) as f:
+            return summary, f.read()
+
+    def test_cached_pseudocode_is_copied(self):
+        summary, pseudocode = self.run_job('first')
+        self.assertEqual(summary['status'], 'ok')
+        self.assertFalse(summary['cached'])
+        self.assertEqual(summary['outcomes'], {'terminated': 2})
+
+        summary, cached = self.run_job('second')
+        self.assertTrue(summary['cached'])
+        self.assertEqual(summary['outcomes'], {'terminated': 2})
+        self.assertEqual(cached, pseudocode)
+
+    def test_spilled_exploration_writes_the_same_pseudocode(self):
+        _, pseudocode = self.run_job('memory', cache=False)
+        summary, spilled = self.run_job('spilled', cache=False, max_live_states=1)
+        self.assertGreater(summary['spilled_states'], 0)
+        self.assertEqual(spilled, pseudocode)
+        self.assertFalse(os.path.exists(os.path.join(self.directory.name, 'cache')))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import io
+import os
+import sys
+import unittest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+from disassembler.disassembler import BRANCH_MNEMONICS, Disassembler, decode
+
+with open(os.path.join(ROOT, 'input', 'bytecode'), 'rb') as f:
+    BYTECODE = f.read()
+
+class DecodeTest(unittest.TestCase):
+    def test_sample_disassembles_as_before(self):
+        dis = Disassembler(BYTECODE)
+        dis.disassemble()
+        with open(os.path.join(ROOT, 'output', 'disassembly.txt')) as f:
+            self.assertEqual(''.join(dis.get_disassembly()), f.read())
+
+    def test_instructions_are_found_by_index_and_address(self):
+        instrs = decode(BYTECODE)
+        for index, instr in enumerate(instrs):
+            self.assertEqual(instrs.index_of_address(instr.address), index)
+            self.assertEqual(instrs.mnemonic_at(index), instr.mnemonic)
+        self.assertEqual(str(instrs[-1]), str(instrs[len(instrs) - 1]))
+        # inside the operands of the second instruction
+        self.assertGreater(instrs[2].address, instrs[1].address + 1)
+        with self.assertRaises(ValueError):
+            instrs.index_of_address(instrs[1].address + 1)
+
+    def test_bad_bytecode_is_rejected(self):
+        for code in (bytes([0]), BYTECODE[:-1] + bytes([255]), BYTECODE[:2]):
+            with self.subTest(code=code[-2:]), self.assertRaises(Exception):
+                decode(code)
+
+class DisassemblyTest(unittest.TestCase):
+    def test_templates_format_like_instructions(self):
+        dis = Disassembler(BYTECODE)
+        dis.disassemble()
+        expected = []
+        for instr in dis.instructions:
+            expected.append(str(instr) + '\n')
+            if instr.mnemonic in BRANCH_MNEMONICS:
+                expected[-1] += '\n'
+        self.assertEqual(dis.get_disassembly(), expected)
+
+    def test_ranges_are_written_in_order(self):
+        dis = Disassembler(BYTECODE)
+        dis.disassemble()
+        lines = dis.get_disassembly()
+        f = io.StringIO()
+        dis.write_disassembly(f, [range(10, 20), range(0, 5)])
+        self.assertEqual(f.getvalue(), ''.join(lines[10:20] + lines[0:5]))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+import os
+import sys
+import unittest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+from disassembler.disassembler import Disassembler
+from symbolic.scheduler import Strategy
+from symbolic.spill import SpillStore
+from symbolic.symbolic_executor import SymbolicExecutor, ends_path
+
+with open(os.path.join(ROOT, 'input', 'bytecode'), 'rb') as f:
+    INSTRUCTIONS = Disassembler(f.read()).disassemble()
+
+class PathEndTest(unittest.TestCase):
+    def test_sample_has_two_paths(self):
+        # one prints ok and the other no, the states that forked aren't paths
+        executor = SymbolicExecutor(INSTRUCTIONS)
+        executor.explore()
+        self.assertGreater(len(executor.finished_states), 2)
+        self.assertEqual(sum(ends_path(state) for state in executor.finished_states), 2)
+
+    def test_finished_state_records_end_the_same_paths(self):
+        with SpillStore(max_live_states=1) as spill:
+            executor = SymbolicExecutor(INSTRUCTIONS, spill=spill)
+            executor.explore()
+        self.assertEqual(sum(ends_path(state) for state in executor.finished_states), 2)
+
+class SpillTest(unittest.TestCase):
+    def test_spilled_states_explore_the_same_program(self):
+        for strategy in Strategy:
+            with self.subTest(strategy=strategy):
+                executor = SymbolicExecutor(INSTRUCTIONS, strategy)
+                executor.explore()
+                with SpillStore(max_live_states=1) as spill:
+                    spilled = SymbolicExecutor(INSTRUCTIONS, strategy, spill=spill)
+                    spilled.explore()
+                self.assertGreater(spill.spills, 0)
+                self.assertEqual(spilled.get_pseudocode(), executor.get_pseudocode())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,35 @@
+import os
+import sys
+import unittest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+from disassembler.disassembler import Disassembler, Instr, Mnemonic, Reg
+from disassembler.flow import resolve_branch_offsets, resolve_targets
+from symbolic.symbolic_executor import SymbolicExecutor
+
+with open(os.path.join(ROOT, 'input', 'bytecode'), 'rb') as f:
+    INSTRUCTIONS = Disassembler(f.read()).disassemble()
+
+class ResolveTargetsTest(unittest.TestCase):
+    def test_offsets_outside_the_program_have_no_target(self):
+        # addresses 0, 1 and 3, a jump at 1 lands at 1 + 1 + offset
+        instrs = [Instr(0, Mnemonic.SET, Reg.REG_5, '0'), Instr(1, Mnemonic.JMP, Reg.REG_5), Instr(3, Mnemonic.RET)]
+        self.assertEqual(resolve_targets(instrs, {1: 1}), {1: 2})
+        self.assertEqual(resolve_targets(instrs, {1: 0}), {})
+        self.assertEqual(resolve_targets(instrs, {1: -3}), {})
+
+    def test_executor_uses_the_same_targets(self):
+        targets = resolve_targets(INSTRUCTIONS, resolve_branch_offsets(INSTRUCTIONS))
+        self.assertTrue(targets)
+        self.assertEqual(SymbolicExecutor(INSTRUCTIONS).branch_targets, targets)
+
+    def test_resolve_branch_matches_static_targets(self):
+        executor = SymbolicExecutor(INSTRUCTIONS)
+        offsets = resolve_branch_offsets(INSTRUCTIONS)
+        for index, target in executor.branch_targets.items():
+            self.assertEqual(executor.resolve_branch(INSTRUCTIONS[index], offsets[index]), target)
+
+if __name__ == '__main__':
+    unittest.main()
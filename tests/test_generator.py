@@ -0,0 +1,34 @@
+import os
+import sys
+import unittest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+from concrete.interpreter import ConcreteInterpreter, Outcome
+from disassembler.disassembler import Disassembler
+from generator import ProgramParams, generate_program
+from symbolic.symbolic_executor import SymbolicExecutor
+
+class GeneratorTest(unittest.TestCase):
+    def test_programs_depend_only_on_their_params(self):
+        params = ProgramParams(size=20, loop_depth=2, seed=3)
+        self.assertEqual(generate_program(params), generate_program(params))
+        self.assertNotEqual(generate_program(params), generate_program(params._replace(seed=4)))
+
+    def test_programs_run_to_the_end(self):
+        for loop_depth in (0, 1, 2):
+            with self.subTest(loop_depth=loop_depth):
+                instrs = Disassembler(generate_program(ProgramParams(size=30, loop_depth=loop_depth))).disassemble()
+                result = ConcreteInterpreter(instrs).run('a' * 29)
+                self.assertEqual(result.outcome, Outcome.RETURNED)
+
+    def test_checks_become_branches(self):
+        instrs = Disassembler(generate_program(ProgramParams(size=10, branch_density=1.0))).disassemble()
+        executor = SymbolicExecutor(instrs)
+        executor.explore()
+        self.assertEqual(executor.get_pseudocode().count('return 0;'), 11)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import contextlib
+import io
+import os
+import random
+import re
+import sys
+import unittest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+from disassembler.disassembler import decode
+from generator import *
+from symbolic.incremental import IncrementalExplorer
+from symbolic.symbolic_executor import SymbolicExecutor
+
+JL = 43
+JUMP_OPCODES = (JMP, JE, JNE, JL)
+
+# a one and a zero bit of a jump offset built by Assembler.const, which have the same length
+OFFSET_ONE = bytes([ADD, OFFSET, SCRATCH, OFFSET])
+OFFSET_ZERO = bytes([INVERT_SIGN, OFFSET, INVERT_SIGN, OFFSET])
+
+def swap_jump(code: bytes, rng: random.Random) -> bytes:
+    # replaces a jump with another kind of jump
+    addresses = [instr.address for instr in decode(code) if code[instr.address] in JUMP_OPCODES]
+    address = rng.choice(addresses)
+    patched = bytearray(code)
+    patched[address] = rng.choice([opcode for opcode in JUMP_OPCODES if opcode != code[address]])
+    return bytes(patched)
+
+def flip_offset_bit(code: bytes, rng: random.Random) -> bytes:
+    # moves where a jump lands by flipping a bit of the constant its offset is built from
+    bits = [m.start() for pattern in (OFFSET_ONE, OFFSET_ZERO) for m in re.finditer(re.escape(pattern), code)]
+    start = rng.choice(bits)
+    patched = bytearray(code)
+    patched[start:start + 4] = OFFSET_ZERO if code[start] == ADD else OFFSET_ONE
+    return bytes(patched)
+
+def pseudocode(explorer) -> str:
+    # loop variables kept from before a patch are numbered differently to a fresh run
+    return re.sub(r'\bi\d+', 'i', explorer.get_pseudocode())
+
+class PatchTest(unittest.TestCase):
+    def test_patches_match_exploring_again(self):
+        rng = random.Random(0)
+        changed = 0
+        for program in range(12):
+            params = ProgramParams(
+                size=rng.randrange(4, 16),
+                branch_density=rng.random(),
+                loop_depth=rng.choice([1, 2]),
+                flag_len=5,
+                seed=rng.randrange(1000)
+            )
+            code = generate_program(params)
+            # jumps that land outside the program are reported on stdout
+            with contextlib.redirect_stdout(io.StringIO()):
+                explorer = IncrementalExplorer(code, flag_len=params.flag_len)
+                explorer.explore()
+                for patch in range(3):
+                    patched = (swap_jump if rng.random() < 0.5 else flip_offset_bit)(code, rng)
+                    before = pseudocode(explorer)
+                    explorer.patch(patched)
+                    fresh = SymbolicExecutor(decode(patched), flag_len=params.flag_len)
+                    fresh.explore()
+
+                    with self.subTest(program=program, patch=patch):
+                        self.assertEqual(pseudocode(explorer), pseudocode(fresh))
+                    changed += pseudocode(explorer) != before
+                    code = patched
+        # the patches aren't all to code that can't be reached
+        self.assertGreaterEqual(changed, 12)
+
+    def test_unchanged_bytecode_explores_nothing(self):
+        code = generate_program(ProgramParams(size=8, loop_depth=1, flag_len=5))
+        explorer = IncrementalExplorer(code, flag_len=5)
+        explorer.explore()
+        before = explorer.get_pseudocode()
+        self.assertEqual(explorer.patch(code), [])
+        self.assertEqual(explorer.get_pseudocode(), before)
+
+    def test_patch_doesnt_run_the_root_again(self):
+        # flipping a bit of the last offset only changes where the last check jumps
+        code = generate_program(ProgramParams(size=4, branch_density=1.0, flag_len=5))
+        start = code.rfind(OFFSET_ONE)
+        patched = code[:start] + OFFSET_ZERO + code[start + 4:]
+        explorer = IncrementalExplorer(code, flag_len=5)
+        explorer.explore()
+        with contextlib.redirect_stdout(io.StringIO()):
+            restarts = explorer.patch(patched)
+        self.assertTrue(restarts)
+        self.assertNotIn(explorer.trace.root, restarts)
+        fresh = SymbolicExecutor(decode(patched), flag_len=5)
+        with contextlib.redirect_stdout(io.StringIO()):
+            fresh.explore()
+        self.assertEqual(pseudocode(explorer), pseudocode(fresh))
+
+if __name__ == '__main__':
+    unittest.main()
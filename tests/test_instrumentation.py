@@ -0,0 +1,49 @@
+import contextlib
+import io
+import os
+import sys
+import unittest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+from disassembler.disassembler import Disassembler
+from symbolic.instrumentation import Event, Instrumentation, expression_size
+from symbolic.symbolic_executor import SymbolicExecutor
+from symbolic.symbols import *
+
+with open(os.path.join(ROOT, 'input', 'bytecode'), 'rb') as f:
+    INSTRUCTIONS = Disassembler(f.read()).disassemble()
+
+class ExpressionSizeTest(unittest.TestCase):
+    def test_shared_sub_expressions_count_each_time_they_are_written(self):
+        x = BinaryExpressionSymbol('+', IdentifierSymbol('x'), '1')
+        self.assertEqual(expression_size(BinaryExpressionSymbol('*', x, x)), 2 * expression_size(x) + 2)
+
+    def test_deep_chains_dont_recurse(self):
+        value = IdentifierSymbol('x')
+        for _ in range(20000):
+            value = BinaryExpressionSymbol('+', value, '1')
+        self.assertEqual(expression_size(value), expression_size(IdentifierSymbol('x')) + 20000 * 3)
+
+class InstrumentationTest(unittest.TestCase):
+    def test_instrumented_exploration_writes_the_same_pseudocode(self):
+        plain = SymbolicExecutor(INSTRUCTIONS)
+        plain.explore()
+
+        instrumentation = Instrumentation(report=False)
+        forks = []
+        instrumentation.subscribe(Event.FORK, lambda state, address, successors: forks.append(address))
+        instrumented = SymbolicExecutor(INSTRUCTIONS, instrumentation=instrumentation)
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            instrumented.explore()
+
+        self.assertEqual(out.getvalue(), '')
+        self.assertEqual(instrumented.get_pseudocode(), plain.get_pseudocode())
+        self.assertEqual(len(forks), sum(instrumentation.forks.values()))
+        self.assertEqual(len(instrumentation.lifetimes), len(instrumented.finished_states))
+        self.assertIsNotNone(instrumentation.end_time)
+        self.assertIn('Forks:', instrumentation.report())
+
+if __name__ == '__main__':
+    unittest.main()
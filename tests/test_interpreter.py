@@ -0,0 +1,139 @@
+import os
+import sys
+import unittest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+from concrete.interpreter import ConcreteInterpreter, Outcome
+from disassembler.disassembler import Instr, Mnemonic, Reg
+
+def program(*instrs: tuple) -> list[Instr]:
+    # one address per instruction, so jumps skip (reg5 + 1) instructions
+    return [Instr(address, mnemonic, *operands) for address, (mnemonic, *operands) in enumerate(instrs)]
+
+# sets reg5 to a jump offset the way bytecode has to, by adding up ones
+def offset(number: int) -> list[tuple]:
+    code = [(Mnemonic.SET, Reg.REG_5, '0'), (Mnemonic.SET, Reg.REG_1, '0'), (Mnemonic.APPEND, Reg.REG_1, '1')]
+    code += [(Mnemonic.ADD, Reg.REG_5, Reg.REG_5, Reg.REG_1)] * abs(number)
+    if number < 0:
+        code.append((Mnemonic.INVERT_SIGN, Reg.REG_5))
+    return code
+
+WRITE_CHAR = program(
+    (Mnemonic.READ_STR, Reg.REG_0),
+    (Mnemonic.WRITE_CHAR, Reg.REG_4, Reg.REG_0),
+    (Mnemonic.PRINT, Reg.REG_4),
+    (Mnemonic.RET,),
+)
+
+class FaultTest(unittest.TestCase):
+    def run_program(self, instrs: list[Instr], stdin: str):
+        return ConcreteInterpreter(instrs).run(stdin)
+
+    def test_write_char(self):
+        result = self.run_program(WRITE_CHAR, '65')
+        self.assertEqual(result.outcome, Outcome.RETURNED)
+        self.assertEqual(result.output, 'A\n')
+
+    def test_char_code_out_of_range(self):
+        for stdin in ('99999999999999999999', '1114112', '-1', 'abc', ''):
+            with self.subTest(stdin=stdin):
+                self.assertEqual(self.run_program(WRITE_CHAR, stdin).outcome, Outcome.FAULTED)
+
+    def test_running_past_the_end(self):
+        result = self.run_program(program((Mnemonic.SET, Reg.REG_4, '0'), (Mnemonic.PRINT, Reg.REG_4)), '')
+        self.assertEqual(result.outcome, Outcome.FAULTED)
+        # output before the fault is kept
+        self.assertEqual(result.output, '0\n')
+
+    def test_jump_outside_the_program(self):
+        instrs = program(*offset(100), (Mnemonic.JMP, Reg.REG_5), (Mnemonic.RET,))
+        self.assertEqual(self.run_program(instrs, '').outcome, Outcome.FAULTED)
+
+    def test_pop_last_char_of_empty_string(self):
+        # popping the terminator isn't a fault
+        instrs = program((Mnemonic.POP_LAST_CHAR, Reg.REG_0), (Mnemonic.RET,))
+        self.assertEqual(self.run_program(instrs, '').outcome, Outcome.RETURNED)
+
+class ComparisonTest(unittest.TestCase):
+    # prints an empty line unless reg0 < 1
+    LESS_THAN_ONE = program(
+        (Mnemonic.READ_STR, Reg.REG_0),
+        (Mnemonic.CONCAT_STRINGS, Reg.REG_6, Reg.REG_0, Reg.REG_2),
+        (Mnemonic.SET, Reg.REG_7, '0'),
+        (Mnemonic.APPEND, Reg.REG_7, '1'),
+        *offset(1),
+        (Mnemonic.JL, Reg.REG_6, Reg.REG_7, Reg.REG_5),
+        (Mnemonic.PRINT, Reg.REG_4),
+        (Mnemonic.RET,),
+    )
+
+    # adds 1 to the input
+    ADD_ONE = program(
+        (Mnemonic.READ_STR, Reg.REG_0),
+        (Mnemonic.SET, Reg.REG_1, '0'),
+        (Mnemonic.APPEND, Reg.REG_1, '1'),
+        (Mnemonic.ADD, Reg.REG_4, Reg.REG_0, Reg.REG_1),
+        (Mnemonic.PRINT, Reg.REG_4),
+        (Mnemonic.RET,),
+    )
+
+    def test_jl_compares_numbers(self):
+        interpreter = ConcreteInterpreter(self.LESS_THAN_ONE)
+        self.assertEqual(interpreter.run('0').output, '')
+        self.assertEqual(interpreter.run('-5').output, '')
+        self.assertEqual(interpreter.run('5').output, '\n')
+
+    def test_jl_treats_non_numbers_as_zero(self):
+        result = ConcreteInterpreter(self.LESS_THAN_ONE).run('abc')
+        self.assertEqual(result.outcome, Outcome.RETURNED)
+        self.assertEqual(result.output, '')
+
+    def test_add_faults_on_non_numbers(self):
+        # unlike jl, add doesn't convert a string that isn't a number
+        interpreter = ConcreteInterpreter(self.ADD_ONE)
+        self.assertEqual(interpreter.run('41').output, '42\n')
+        self.assertEqual(interpreter.run('abc').outcome, Outcome.FAULTED)
+
+    def test_add_of_empty_string(self):
+        # the other operand is written back as it is
+        self.assertEqual(ConcreteInterpreter(self.ADD_ONE).run('').output, '01\n')
+
+class BatchTest(unittest.TestCase):
+    def test_run_batch(self):
+        interpreter = ConcreteInterpreter(WRITE_CHAR)
+        inputs = ['65', '99999999999999999999', '66']
+        results = interpreter.run_batch(inputs)
+        self.assertEqual([r.input for r in results], inputs)
+        self.assertEqual([r.outcome for r in results], [Outcome.RETURNED, Outcome.FAULTED, Outcome.RETURNED])
+        self.assertEqual(results[2].output, 'B\n')
+        # the one trace is compiled once and shared
+        self.assertEqual(list(interpreter.traces), [0])
+
+    def test_run_batch_matches_run(self):
+        inputs = ['0', 'abc', '-5', '5']
+        batch = ConcreteInterpreter(ComparisonTest.LESS_THAN_ONE).run_batch(inputs)
+        self.assertEqual(batch, [ConcreteInterpreter(ComparisonTest.LESS_THAN_ONE).run(i) for i in inputs])
+
+class StepLimitTest(unittest.TestCase):
+    # jumps back to itself forever
+    LOOP = program(*offset(-1), (Mnemonic.JMP, Reg.REG_5))
+
+    def test_step_limit(self):
+        result = ConcreteInterpreter(self.LOOP, max_steps=100).run('')
+        self.assertEqual(result.outcome, Outcome.STEP_LIMIT)
+        self.assertGreaterEqual(result.steps, 100)
+
+    def test_returns_under_the_limit(self):
+        result = ConcreteInterpreter(WRITE_CHAR, max_steps=4).run('65')
+        self.assertEqual(result.outcome, Outcome.RETURNED)
+        self.assertEqual(result.steps, 4)
+
+    def test_limit_counts_whole_traces(self):
+        # a trace that starts under the limit runs to its end
+        result = ConcreteInterpreter(WRITE_CHAR, max_steps=1).run('65')
+        self.assertEqual(result.outcome, Outcome.RETURNED)
+
+if __name__ == '__main__':
+    unittest.main()
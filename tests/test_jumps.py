@@ -0,0 +1,84 @@
+import contextlib
+import io
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from disassembler.disassembler import Instr, Mnemonic, Reg
+from symbolic.symbolic_executor import SymbolicExecutor
+
+FLAG, OUT, LEFT, RIGHT, OFFSET = Reg.REG_0, Reg.REG_1, Reg.REG_2, Reg.REG_3, Reg.REG_5
+
+def program(*instrs: tuple) -> list[Instr]:
+    # reads the input and its last character code first, one address per instruction
+    instrs = ((Mnemonic.READ_STR, FLAG), (Mnemonic.WRITE_LAST_CHAR_CODE, LEFT, FLAG)) + instrs
+    return [Instr(address, mnemonic, *operands) for address, (mnemonic, *operands) in enumerate(instrs)]
+
+def pseudocode(instrs: list[Instr]) -> str:
+    executor = SymbolicExecutor(instrs)
+    # jumps that can't be followed are reported on stdout
+    with contextlib.redirect_stdout(io.StringIO()):
+        executor.explore()
+    return executor.get_pseudocode()
+
+# prints a when the jump at address 5 is taken and b when it isn't
+BRANCHES = (
+    (Mnemonic.SET, OUT, 'b'),
+    (Mnemonic.PRINT, OUT),
+    (Mnemonic.RET,),
+    (Mnemonic.SET, OUT, 'a'),
+    (Mnemonic.PRINT, OUT),
+    (Mnemonic.RET,)
+)
+
+class JumpTest(unittest.TestCase):
+    def test_je_takes_the_branch_when_equal(self):
+        code = pseudocode(program(
+            (Mnemonic.SET, RIGHT, '65'),
+            (Mnemonic.SET, OFFSET, '3'),
+            (Mnemonic.JE, OFFSET, LEFT, RIGHT),
+            *BRANCHES
+        ))
+        self.assertIn('if (flag[28] == "65") {\n\t\tputs("a");', code)
+
+    def test_jl_compares_as_numbers(self):
+        code = pseudocode(program(
+            (Mnemonic.SET, RIGHT, '65'),
+            (Mnemonic.SET, OFFSET, '3'),
+            (Mnemonic.JL, LEFT, RIGHT, OFFSET),
+            *BRANCHES
+        ))
+        self.assertIn('if (flag[28] < 65) {\n\t\tputs("a");', code)
+
+    def test_infeasible_side_of_jl_is_pruned(self):
+        # character codes aren't negative
+        code = pseudocode(program(
+            (Mnemonic.SET, RIGHT, '0'),
+            (Mnemonic.SET, OFFSET, '3'),
+            (Mnemonic.JL, LEFT, RIGHT, OFFSET),
+            *BRANCHES
+        ))
+        self.assertNotIn('if', code)
+        self.assertIn('puts("b");', code)
+
+    def test_jmp_is_followed(self):
+        code = pseudocode(program(
+            (Mnemonic.SET, OFFSET, '3'),
+            (Mnemonic.JMP, OFFSET),
+            *BRANCHES
+        ))
+        self.assertEqual(code.count('return 0;'), 1)
+        self.assertIn('puts("a");', code)
+
+    def test_symbolic_offset_is_split_into_its_targets(self):
+        # the character code lands on one of the 6 instructions after the jump or outside the program
+        code = pseudocode(program((Mnemonic.JMP, LEFT), *BRANCHES))
+        for value in range(6):
+            self.assertIn(f'flag[28] == {value}', code)
+        self.assertEqual(code.count('return 0;'), 6)
+        self.assertIn('// invalid jump target', code)
+
+if __name__ == '__main__':
+    unittest.main()
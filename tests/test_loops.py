@@ -0,0 +1,47 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from concrete.interpreter import ConcreteInterpreter, Outcome
+from disassembler.disassembler import Instr, Mnemonic, Reg
+from symbolic.simplifier import is_numeric
+from symbolic.symbolic_executor import DEFAULT_UNROLL, SymbolicExecutor
+from symbolic.symbols import *
+
+def appending_loop(iterations: int) -> list[Instr]:
+    # appends to a string until it's as long as the expected one, which isn't an
+    # induction the loop summary has a closed form for
+    instrs = [
+        (Mnemonic.READ_STR, Reg.REG_0),
+        (Mnemonic.CLEAR, Reg.REG_3),
+        (Mnemonic.SET, Reg.REG_2, 'a' * iterations),
+        # loop header
+        (Mnemonic.APPEND, Reg.REG_3, 'a'),
+        (Mnemonic.SET, Reg.REG_5, '2'),
+        (Mnemonic.JE, Reg.REG_5, Reg.REG_3, Reg.REG_2),
+        (Mnemonic.SET, Reg.REG_5, '-5'),
+        (Mnemonic.JMP, Reg.REG_5),
+        (Mnemonic.PRINT, Reg.REG_3),
+        (Mnemonic.RET,)
+    ]
+    return [Instr(address, mnemonic, *operands) for address, (mnemonic, *operands) in enumerate(instrs)]
+
+class SummarisedLoopTest(unittest.TestCase):
+    def test_loop_longer_than_the_unroll_limit_still_exits(self):
+        instrs = appending_loop(DEFAULT_UNROLL + 4)
+        self.assertEqual(ConcreteInterpreter(instrs).run('a' * 29).outcome, Outcome.RETURNED)
+
+        executor = SymbolicExecutor(instrs)
+        executor.explore()
+        pseudocode = executor.get_pseudocode()
+        self.assertIn('i0_reg3', pseudocode)
+        self.assertIn('puts(', pseudocode)
+        self.assertIn('return 0;', pseudocode)
+
+    def test_registers_without_a_closed_form_are_not_numbers(self):
+        self.assertFalse(is_numeric(UnknownSymbol('i0_reg3')))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from disassembler.disassembler import Instr, Mnemonic, Reg
+from symbolic.inputs import path_conditions, solve_paths
+from symbolic.scheduler import Strategy
+from symbolic.symbolic_executor import SymbolicExecutor, ends_path
+
+# conditional jumps compare REG_6 with REG_7 on the concrete interpreter
+FLAG, ACC, OFFSET, LEFT, RIGHT = Reg.REG_0, Reg.REG_1, Reg.REG_5, Reg.REG_6, Reg.REG_7
+
+def triangles(count: int) -> list[Instr]:
+    # a character check per triangle, adding the character to the accumulator
+    # when it doesn't match and leaving the accumulator as it is when it does
+    instrs = [(Mnemonic.READ_STR, FLAG), (Mnemonic.SET, ACC, '0')]
+    for i in range(count):
+        instrs += [
+            (Mnemonic.WRITE_LAST_CHAR_CODE, LEFT, FLAG),
+            (Mnemonic.POP_LAST_CHAR, FLAG),
+            (Mnemonic.SET, RIGHT, str(65 + i)),
+            # over the addition
+            (Mnemonic.SET, OFFSET, '1'),
+            (Mnemonic.JNE, OFFSET, LEFT, RIGHT),
+            (Mnemonic.ADD, ACC, LEFT, ACC)
+        ]
+    instrs += [(Mnemonic.PRINT, ACC), (Mnemonic.RET,)]
+    return [Instr(address, *instr) for address, instr in enumerate(instrs)]
+
+def explore(count: int, *args, **kwargs) -> SymbolicExecutor:
+    executor = SymbolicExecutor(triangles(count), *args, **kwargs)
+    executor.explore()
+    return executor
+
+def paths(executor: SymbolicExecutor) -> int:
+    return sum(ends_path(state) for state in executor.finished_states)
+
+class MergeTest(unittest.TestCase):
+    def test_pseudocode_grows_linearly_with_merged_triangles(self):
+        small = len(explore(7, merge=True).get_pseudocode())
+        large = len(explore(14, merge=True).get_pseudocode())
+        self.assertLess(large, small * 3)
+
+    def test_merged_registers_are_written_to_temporaries(self):
+        pseudocode = explore(2, merge=True).get_pseudocode()
+        self.assertIn('char* m0_reg1 = ', pseudocode)
+        self.assertIn('char* m1_reg1 = ', pseudocode)
+
+    def test_merged_path_is_solved(self):
+        executor = explore(4, merge=True)
+        paths = solve_paths(executor.instructions, path_conditions(executor.finished_states, executor.flag_len))
+        self.assertEqual(len(paths), 1)
+        self.assertTrue(paths[0].verified)
+
+class StrategyTest(unittest.TestCase):
+    def test_merging_defaults_to_program_order(self):
+        # the sides of the triangle only meet when they're explored in program order
+        self.assertEqual(paths(explore(1, merge=True)), 1)
+        self.assertEqual(paths(explore(1, Strategy.TOPOLOGICAL, merge=True)), 1)
+        self.assertEqual(paths(explore(1)), 2)
+
+    def test_merging_rejects_other_strategies(self):
+        for strategy in (Strategy.DFS, Strategy.BFS, Strategy.COVERAGE, Strategy.SHORTEST_PATH):
+            with self.subTest(strategy=strategy), self.assertRaises(Exception):
+                SymbolicExecutor(triangles(1), strategy, merge=True)
+
+if __name__ == '__main__':
+    unittest.main()
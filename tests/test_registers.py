@@ -0,0 +1,43 @@
+import os
+import sys
+import unittest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+from disassembler.disassembler import Disassembler
+from symbolic.registers import RegisterFile
+from symbolic.symbolic_executor import SymbolicExecutor
+
+with open(os.path.join(ROOT, 'input', 'bytecode'), 'rb') as f:
+    INSTRUCTIONS = Disassembler(f.read()).disassemble()
+
+class RegisterFileTest(unittest.TestCase):
+    def test_forks_share_values_until_written(self):
+        regs = RegisterFile()
+        regs[0] = 'a'
+        other = regs.fork()
+        self.assertIs(other.values, regs.values)
+
+        other[0] = 'b'
+        self.assertIsNot(other.values, regs.values)
+        self.assertEqual(list(regs), ['a'] + [''] * 7)
+        self.assertEqual(list(other), ['b'] + [''] * 7)
+
+        # the original copies on its next write too, it doesn't know the fork already did
+        values = regs.values
+        regs[1] = 'c'
+        self.assertIsNot(regs.values, values)
+        self.assertEqual(regs[1], 'c')
+
+    def test_clones_keep_their_own_registers(self):
+        executor = SymbolicExecutor(INSTRUCTIONS)
+        state = executor.scheduler.pop()
+        state.regs[2] = 'x'
+        clone = state.clone()
+        clone.regs[2] = 'y'
+        self.assertEqual(state.regs[2], 'x')
+        self.assertEqual(clone.regs[2], 'y')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import os
+import sys
+import unittest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+from disassembler.disassembler import Disassembler
+from symbolic.scheduler import *
+from symbolic.symbolic_executor import Status, SymbolicExecutor
+
+with open(os.path.join(ROOT, 'input', 'bytecode'), 'rb') as f:
+    INSTRUCTIONS = Disassembler(f.read()).disassemble()
+
+def pop_all(scheduler: Scheduler) -> list:
+    return [scheduler.pop() for _ in range(len(scheduler))]
+
+class SchedulerTest(unittest.TestCase):
+    def test_pop_order(self):
+        depth_first, breadth_first = DepthFirstScheduler(), BreadthFirstScheduler()
+        priority = PriorityScheduler(lambda state: state % 2)
+        for state in range(4):
+            depth_first.push(state)
+            breadth_first.push(state)
+            priority.push(state)
+        self.assertEqual(pop_all(depth_first), [3, 2, 1, 0])
+        self.assertEqual(pop_all(breadth_first), [0, 1, 2, 3])
+        # ties are popped in the order they were pushed
+        self.assertEqual(pop_all(priority), [0, 2, 1, 3])
+
+    def test_max_states(self):
+        scheduler = DepthFirstScheduler(2)
+        scheduler.push(0)
+        self.assertFalse(scheduler.is_full())
+        scheduler.push(1)
+        self.assertTrue(scheduler.is_full())
+
+class StrategyTest(unittest.TestCase):
+    def test_strategies_explore_the_same_program(self):
+        expected = SymbolicExecutor(INSTRUCTIONS)
+        expected.explore()
+        for strategy in Strategy:
+            with self.subTest(strategy=strategy):
+                executor = SymbolicExecutor(INSTRUCTIONS, strategy)
+                executor.explore()
+                self.assertEqual(executor.get_pseudocode(), expected.get_pseudocode())
+
+    def test_states_past_the_limit_are_dropped(self):
+        executor = SymbolicExecutor(INSTRUCTIONS, max_states=1)
+        executor.explore()
+        self.assertIn(Status.DROPPED, [state.status for state in executor.finished_states])
+        self.assertIn('// path dropped, state limit reached', executor.get_pseudocode())
+
+if __name__ == '__main__':
+    unittest.main()
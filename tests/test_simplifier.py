@@ -0,0 +1,68 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from symbolic.simplifier import is_canonical, is_numeric, simplify
+from symbolic.symbols import *
+
+FLAG = StringSymbol('flag', 29)
+CHAR = MemberExpressionSymbol(FLAG, '0')
+
+def char(index: int) -> MemberExpressionSymbol:
+    return MemberExpressionSymbol(FLAG, str(index))
+
+def add(left, right) -> BinaryExpressionSymbol:
+    return BinaryExpressionSymbol('+', left, right)
+
+def negate(value) -> UnaryExpressionSymbol:
+    return UnaryExpressionSymbol('-', value)
+
+class SimplifyAddTest(unittest.TestCase):
+    def test_constants_are_folded(self):
+        self.assertIs(simplify(add(add(CHAR, '5'), '3')), add(CHAR, '8'))
+        self.assertIs(simplify(add(add(CHAR, '5'), '-5')), CHAR)
+
+    def test_input_keeps_its_conversion_to_a_number(self):
+        # the VM writes flag + 5 + -5 as a number, or faults
+        self.assertIs(simplify(add(add(FLAG, '5'), '-5')), add(FLAG, '0'))
+
+    def test_negation_keeps_its_conversion_to_a_number(self):
+        # -flag[0] is -0 when flag[0] is 0
+        negated = negate(CHAR)
+        self.assertIs(simplify(add(add(negated, '5'), '-5')), add(negated, '0'))
+
+    def test_only_numbers_cancel(self):
+        self.assertEqual(simplify(add(CHAR, negate(CHAR))), '0')
+        # flag + -flag faults unless flag is a number
+        self.assertIs(simplify(add(FLAG, negate(FLAG))), add(FLAG, negate(FLAG)))
+
+class NumberKindTest(unittest.TestCase):
+    def test_character_codes_and_sums_are_canonical(self):
+        self.assertTrue(is_canonical(char(0)))
+        self.assertTrue(is_canonical(add(char(0), '5')))
+
+    def test_input_is_not_numeric(self):
+        self.assertFalse(is_numeric(FLAG))
+        self.assertFalse(is_numeric(ConcatExpressionSymbol(FLAG, '1')))
+
+    def test_negation_is_numeric_only_when_its_argument_is(self):
+        self.assertTrue(is_numeric(negate(char(0))))
+        self.assertFalse(is_numeric(negate(FLAG)))
+        # negating 0 gives -0
+        self.assertFalse(is_canonical(negate(char(0))))
+
+    def test_adding_a_string_that_can_be_empty_is_not_canonical(self):
+        # '' + x is x as it is
+        self.assertFalse(is_canonical(add(FLAG, negate(char(0)))))
+        self.assertTrue(is_numeric(add(FLAG, '5')))
+
+    def test_deep_chains_are_classified_without_recursing(self):
+        value = char(0)
+        for i in range(20000):
+            value = add(value, char(i % 29))
+        self.assertTrue(is_canonical(value))
+
+if __name__ == '__main__':
+    unittest.main()
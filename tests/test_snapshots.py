@@ -0,0 +1,50 @@
+import os
+import pickle
+import sys
+import unittest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+from disassembler.disassembler import Disassembler
+from symbolic.constraints import Constraint, Relation
+from symbolic.inputs import PathCondition
+from symbolic.parallel import ShardResult, explore_shard, init_worker
+from symbolic.scheduler import Strategy
+from symbolic.snapshots import dumps_snapshot, loads_snapshot
+from symbolic.symbolic_executor import StateSnapshot, Status
+from symbolic.symbols import *
+
+with open(os.path.join(ROOT, 'input', 'bytecode'), 'rb') as f:
+    INSTRUCTIONS = Disassembler(f.read()).disassemble()
+
+FLAG = StringSymbol('flag', 29)
+
+def deep_chain(depth: int) -> Symbol:
+    value = MemberExpressionSymbol(FLAG, '0')
+    for i in range(depth):
+        value = BinaryExpressionSymbol('+', value, MemberExpressionSymbol(FLAG, str(i % 29)))
+    return value
+
+class SnapshotTest(unittest.TestCase):
+    def test_deep_registers_round_trip(self):
+        chain = deep_chain(20000)
+        snapshot = StateSnapshot(0, (chain,) + ('',) * 7, (Constraint(Relation.NE, chain, '0'),), Status.ACTIVE, (), (chain,))
+        with self.assertRaises(RecursionError):
+            pickle.dumps(snapshot)
+        self.assertEqual(loads_snapshot(dumps_snapshot(snapshot)), snapshot)
+
+    def test_path_conditions_round_trip(self):
+        condition = PathCondition(1, Status.TERMINATED, (Constraint(Relation.EQ, deep_chain(20000), '5'),), None, 29)
+        self.assertEqual(loads_snapshot(dumps_snapshot(condition)), condition)
+
+    def test_shard_with_deep_registers(self):
+        init_worker(INSTRUCTIONS, Strategy.DFS, True, True, 8, 29)
+        snapshot = StateSnapshot(0, (deep_chain(20000),) + ('',) * 7, (), Status.ACTIVE)
+        # with no budget the state comes straight back
+        result: ShardResult = loads_snapshot(explore_shard(dumps_snapshot([snapshot]), 0))
+        self.assertEqual(len(result.roots), 1)
+        self.assertEqual([state for _, state in result.frontier], [snapshot])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from symbolic.constraints import Constraint, PathConstraints, Relation
+from symbolic.solver import Solver, is_feasible, path_solver
+from symbolic.symbols import *
+
+FLAG = StringSymbol('flag', 29)
+
+def char(index: int) -> MemberExpressionSymbol:
+    return MemberExpressionSymbol(FLAG, str(index))
+
+def path(*constraints: Constraint) -> PathConstraints:
+    node = PathConstraints()
+    for constraint in constraints:
+        node = node.add(constraint)
+    return node
+
+class FeasibilityTest(unittest.TestCase):
+    def test_contradicting_equalities(self):
+        self.assertTrue(is_feasible(path(Constraint(Relation.EQ, char(0), '97'))))
+        self.assertFalse(is_feasible(path(
+            Constraint(Relation.EQ, char(0), '97'),
+            Constraint(Relation.NE, char(0), '97')
+        )))
+
+    def test_negated_input_can_equal_any_string(self):
+        # flag = 'abc' makes -flag print as -abc
+        self.assertTrue(is_feasible(path(Constraint(Relation.EQ, UnaryExpressionSymbol('-', FLAG), '-abc'))))
+
+    def test_negated_number_can_print_as_minus_zero(self):
+        self.assertTrue(is_feasible(path(Constraint(Relation.EQ, UnaryExpressionSymbol('-', char(0)), '-0'))))
+
+    def test_number_never_equals_a_non_canonical_literal(self):
+        self.assertFalse(is_feasible(path(Constraint(Relation.EQ, BinaryExpressionSymbol('+', char(0), '5'), '007'))))
+
+    def test_sum_equality_narrows_character(self):
+        constraints = path(Constraint(Relation.EQ, BinaryExpressionSymbol('+', char(0), '5'), '102'))
+        self.assertEqual(path_solver(constraints).domains[char(0)], (97, 97))
+
+    def test_concatenation_is_split_into_numbers(self):
+        concat = ConcatExpressionSymbol(BinaryExpressionSymbol('+', char(0), '5'), '-')
+        self.assertTrue(is_feasible(path(Constraint(Relation.EQ, concat, '102-'))))
+        self.assertFalse(is_feasible(path(Constraint(Relation.EQ, concat, '1024-'))))
+
+    def test_numeric_comparison(self):
+        self.assertFalse(is_feasible(path(
+            Constraint(Relation.LT, char(0), '10', numeric=True),
+            Constraint(Relation.LT, '20', char(0), numeric=True)
+        )))
+
+class IncrementalTest(unittest.TestCase):
+    def test_fork_extends_a_copy_of_the_parent_solver(self):
+        parent = path(Constraint(Relation.LE, char(0), '100', numeric=True))
+        self.assertTrue(is_feasible(parent))
+        domains = dict(parent.solver.domains)
+
+        taken = parent.add(Constraint(Relation.EQ, char(0), '97'))
+        not_taken = parent.add(Constraint(Relation.EQ, char(0), '120'))
+        self.assertTrue(is_feasible(taken))
+        self.assertFalse(is_feasible(not_taken))
+        self.assertEqual(parent.solver.domains, domains)
+        self.assertEqual(taken.solver.domains[char(0)], (97, 97))
+
+    def test_released_ancestors_are_replayed(self):
+        parent = path(Constraint(Relation.LE, char(0), '100', numeric=True))
+        self.assertTrue(is_feasible(parent))
+        parent.solver = None
+        child = parent.add(Constraint(Relation.LE, '90', char(0), numeric=True))
+        self.assertEqual(path_solver(child).domains[char(0)], (90, 100))
+
+    def test_infeasible_ancestor(self):
+        parent = path(Constraint(Relation.LT, char(0), '0', numeric=True))
+        self.assertFalse(is_feasible(parent))
+        self.assertIsNone(path_solver(parent.add(Constraint(Relation.EQ, char(1), '97'))))
+
+    def test_same_result_as_a_fresh_solver(self):
+        constraints = PathConstraints()
+        for i in range(50):
+            constraints = constraints.add(Constraint(Relation.LT, char(i % 5), char(i % 5 + 1), numeric=True))
+            self.assertTrue(is_feasible(constraints))
+
+        solver = Solver()
+        for constraint in constraints:
+            solver.add(constraint)
+        solver.propagate()
+        self.assertEqual(
+            {var: solver.domains[var] for var in solver.domains},
+            {var: constraints.solver.domains[var] for var in solver.domains}
+        )
+
+class ModelTest(unittest.TestCase):
+    def test_model_satisfies_the_constraints(self):
+        solver = Solver()
+        solver.add(Constraint(Relation.EQ, BinaryExpressionSymbol('+', char(0), '5'), '102'))
+        solver.add(Constraint(Relation.LT, char(0), char(1), numeric=True))
+        model = solver.find_model()
+        self.assertEqual(model[char(0)], 97)
+        self.assertGreater(model[char(1)], 97)
+
+if __name__ == '__main__':
+    unittest.main()
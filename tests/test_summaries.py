@@ -0,0 +1,39 @@
+import os
+import sys
+import unittest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+from disassembler.disassembler import Disassembler, Instr, Mnemonic, Reg
+from symbolic.symbolic_executor import SymbolicExecutor
+
+with open(os.path.join(ROOT, 'input', 'bytecode'), 'rb') as f:
+    INSTRUCTIONS = Disassembler(f.read()).disassemble()
+
+def pseudocode(instrs, **kwargs) -> str:
+    executor = SymbolicExecutor(instrs, **kwargs)
+    executor.explore()
+    return executor.get_pseudocode()
+
+class SummaryTest(unittest.TestCase):
+    def test_summaries_give_the_same_pseudocode_as_stepping(self):
+        for merge in (False, True):
+            with self.subTest(merge=merge):
+                self.assertEqual(pseudocode(INSTRUCTIONS, merge=merge), pseudocode(INSTRUCTIONS, merge=merge, summarise=False))
+
+    def test_overwritten_registers_are_not_computed(self):
+        instrs = [
+            Instr(0, Mnemonic.SET, Reg.REG_0, '1'),
+            Instr(1, Mnemonic.ADD, Reg.REG_1, Reg.REG_0, Reg.REG_0),
+            Instr(2, Mnemonic.SET, Reg.REG_1, '5'),
+            Instr(3, Mnemonic.PRINT, Reg.REG_1),
+            Instr(4, Mnemonic.RET)
+        ]
+        executor = SymbolicExecutor(instrs)
+        summary = executor.summaries.get(executor.static_cfg.block_at(0))
+        self.assertEqual(len(summary.ops), 1)
+        self.assertIn('puts("5");', pseudocode(instrs))
+
+if __name__ == '__main__':
+    unittest.main()
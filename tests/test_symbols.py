@@ -0,0 +1,59 @@
+import os
+import pickle
+import sys
+import unittest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+from symbolic.symbols import *
+
+def chain(depth: int) -> Symbol:
+    value = IdentifierSymbol('x')
+    for _ in range(depth):
+        value = BinaryExpressionSymbol('+', value, '1')
+    return value
+
+class InternTest(unittest.TestCase):
+    def test_equal_symbols_are_the_same_object(self):
+        flag = StringSymbol('flag', 29)
+        self.assertIs(MemberExpressionSymbol(flag, 28), MemberExpressionSymbol(StringSymbol('flag', 29), 28))
+        self.assertIsNot(MemberExpressionSymbol(flag, 28), MemberExpressionSymbol(flag, 27))
+
+    def test_default_length_is_interned(self):
+        self.assertIs(StringSymbol('flag', None).len, IdentifierSymbol('flag_len'))
+
+    def test_unpickling_interns(self):
+        value = BinaryExpressionSymbol('+', IdentifierSymbol('x'), '1')
+        self.assertIs(pickle.loads(pickle.dumps(value)), value)
+
+class RenderTest(unittest.TestCase):
+    def test_render(self):
+        value = UnaryExpressionSymbol('-', BinaryExpressionSymbol('+', MemberExpressionSymbol(StringSymbol('flag', 29), 0), '1'))
+        self.assertEqual(str(value), '(-(flag[0] + 1))')
+
+    def test_deep_chains_dont_recurse(self):
+        rendered = str(chain(20000))
+        self.assertTrue(rendered.startswith('(' * 20000 + 'x + 1)'))
+
+class PostOrderTest(unittest.TestCase):
+    def test_children_come_first_and_shared_ones_once(self):
+        x = IdentifierSymbol('x')
+        shared = BinaryExpressionSymbol('+', x, '1')
+        root = BinaryExpressionSymbol('-', shared, UnaryExpressionSymbol('-', shared))
+        visited = []
+        for symbol in post_order(root, lambda s: s in visited):
+            visited.append(symbol)
+        self.assertEqual(visited, [x, shared, UnaryExpressionSymbol('-', shared), root])
+
+    def test_done_symbols_are_skipped(self):
+        x = IdentifierSymbol('x')
+        self.assertEqual(list(post_order(BinaryExpressionSymbol('+', x, '1'), lambda s: True)), [])
+        self.assertEqual(list(post_order('1', lambda s: False)), [])
+        visited = set()
+        for symbol in post_order(chain(20000), lambda s: s in visited or s is x):
+            visited.add(symbol)
+        self.assertEqual(len(visited), 20000)
+
+if __name__ == '__main__':
+    unittest.main()